@@ -1,22 +1,81 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from supabase import create_client
-import pandas as pd
+import contextlib
+import contextvars
 import math
 import os
+import threading
 import time
-from urllib.parse import urlparse
-import requests
-from io import StringIO
-import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from painel.alertas import MotorAlertas, acima_do_limite
+from painel.aquecimento import AQUECIMENTO
+from painel.anomalias import REGRAS_PADRAO, DetectorAnomalias
+from painel.burn_rate import TaxasOperacoes
+from painel.coletor import Coletor
+from painel.comparativo import ComparativoDiario
+from painel.compartilhado import SnapshotCompartilhado
+from painel.dados import (
+    consultar_totais_sql,
+    consultar_ultima_linha,
+    extrair_metricas,
+    operacoes_totais_sql,
+    totais_sql_ausente,
+)
+from painel.formatacao import fmt_datetime_br, fmt_float, fmt_int, fmt_moeda_brl, to_float_safe
+from painel.limites import (
+    PLANILHA_LIMITES_URL,
+    FonteLimites,
+    carregar_limites_google,
+    get_limites_operacao,
+    montar_aliases_limites,
+)
+from painel.historico import HistoricoStore, caminho_historico
+from painel.rastreio import fase, iniciar_rastreio
+from painel.notificacoes import DestinoArquivo, DestinoLog, DestinoWebhook, Notificador
+from painel.snapshot import CHAVE_SALVO_EM, SnapshotDisco
+from painel.sparklines import BuffersOperacoes, svg_sparkline
+from painel.registro import carregar_registro, operacoes_do_grupo, subgrupos
+from painel.rollup import MODOS_TICKET, RollupIncremental, calcular_rollup_sql, salvo_em_por_grupo
+from painel import telemetria
+from painel.tempo import TZ_SP, para_epoch
+
+# ✅ tempos por fase deste rerun (ver expander "Diagnóstico" no fim da página)
+RASTREIO = iniciar_rastreio()
 
 # ========== CONFIG ==========
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 AUTO_REFRESH_MS = 120000  # 120s ou 2 minutos
+PAGINA_TAMANHO = int(os.getenv("PAINEL_PAGINA_TAMANHO", "10"))  # cards por página em cada quadrante
+CARROSSEL_MS = int(os.getenv("PAINEL_CARROSSEL_MS", str(AUTO_REFRESH_MS)))  # troca de página no modo TV
+TOTAIS_VIA_SQL = os.getenv("PAINEL_TOTAIS_SQL", "1") == "1"  # sql/painel_totais.sql; sem a função, soma as linhas
+HISTORICO_ATIVO = os.getenv("PAINEL_HISTORICO", "1") == "1"  # coletor de histórico em segundo plano
+COLETA_INTERVALO_S = int(os.getenv("PAINEL_COLETA_INTERVALO_S", "60"))
+ANOMALIA_LIMIAR_Z = float(os.getenv("PAINEL_ANOMALIA_LIMIAR_Z", "3.0"))
+BURN_JANELA_S = int(os.getenv("PAINEL_BURN_JANELA_MIN", "30")) * 60  # janela do ritmo de consumo
+BURN_HORIZONTE_S = int(os.getenv("PAINEL_BURN_HORIZONTE_MIN", "120")) * 60  # antecedência do alerta preditivo
+SPARKLINE_JANELA_S = int(os.getenv("PAINEL_SPARKLINE_JANELA_H", "6")) * 3600
+SPARKLINE_PONTOS = int(os.getenv("PAINEL_SPARKLINE_PONTOS", "720"))  # capacidade do ring buffer por métrica
+DADOS_DIR = os.getenv("PAINEL_DADOS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".painel"))
+FETCH_PARALELO = int(os.getenv("PAINEL_FETCH_PARALELO", "8"))  # consultas simultâneas por rerun
+METRICS_PORTA = int(os.getenv("PAINEL_METRICS_PORTA", "9108"))  # /metrics (Prometheus); 0 desliga
+METRICS_HOST = os.getenv("PAINEL_METRICS_HOST", telemetria.HOST_PADRAO)  # 0.0.0.0 para o Prometheus de fora
+ALERTA_HISTERESE = float(os.getenv("PAINEL_ALERTA_HISTERESE", "0.02"))  # fração do limite para sair do alerta
+ALERTA_INTERVALO_S = int(os.getenv("PAINEL_ALERTA_INTERVALO_S", "600"))  # mínimo entre avisos do mesmo alerta
+ALERTA_MAX_POR_MINUTO = int(os.getenv("PAINEL_ALERTA_MAX_POR_MINUTO", "20"))
+ALERTA_WEBHOOK = os.getenv("PAINEL_ALERTA_WEBHOOK")  # vazio: sem webhook
+ALERTA_ARQUIVO = os.getenv("PAINEL_ALERTA_ARQUIVO", os.path.join(DADOS_DIR, "alertas.jsonl"))  # "" desliga
+SNAPSHOT_ARQUIVO = os.getenv("PAINEL_SNAPSHOT_ARQUIVO", os.path.join(DADOS_DIR, "snapshot.json"))  # "" desliga
+COMPARTILHADO_ATIVO = os.getenv("PAINEL_COMPARTILHADO", "0") == "1"  # réplicas no mesmo host: um poller só
+COMPARTILHADO_DIR = os.getenv("PAINEL_COMPARTILHADO_DIR", DADOS_DIR)  # o mesmo para todas as réplicas
+COMPARTILHADO_INTERVALO_S = int(os.getenv("PAINEL_COMPARTILHADO_INTERVALO_S", "30"))
 PAGE_TITLE = "📊 Painel Supervisório — Operações PBX & Vivo"
 
 # ✅ Planilha pública com limites (dinâmicos)
-GOOGLE_SHEET_URL = "https://docs.google.com/spreadsheets/d/1MrG40xIke5idxF-lIu-koeyL2oNyjTXMEtcqK3E2qps/edit?usp=sharing"
+GOOGLE_SHEET_URL = PLANILHA_LIMITES_URL
 GOOGLE_SHEET_GID = os.getenv("GOOGLE_SHEET_GID", "0")  # seu caso: gid=0
 
 # ========== CONEXÃO ==========
@@ -27,6 +86,28 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 st.set_page_config(page_title=PAGE_TITLE, layout="wide")
+
+# ========== MÉTRICAS (PROMETHEUS) ==========
+@st.cache_resource
+def obter_servidor_metricas():
+    """
+    Um servidor /metrics (e /ready) por processo; se a porta já estiver em uso
+    (ex.: aberta pelo lançador painel.servidor), segue sem ele.
+    """
+    if not METRICS_PORTA:
+        return None
+    try:
+        return telemetria.iniciar_servidor(
+            telemetria.metricas_padrao(janela_sessao_s=2 * AUTO_REFRESH_MS / 1000), METRICS_PORTA, METRICS_HOST,
+            pronto=AQUECIMENTO.pronto,
+        )
+    except OSError:
+        return None
+
+obter_servidor_metricas()
+_ctx = get_script_run_ctx()
+if _ctx is not None:
+    telemetria.registrar_sessao(_ctx.session_id)
 st.markdown(f"### {PAGE_TITLE}")
 
 # ===== CSS GLOBAL =====
@@ -80,6 +161,10 @@ st.markdown(
         font-weight: 600;
     }
 
+    .op-updated span.op-stale {
+        color: #b45309;
+    }
+
     .quad {
         border-radius: 18px;
         padding: 14px 14px 2px 14px;
@@ -94,6 +179,20 @@ st.markdown(
         margin-bottom: 10px;
     }
 
+    /* ✅ Card esqueleto enquanto os dados da operação não chegam */
+    .op-card.skeleton .sk-line {
+        height: 14px;
+        margin: 10px 0;
+        border-radius: 6px;
+        background: rgba(15, 23, 42, 0.08);
+        animation: sk-pulso 1.2s ease-in-out infinite;
+    }
+    .op-card.skeleton .sk-line.short { width: 60%; }
+    @keyframes sk-pulso {
+        0%, 100% { opacity: 0.5; }
+        50% { opacity: 1; }
+    }
+
     /* ✅ Caixas customizadas com tamanho próximo ao st.metric */
     .kv-box {
         border-radius: 10px;
@@ -111,6 +210,11 @@ st.markdown(
         border: 1px solid #f59e0b !important;
     }
 
+    .kv-box.prev {
+        background-color: #fed7aa !important; /* laranja: limite previsto */
+        border: 1px solid #f97316 !important;
+    }
+
     .kv-label {
         font-size: 0.80rem;
         color: #6b7280;
@@ -141,343 +245,428 @@ st.markdown(
         font-weight: 600;
         line-height: 1.1;
     }
+
+    .kv-sub {
+        font-size: 0.72rem;
+        color: #6b7280;
+        margin-top: 3px;
+    }
+
+    /* sparklines (últimas horas) */
+    .spark-box {
+        border-radius: 10px;
+        padding: 6px 10px 4px 10px;
+        border: 1px solid rgba(148,163,184,0.3);
+        background-color: rgba(255,255,255,0.55);
+    }
+
+    .spark-label {
+        font-size: 0.72rem;
+        color: #6b7280;
+        line-height: 1.1;
+    }
     </style>
     """,
     unsafe_allow_html=True,
 )
 
-# Auto-refresh silencioso
-st.components.v1.html(
-    f"""<script>
-        setTimeout(function() {{ window.parent.location.reload(); }}, {AUTO_REFRESH_MS});
-    </script>""",
-    height=0,
-)
-
 # ========== FUNÇÕES GERAIS ==========
-def fmt_int(x):
-    try:
-        return f"{int(x):,}".replace(",", ".")
-    except Exception:
-        return "-"
-
-def fmt_float(x, casas=2):
-    try:
-        if x is None or (isinstance(x, float) and math.isnan(x)):
-            return "-"
-        return (
-            f"{float(x):,.{casas}f}"
-            .replace(",", "X")
-            .replace(".", ",")
-            .replace("X", ".")
-        )
-    except Exception:
-        return "-"
-
-def fmt_moeda_brl(x):
-    v = fmt_float(x, 2)
-    return f"R$ {v}" if v != "-" else "-"
-
-def fmt_datetime_br(dt_str):
-    if dt_str is None or dt_str == "":
-        return "-"
-    try:
-        ts = pd.to_datetime(dt_str, errors="coerce")
-        if pd.isna(ts):
-            return "-"
-        if ts.tzinfo is None:
-            ts = ts.tz_localize("America/Sao_Paulo")
-        else:
-            ts = ts.tz_convert("America/Sao_Paulo")
-        return ts.strftime("%d/%m/%Y %H:%M:%S")
-    except Exception:
-        return str(dt_str)
-
-def to_float_safe(v):
-    try:
-        if v is None:
-            return None
-        if isinstance(v, str):
-            vv = v.strip().replace("R$", "").replace(" ", "")
-            if vv == "":
-                return None
-            # 1.234,56 -> 1234.56
-            if "," in vv and "." in vv:
-                vv = vv.replace(".", "").replace(",", ".")
-            elif "," in vv:
-                vv = vv.replace(",", ".")
-            return float(vv)
-        return float(v)
-    except Exception:
-        return None
-
-def normalize_text(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s).strip().lower()
-    s = "".join(ch for ch in unicodedata.normalize("NFD", s) if unicodedata.category(ch) != "Mn")
-    s = " ".join(s.split())
-    return s
-
 def css_class_alert(is_alert: bool, extra_class: str = "") -> str:
     base = "kv-box warn" if is_alert else "kv-box"
     return f"{base} {extra_class}".strip()
 
-def render_kv_box(label: str, value_text: str, alert: bool = False, big: bool = False, is_datetime: bool = False):
-    extra = "datetime" if is_datetime else ""
+def fmt_delta_ontem(atual, base) -> str | None:
+    """Variação percentual contra o mesmo horário de ontem (None sem base comparável)."""
+    atual_f = to_float_safe(atual)
+    base_f = to_float_safe(base)
+    if atual_f is None or not base_f:
+        return None
+    pct = (atual_f - base_f) / abs(base_f) * 100
+    sinal = "+" if pct >= 0 else ""
+    return f"{sinal}{fmt_float(pct, 1)}% vs ontem"
+
+def render_kv_box(
+    label: str,
+    value_text: str,
+    alert: bool = False,
+    big: bool = False,
+    is_datetime: bool = False,
+    sub_text: str | None = None,
+    extra_class: str = "",
+):
+    extra = f"{'datetime' if is_datetime else ''} {extra_class}".strip()
     cls = css_class_alert(alert, extra_class=extra)
     value_cls = "kv-value-big" if big else "kv-value"
+    sub_html = f'<div class="kv-sub">{sub_text}</div>' if sub_text else ""
     st.markdown(
         f"""
         <div class="{cls}">
             <div class="kv-label">{label}</div>
             <div class="{value_cls}">{value_text}</div>
+            {sub_html}
         </div>
         """,
         unsafe_allow_html=True,
     )
 
-# ========== LIMITES (GOOGLE SHEETS) ==========
-def extrair_sheet_id(url: str) -> str | None:
-    try:
-        parts = urlparse(url).path.split("/")
-        if "d" in parts:
-            idx = parts.index("d")
-            return parts[idx + 1]
-        return None
-    except Exception:
-        return None
-
-def build_gsheet_csv_url(sheet_url: str, gid: str = "0", force_ts: bool = True) -> str | None:
-    sheet_id = extrair_sheet_id(sheet_url)
-    if not sheet_id:
-        return None
-    url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
-    if force_ts:
-        url += f"&_ts={int(time.time())}"
-    return url
-
-def carregar_csv_google_sem_cache(csv_url: str) -> pd.DataFrame:
-    headers = {
-        "Cache-Control": "no-cache, no-store, max-age=0",
-        "Pragma": "no-cache",
-        "Expires": "0",
-        "User-Agent": "Mozilla/5.0"
-    }
-    resp = requests.get(csv_url, headers=headers, timeout=15)
-    resp.raise_for_status()
-    text = resp.text
-    if text.startswith("\ufeff"):
-        text = text.lstrip("\ufeff")
-    return pd.read_csv(StringIO(text))
+def fmt_eta(segundos: float) -> str:
+    minutos = int(segundos // 60)
+    if minutos < 60:
+        return f"~{minutos} min"
+    return f"~{minutos // 60}h{minutos % 60:02d}"
 
-def carregar_limites_google(sheet_url: str, gid: str) -> dict:
+def render_ritmo(op_id: str, limite_valor: float | None):
     """
-    SEM CACHE (proposital): sempre busca os limites atuais da planilha.
+    Ritmo de consumo (R$/h) na janela recente e projeção do limite.
+    Alerta preditivo (laranja) quando o limite deve ser cruzado em até BURN_HORIZONTE_S.
     """
-    csv_url = build_gsheet_csv_url(sheet_url, gid=gid, force_ts=True)
-    if not csv_url:
-        return {}
-
-    try:
-        df = carregar_csv_google_sem_cache(csv_url)
-    except Exception:
-        try:
-            df = pd.read_csv(csv_url)
-        except Exception:
-            return {}
-
-    if df.empty:
-        return {}
-
-    # normaliza colunas
-    df.columns = [normalize_text(c) for c in df.columns]
-
-    col_servidor = None
-    col_valor = None
-    col_ticket = None
-
-    for c in df.columns:
-        # aceita variações de nome
-        if col_servidor is None and ("servidor" in c or "operacao" in c or "nome" in c):
-            col_servidor = c
-
-        if col_valor is None and (
-            ("valor" in c and "consum" in c) or
-            c in ["valor consumido", "limite valor", "valor"]
-        ):
-            col_valor = c
-
-        if col_ticket is None and (
-            "ticket" in c or c in ["ticket medio", "limite ticket", "ticket"]
-        ):
-            col_ticket = c
-
-    if not col_servidor:
-        return {}
-
-    limites = {}
-    for _, row in df.iterrows():
-        nome_original = row.get(col_servidor, "")
-        nome = str(nome_original).strip()
-        if not nome or nome.lower() == "nan":
-            continue
-
-        lim_valor = to_float_safe(row.get(col_valor)) if col_valor else None
-        lim_ticket = to_float_safe(row.get(col_ticket)) if col_ticket else None
+    proj = TAXAS.projecao(op_id, limite_valor)
+    if not proj:
+        return
+    partes = [f"Fim do dia ≈ {fmt_moeda_brl(proj['fim_dia'])}"]
+    eta_s = proj["eta_s"]
+    previsto = eta_s is not None and not proj["ultrapassado"] and eta_s <= BURN_HORIZONTE_S
+    if proj["ultrapassado"]:
+        partes.append("limite já ultrapassado")
+    elif eta_s is not None and eta_s < 60:
+        partes.append("limite iminente")  # cruzamento projetado já passou, valor ainda abaixo
+    elif eta_s is not None:
+        partes.append(f"limite em {fmt_eta(eta_s)}")
+    render_kv_box(
+        label="Ritmo de Consumo",
+        value_text=f"{fmt_moeda_brl(proj['taxa_h'])}/h",
+        sub_text=" · ".join(partes),
+        extra_class="prev" if previsto else "",
+    )
 
-        limites[nome] = {
-            "valor_consumido": lim_valor,
-            "ticket": lim_ticket
-        }
+def render_anomalias(op_id: str):
+    ativas = ANOMALIAS.ativas(op_id)
+    if not ativas:
+        return
+    render_kv_box(
+        label="Anomalias",
+        value_text="<br>".join(a["rotulo"] for a in ativas),
+        alert=True,
+        sub_text=" · ".join(f"z = {fmt_float(a['z'], 1)}" for a in ativas),
+        is_datetime=True,  # mesmo tamanho reduzido de texto
+    )
 
-    return limites
+def render_sparklines(op_id: str):
+    """
+    Lê só os ring buffers em memória (nenhuma consulta por card).
+    """
+    desde = time.time() - SPARKLINE_JANELA_S
+    rotulos = {"valor_consumido": "Valor consumido", "qtde_leads": "Leads", "qtde_chamadas": "Chamadas"}
+    cols = st.columns(len(rotulos))
+    for col, (campo, rotulo) in zip(cols, rotulos.items()):
+        svg = svg_sparkline(*SPARKLINES.serie(op_id, campo, desde_ts=desde))
+        if not svg:
+            continue
+        with col:
+            st.markdown(
+                f'<div class="spark-box"><div class="spark-label">{rotulo} ({SPARKLINE_JANELA_S // 3600}h)</div>{svg}</div>',
+                unsafe_allow_html=True,
+            )
 
-def get_limites_operacao(limites_dict: dict, titulo_operacao: str) -> dict:
+# ========== REGISTRO DE OPERAÇÕES ==========
+@st.cache_resource
+def obter_registro() -> dict:
     """
-    Busca limites com:
-    1) match exato
-    2) match normalizado
-    3) aliases por operação (PBX/Vivo)
-    4) contenção flexível
+    Carregado uma única vez por processo (operacoes.json ou PAINEL_OPERACOES).
     """
-    if titulo_operacao in limites_dict:
-        return limites_dict[titulo_operacao]
+    return carregar_registro()
 
-    alvo = normalize_text(titulo_operacao)
+try:
+    REGISTRO = obter_registro()
+except (OSError, ValueError) as e:
+    st.error(f"Registro de operações inválido: {e}")
+    st.stop()
 
-    # 1) match normalizado exato
-    for k, v in limites_dict.items():
-        if normalize_text(k) == alvo:
-            return v
+ALIASES_LIMITES = montar_aliases_limites(REGISTRO)
 
-    # 2) aliases conhecidos
-    aliases = {
-        "operacao pbx total": ["pbx total", "operacao pbx total", "total pbx"],
-        "operacao pbx1": ["pbx1", "operacao pbx1"],
-        "operacao pbx2": ["pbx2", "operacao pbx2"],
-        "operacao pbx3": ["pbx3", "operacao pbx3"],
-        "operacao pbx4": ["pbx4", "operacao pbx4"],
-        "operacao pbx5": ["pbx5", "operacao pbx5"],
+# ========== PAGINAÇÃO / MODO TV ==========
+# ?tv=1 -> carrossel: as páginas giram sozinhas a cada CARROSSEL_MS (sem seletor)
+MODO_TV = st.query_params.get("tv") == "1"
 
-        "operacao vivo total": ["vivo total", "operacao vivo total", "total vivo"],
+def total_paginas(n_itens: int, tamanho: int = PAGINA_TAMANHO) -> int:
+    return max(1, math.ceil(n_itens / max(1, tamanho)))
 
-        "operacao soc (vivo)": ["soc", "soc vivo", "operacao soc", "operacao soc vivo"],
-        "operacao rpo (vivo)": ["rpo", "rpo vivo", "operacao rpo", "operacao rpo vivo"],
-        "operacao fmg (vivo)": ["fmg", "fmg vivo", "operacao fmg", "operacao fmg vivo"],
-        "operacao rpa (vivo)": ["rpa", "rpa vivo", "operacao rpa", "operacao rpa vivo"],
-    }
+def paginar(itens: list, pagina: int, tamanho: int = PAGINA_TAMANHO) -> list:
+    inicio = pagina * tamanho
+    return itens[inicio:inicio + tamanho]
 
-    candidates = aliases.get(alvo, [alvo])
+def pagina_atual(grupo_id: str, n_paginas: int) -> int:
+    """
+    Página visível (base 0) do quadrante. No modo TV é derivada do relógio, então
+    todas as telas ficam sincronizadas e nenhuma precisa guardar estado entre reloads.
+    """
+    if n_paginas <= 1:
+        return 0
+    if MODO_TV:
+        return int(time.time() * 1000 // CARROSSEL_MS) % n_paginas
+    try:
+        pagina = int(st.query_params.get(f"pg_{grupo_id}", "1")) - 1
+    except ValueError:
+        pagina = 0
+    return min(max(pagina, 0), n_paginas - 1)
+
+def render_seletor_pagina(grupo_id: str, pagina: int, n_paginas: int) -> int:
+    if n_paginas <= 1:
+        return pagina
+    if MODO_TV:
+        st.caption(f"Página {pagina + 1} de {n_paginas}")
+        return pagina
+    escolhida = st.selectbox(
+        "Página",
+        options=list(range(n_paginas)),
+        index=pagina,
+        format_func=lambda i: f"Página {i + 1} de {n_paginas}",
+        key=f"seletor_pg_{grupo_id}",
+        label_visibility="collapsed",
+    )
+    # ✅ guarda na URL para sobreviver ao auto-refresh (reload da página)
+    st.query_params[f"pg_{grupo_id}"] = str(escolhida + 1)
+    return escolhida
 
-    # índice normalizado da planilha
-    norm_map = {normalize_text(k): v for k, v in limites_dict.items()}
+PAGINAS_POR_GRUPO = {
+    raiz: total_paginas(len(operacoes_do_grupo(REGISTRO, raiz, incluir_subgrupos=True))) for raiz in REGISTRO["raizes"]
+}
 
-    for cand in candidates:
-        if cand in norm_map:
-            return norm_map[cand]
+# Auto-refresh silencioso (no carrossel, recarrega no ritmo da troca de página)
+refresh_ms = CARROSSEL_MS if MODO_TV and max(PAGINAS_POR_GRUPO.values(), default=1) > 1 else AUTO_REFRESH_MS
+st.components.v1.html(
+    f"""<script>
+        setTimeout(function() {{ window.parent.location.reload(); }}, {refresh_ms});
+    </script>""",
+    height=0,
+)
 
-    # 3) simplificação
-    def simpl(s: str) -> str:
-        return (
-            normalize_text(s)
-            .replace("operacao ", "")
-            .replace("(vivo)", "")
-            .replace(" vivo", "")
-            .strip()
-        )
+# ========== SNAPSHOT COMPARTILHADO (RÉPLICAS NO MESMO HOST) ==========
+@st.cache_resource
+def obter_compartilhado() -> SnapshotCompartilhado:
+    """
+    Uma thread por processo disputa o flock em COMPARTILHADO_DIR; só a eleita
+    consulta Supabase/planilha e as demais leem o arquivo que ela grava.
+    """
+    cliente = create_client(SUPABASE_URL, SUPABASE_KEY)
+    compartilhado = SnapshotCompartilhado(
+        COMPARTILHADO_DIR,
+        lambda tabela: consultar_ultima_linha(cliente, tabela),
+        lambda: carregar_limites_google(GOOGLE_SHEET_URL, GOOGLE_SHEET_GID),
+        sorted({op["tabela"] for op in REGISTRO["operacoes"]}),
+        intervalo_s=COMPARTILHADO_INTERVALO_S,
+        buscar_totais=(lambda: consultar_totais_sql(cliente, operacoes_totais_sql(REGISTRO))) if TOTAIS_VIA_SQL else None,
+    )
+    compartilhado.iniciar()
+    return compartilhado
 
-    alvo_s = simpl(alvo)
+COMPARTILHADO = obter_compartilhado() if COMPARTILHADO_ATIVO else None
 
-    for k, v in limites_dict.items():
-        nk_s = simpl(k)
-        if nk_s == alvo_s:
-            return v
+# ========== HISTÓRICO (COLETOR EM SEGUNDO PLANO) ==========
+@st.cache_resource
+def obter_coletor() -> Coletor:
+    """
+    Um coletor por processo (não por sessão): puxa só as linhas novas de cada
+    tabela para o histórico local em DADOS_DIR. Só começa a rodar em
+    COLETOR.iniciar(), depois que os ouvintes abaixo foram registrados.
 
-    # 4) contenção flexível
-    for k, v in limites_dict.items():
-        nk = normalize_text(k)
-        if any(c and (c in nk or nk in c) for c in candidates):
-            return v
+    Com o snapshot compartilhado, o histórico fica em COMPARTILHADO_DIR e só a
+    réplica eleita consulta o Supabase; as outras leem o que ela gravou.
+    """
+    store = HistoricoStore(caminho_historico(DADOS_DIR))
+    lider = (lambda: COMPARTILHADO.lider) if COMPARTILHADO else None
+    cliente = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return Coletor(cliente, obter_registro(), store, intervalo_s=COLETA_INTERVALO_S, lider=lider)
+
+@st.cache_resource
+def obter_sparklines(_coletor: Coletor) -> BuffersOperacoes:
+    buffers = BuffersOperacoes(SPARKLINE_PONTOS)
+    buffers.preencher(_coletor.store, _coletor.registro, desde_ts=time.time() - SPARKLINE_JANELA_S)
+    _coletor.adicionar_ouvinte(buffers.ouvinte)
+    return buffers
+
+@st.cache_resource
+def obter_comparativo(_coletor: Coletor) -> ComparativoDiario:
+    comparativo = ComparativoDiario()
+    comparativo.preencher(_coletor.store)
+    _coletor.adicionar_ouvinte(comparativo.ouvinte)
+    return comparativo
+
+@st.cache_resource
+def obter_taxas(_coletor: Coletor) -> TaxasOperacoes:
+    taxas = TaxasOperacoes(BURN_JANELA_S)
+    taxas.preencher(_coletor.store, _coletor.registro)
+    _coletor.adicionar_ouvinte(taxas.ouvinte)
+    return taxas
+
+@st.cache_resource
+def obter_anomalias(_coletor: Coletor) -> DetectorAnomalias:
+    regras = _coletor.registro["anomalias"] or REGRAS_PADRAO
+    detector = DetectorAnomalias(regras, limiar_z=ANOMALIA_LIMIAR_Z)
+    detector.preencher(_coletor.store, _coletor.registro, janela_s=SPARKLINE_JANELA_S)
+    _coletor.adicionar_ouvinte(detector.ouvinte)
+    return detector
+
+@st.cache_resource
+def registrar_telemetria_coletor(_coletor: Coletor) -> bool:
+    _coletor.adicionar_ouvinte(telemetria.ouvinte_coletor)
+    return True
+
+@st.cache_resource
+def obter_motor_alertas(_coletor: Coletor) -> MotorAlertas:
+    """
+    Alertas avaliados no coletor, uma vez por ciclo para todas as operações e
+    grupos (com a própria cópia dos limites); as sessões só leem o estado.
+    """
+    carregar = None
+    if COMPARTILHADO:
+        # ✅ limites que o poller eleito já baixou; planilha só se o arquivo estiver velho
+        carregar = lambda: COMPARTILHADO.limites() or carregar_limites_google(GOOGLE_SHEET_URL, GOOGLE_SHEET_GID)
+    fonte = FonteLimites(
+        GOOGLE_SHEET_URL, GOOGLE_SHEET_GID, montar_aliases_limites(_coletor.registro),
+        intervalo_s=COLETA_INTERVALO_S, carregar=carregar,
+    )
+    motor = MotorAlertas(_coletor.registro, fonte, histerese=ALERTA_HISTERESE)
+    _coletor.adicionar_pos_ciclo(motor.avaliar)
+
+    # ✅ avisos saem por filas próprias: um webhook lento não atrasa o ciclo
+    destinos = [DestinoLog()]
+    if ALERTA_ARQUIVO:
+        destinos.append(DestinoArquivo(ALERTA_ARQUIVO))
+    if ALERTA_WEBHOOK:
+        destinos.append(DestinoWebhook(ALERTA_WEBHOOK))
+    notificador = Notificador(destinos, intervalo_min_s=ALERTA_INTERVALO_S, max_por_minuto=ALERTA_MAX_POR_MINUTO)
+    if COMPARTILHADO:
+        # todas as réplicas avaliam (estado dos cards), mas só a eleita avisa
+        motor.adicionar_ouvinte(lambda t: notificador.ouvinte(t) if COMPARTILHADO.lider else None)
+        _coletor.adicionar_pos_ciclo(lambda ultimas: notificador.pos_ciclo(ultimas) if COMPARTILHADO.lider else None)
+    else:
+        motor.adicionar_ouvinte(notificador.ouvinte)
+        _coletor.adicionar_pos_ciclo(notificador.pos_ciclo)  # reenvia o que a frequência segurou
+    return motor
+
+COLETOR = obter_coletor() if HISTORICO_ATIVO else None
+SPARKLINES = obter_sparklines(COLETOR) if COLETOR else None
+COMPARATIVO = obter_comparativo(COLETOR) if COLETOR else None
+TAXAS = obter_taxas(COLETOR) if COLETOR else None
+ANOMALIAS = obter_anomalias(COLETOR) if COLETOR else None
+MOTOR = obter_motor_alertas(COLETOR) if COLETOR else None
+if COLETOR:
+    registrar_telemetria_coletor(COLETOR)
+
+if COLETOR:
+    COLETOR.iniciar()  # idempotente: a thread sobe uma vez por processo
+
+# ========== CÓPIA SALVA (LAST-KNOWN-GOOD) ==========
+@st.cache_resource
+def obter_snapshot() -> SnapshotDisco:
+    """Lida do disco uma vez por processo; depois só é regravada quando chega dado novo."""
+    return SnapshotDisco(SNAPSHOT_ARQUIVO)
+
+SNAPSHOT = obter_snapshot() if SNAPSHOT_ARQUIVO else None
 
-    return {}
+# ========== DADOS SUPABASE ==========
+_execucao = threading.local()  # marca, na thread do rerun, que o corpo em cache rodou (miss)
 
-# ✅ sem cache: sempre lê na execução atual
-LIMITES = carregar_limites_google(GOOGLE_SHEET_URL, GOOGLE_SHEET_GID)
+@contextlib.contextmanager
+def medir_supabase(tabela: str):
+    _execucao.miss = True
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        telemetria.SUPABASE_SEGUNDOS.observar(time.perf_counter() - t0, tabela, "tela")
 
-# ========== DADOS SUPABASE ==========
 @st.cache_data(ttl=30)
 def carregar_ultima_linha(tabela: str):
-    try:
-        resp = (
-            supabase
-            .table(tabela)
-            .select("*")
-            .order("created_at", desc=True)
-            .limit(1)
-            .execute()
-        )
-        dados = resp.data or []
-        return dados[0] if len(dados) else None
-    except Exception:
+    # ✅ logo depois do start, usa a linha que o aquecimento já trouxe
+    linha = AQUECIMENTO.linha(tabela)
+    if linha is None and COMPARTILHADO:
+        linha = COMPARTILHADO.linha(tabela)  # ✅ o que o poller eleito do host já trouxe
+    if linha is None:
+        linha = consultar_ultima_linha(supabase, tabela, medir_supabase)
+    if SNAPSHOT:
+        if linha is not None:
+            SNAPSHOT.atualizar_linha(tabela, linha)
+        else:
+            # ✅ Supabase fora (ou tabela vazia): última cópia boa, marcada como desatualizada
+            linha = SNAPSHOT.linha(tabela)
+    return linha
+
+@st.cache_data(ttl=30)
+def carregar_totais_sql(operacoes: tuple) -> tuple | None:
+    """
+    (linhas, salvo_em) do painel_totais, pelas mesmas camadas da última linha:
+    aquecimento, poller compartilhado, Supabase e, com o Supabase fora, a cópia
+    salva (salvo_em preenchido). None se a função não estiver instalada (ou fora
+    sem cópia): aí os totais saem das linhas de cada tabela.
+    """
+    item = AQUECIMENTO.totais()
+    if item is None and COMPARTILHADO:
+        item = COMPARTILHADO.totais()
+    if item is None:
         try:
-            resp = (
-                supabase
-                .table(tabela)
-                .select("*")
-                .order("creta_at", desc=True)
-                .limit(1)
-                .execute()
-            )
-            dados = resp.data or []
-            return dados[0] if len(dados) else None
+            item = {"linhas": consultar_totais_sql(supabase, operacoes, medir_supabase)}
         except Exception:
-            return None
+            item = None
+    if item is not None and item["linhas"] is not None:
+        if SNAPSHOT:
+            SNAPSHOT.atualizar_totais(item["linhas"])
+        return item["linhas"], None
+    if item is None and SNAPSHOT and SNAPSHOT.totais is not None:
+        return SNAPSHOT.totais, SNAPSHOT.totais_em
+    return None
+
+def totais_sql_disponivel() -> bool:
+    """
+    False quando já se sabe que painel_totais não está instalada (neste processo ou
+    pelo poller compartilhado): as linhas dos totais entram no carregamento concorrente.
+    """
+    if not TOTAIS_VIA_SQL or totais_sql_ausente():
+        return False
+    item = AQUECIMENTO.totais() or (COMPARTILHADO.totais() if COMPARTILHADO else None)
+    return not (item and item["linhas"] is None)
+
+def buscar_linha(tabela: str):
+    # "linha" inclui acertos de cache; só as fases "supabase" são idas ao banco
+    _execucao.miss = False
+    with fase("linha", tabela):
+        row = carregar_ultima_linha(tabela)
+    telemetria.CACHE_TOTAL.inc("linha", "miss" if _execucao.miss else "hit")
+    return row
+
+# linhas já trazidas pelo carregamento concorrente deste rerun (tabela -> linha)
+LINHAS = {}
 
 def get_metrics_pbx(tabela: str, sufixo: str):
-    row = carregar_ultima_linha(tabela)
+    row = LINHAS[tabela] if tabela in LINHAS else buscar_linha(tabela)
     if not row:
         return None
 
-    def _to_float(v):
-        try:
-            return float(v) if v is not None else 0.0
-        except Exception:
-            return 0.0
-
-    def _to_int(v):
-        try:
-            return int(v) if v is not None else 0
-        except Exception:
-            return 0
-
-    status_campanhas = row.get(f"st_campanhas_{sufixo}")
-    qtde_mailing = _to_int(row.get(f"qtde_mailing_{sufixo}"))
-    ticket_medio = row.get(f"ticket_medio_{sufixo}")
-    ticket_medio_f = _to_float(ticket_medio) if ticket_medio is not None else None
-
-    qtde_leads_raw = row.get(f"qtde_lead_{sufixo}")
-    if qtde_leads_raw is None:
-        qtde_leads_raw = row.get(f"qtde_leads_{sufixo}")
-    qtde_leads = _to_int(qtde_leads_raw)
+    with fase("métricas", tabela):
+        m = extrair_metricas(row, sufixo)
+    m["salvo_em"] = row.get(CHAVE_SALVO_EM)
+    telemetria.registrar_created_at(tabela, para_epoch(m["created_at"]))
+    return m
 
-    qtde_chamadas = _to_int(row.get(f"qtde_chamadas_{sufixo}"))
-    ultimo_lead = row.get(f"ultimo_lead_{sufixo}")
-    valor_consumido = _to_float(row.get(f"valor_consumido_{sufixo}"))
-    created_at = row.get("created_at") or row.get("creta_at")
+# ========== RENDER ==========
+def limites_da_operacao(limites_dict: dict, titulo: str) -> dict:
+    # ✅ com os limites do aquecimento, o índice do resolvedor já está montado
+    resolvedor = AQUECIMENTO.resolvedor_de(limites_dict)
+    if resolvedor is not None:
+        return resolvedor.resolver(titulo)
+    return get_limites_operacao(limites_dict, titulo, ALIASES_LIMITES)
+
+def aviso_copia_salva(salvo_em: float | None) -> str:
+    if not salvo_em:
+        return ""
+    return f'<br><span class="op-stale">⚠️ cópia salva de {fmt_datetime_br(datetime.fromtimestamp(salvo_em, TZ_SP))}</span>'
 
-    return {
-        "status": status_campanhas,
-        "qtde_mailing": qtde_mailing,
-        "ticket_medio": ticket_medio_f,
-        "qtde_leads": qtde_leads,
-        "qtde_chamadas": qtde_chamadas,
-        "ultimo_lead": ultimo_lead,
-        "valor_consumido": valor_consumido,
-        "created_at": created_at,
-    }
+def alerta_do_card(tipo: str, alvo_id: str | None, regra: str, valor: float | None, limite: float | None) -> bool:
+    if alvo_id and MOTOR:
+        return MOTOR.destaque(tipo, alvo_id, regra, valor, limite)
+    return acima_do_limite(valor, limite)
 
-# ========== RENDER ==========
 def render_secao(
     titulo: str,
     subtitulo: str,
@@ -485,21 +674,23 @@ def render_secao(
     sufixo: str,
     bg_color: str,
     limites_dict: dict,
+    op_id: str | None = None,
 ):
     m = get_metrics_pbx(tabela, sufixo)
     if not m:
         st.info(f"Nenhum dado encontrado na tabela **{tabela}**.")
         return
 
-    limites = get_limites_operacao(limites_dict, titulo)
+    limites = limites_da_operacao(limites_dict, titulo)
     limite_valor = to_float_safe(limites.get("valor_consumido"))
     limite_ticket = to_float_safe(limites.get("ticket"))
 
     valor_atual_num = to_float_safe(m["valor_consumido"])
     ticket_atual_num = to_float_safe(m["ticket_medio"])
 
-    alerta_valor = (limite_valor is not None and valor_atual_num is not None and valor_atual_num > limite_valor)
-    alerta_ticket = (limite_ticket is not None and ticket_atual_num is not None and ticket_atual_num > limite_ticket)
+    # ✅ cor calculada com o número e o limite exibidos; o motor só entra com a histerese
+    alerta_valor = alerta_do_card("operacao", op_id, "valor", valor_atual_num, limite_valor)
+    alerta_ticket = alerta_do_card("operacao", op_id, "ticket", ticket_atual_num, limite_ticket)
 
     m_status  = m["status"] if m["status"] else "-"
     m_mailing = fmt_int(m["qtde_mailing"])
@@ -510,6 +701,13 @@ def render_secao(
     m_ult     = fmt_datetime_br(m["ultimo_lead"])
     updated   = fmt_datetime_br(m["created_at"])
 
+    # ✅ comparação com o mesmo horário de ontem: um lookup em memória, sem consulta
+    ontem = COMPARATIVO.ontem(op_id) if op_id and COMPARATIVO else None
+    ontem = ontem or {}
+    delta_leads = fmt_delta_ontem(m["qtde_leads"], ontem.get("qtde_leads"))
+    delta_calls = fmt_delta_ontem(m["qtde_chamadas"], ontem.get("qtde_chamadas"))
+    delta_valor = fmt_delta_ontem(m["valor_consumido"], ontem.get("valor_consumido"))
+
     st.markdown(f'<div class="op-card" style="background-color:{bg_color};">', unsafe_allow_html=True)
 
     col_top1, col_top2 = st.columns([2, 1])
@@ -517,7 +715,7 @@ def render_secao(
         st.markdown(f'<div class="op-title">{titulo}</div>', unsafe_allow_html=True)
         st.markdown(f'<div class="op-subtitle">{subtitulo}</div>', unsafe_allow_html=True)
     with col_top2:
-        st.markdown(f'<div class="op-updated">Atualizado em<br><span>{updated}</span></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="op-updated">Atualizado em<br><span>{updated}</span>{aviso_copia_salva(m["salvo_em"])}</div>', unsafe_allow_html=True)
 
     st.markdown("")
 
@@ -531,60 +729,59 @@ def render_secao(
 
     linha2 = st.columns(3)
     with linha2[0]:
-        st.metric("Leads (Qtde)", m_leads)
+        st.metric("Leads (Qtde)", m_leads, delta=delta_leads)
     with linha2[1]:
-        st.metric("Chamadas (Qtde)", m_calls)
+        st.metric("Chamadas (Qtde)", m_calls, delta=delta_calls)
     with linha2[2]:
-        render_kv_box(label="Valor Consumido", value_text=m_valor, alert=alerta_valor)
+        render_kv_box(label="Valor Consumido", value_text=m_valor, alert=alerta_valor, sub_text=delta_valor)
 
     linha3 = st.columns(3)
     with linha3[0]:
         render_kv_box(label="Último Lead (hora)", value_text=m_ult, alert=False, is_datetime=True)
+    if op_id and TAXAS:
+        with linha3[1]:
+            render_ritmo(op_id, limite_valor)
+    if op_id and ANOMALIAS:
+        with linha3[2]:
+            render_anomalias(op_id)
+
+    if op_id and SPARKLINES:
+        render_sparklines(op_id)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
 def render_secao_total(
     titulo: str,
     subtitulo: str,
-    metrics_list: list,
+    total: dict | None,
     bg_color: str,
     limites_dict: dict,
     title_class: str = "op-title",
     metric_wrapper_class: str | None = None,
+    grupo_id: str | None = None,
 ):
-    valid = [m for m in metrics_list if m is not None]
-    if not valid:
+    """
+    total: saída de painel.rollup (calcular_rollup / totalizar).
+    """
+    if not total or not total["n_operacoes"]:
         st.info(f"Nenhum dado encontrado para compor **{titulo}**.")
         return
 
-    total_mailing   = sum(m["qtde_mailing"] for m in valid)
-    total_leads     = sum(m["qtde_leads"] for m in valid)
-    total_chamadas  = sum(m["qtde_chamadas"] for m in valid)
-    total_valor     = sum(m["valor_consumido"] for m in valid)
+    total_mailing   = total["qtde_mailing"]
+    total_leads     = total["qtde_leads"]
+    total_chamadas  = total["qtde_chamadas"]
+    total_valor     = total["valor_consumido"]
+    ticket_medio_med = total["ticket_medio"]
 
-    tickets = [m["ticket_medio"] for m in valid if m["ticket_medio"] is not None and m["ticket_medio"] != 0]
-    ticket_medio_med = sum(tickets) / len(tickets) if tickets else None
+    ultimo_global_str = fmt_datetime_br(total["ultimo_lead"]) if total["ultimo_lead"] is not None else "-"
+    updated_str = fmt_datetime_br(total["created_at"]) if total["created_at"] is not None else "-"
 
-    ultimos_validos = [m["ultimo_lead"] for m in valid if m["ultimo_lead"]]
-    if ultimos_validos:
-        ult_series = pd.to_datetime(ultimos_validos, errors="coerce").dropna()
-        ultimo_global_str = fmt_datetime_br(ult_series.max()) if len(ult_series) > 0 else "-"
-    else:
-        ultimo_global_str = "-"
-
-    created_validos = [m["created_at"] for m in valid if m["created_at"]]
-    if created_validos:
-        created_series = pd.to_datetime(created_validos, errors="coerce").dropna()
-        updated_str = fmt_datetime_br(created_series.max()) if len(created_series) > 0 else "-"
-    else:
-        updated_str = "-"
-
-    limites = get_limites_operacao(limites_dict, titulo)
+    limites = limites_da_operacao(limites_dict, titulo)
     limite_valor = to_float_safe(limites.get("valor_consumido"))
     limite_ticket = to_float_safe(limites.get("ticket"))
 
-    alerta_valor = (limite_valor is not None and total_valor is not None and total_valor > limite_valor)
-    alerta_ticket = (limite_ticket is not None and ticket_medio_med is not None and ticket_medio_med > limite_ticket)
+    alerta_valor = alerta_do_card("grupo", grupo_id, "valor", to_float_safe(total_valor), limite_valor)
+    alerta_ticket = alerta_do_card("grupo", grupo_id, "ticket", to_float_safe(ticket_medio_med), limite_ticket)
 
     m_mailing = fmt_int(total_mailing)
     m_ticket  = fmt_moeda_brl(ticket_medio_med)
@@ -602,7 +799,10 @@ def render_secao_total(
         st.markdown(f'<div class="{title_class}">{titulo}</div>', unsafe_allow_html=True)
         st.markdown(f'<div class="op-subtitle">{subtitulo}</div>', unsafe_allow_html=True)
     with col_top2:
-        st.markdown(f'<div class="op-updated">Atualizado em<br><span>{updated_str}</span></div>', unsafe_allow_html=True)
+        st.markdown(
+            f'<div class="op-updated">Atualizado em<br><span>{updated_str}</span>{aviso_copia_salva(total.get("salvo_em"))}</div>',
+            unsafe_allow_html=True,
+        )
 
     st.markdown("")
 
@@ -610,7 +810,7 @@ def render_secao_total(
     with linha1[0]:
         st.metric("Mailing Total", m_mailing)
     with linha1[1]:
-        render_kv_box(label="Ticket Médio (média)", value_text=m_ticket, alert=alerta_ticket, big=True)
+        render_kv_box(label=f"Ticket Médio ({MODOS_TICKET[total['ticket_modo']]})", value_text=m_ticket, alert=alerta_ticket, big=True)
     with linha1[2]:
         st.metric("Leads Totais", m_leads)
 
@@ -627,77 +827,253 @@ def render_secao_total(
     if metric_wrapper_class:
         st.markdown("</div>", unsafe_allow_html=True)
 
-# ==========================
-# COLETA DAS MÉTRICAS PBX (PBX1..PBX5)
-# ==========================
-metrics_pbx1 = get_metrics_pbx("operacao_pbx1", "pbx1")
-metrics_pbx2 = get_metrics_pbx("operacao_pbx2", "pbx2")
-metrics_pbx3 = get_metrics_pbx("operacao_pbx3", "pbx3")
-metrics_pbx4 = get_metrics_pbx("operacao_pbx4", "pbx4")
-metrics_pbx5 = get_metrics_pbx("operacao_pbx5", "pbx5")  # ✅ fora do total
+def metricas_total(registro: dict) -> dict:
+    """
+    Métricas de todas as operações que compõem algum total (independe da página visível).
+    As linhas vêm do cache de carregar_ultima_linha, então no máximo uma consulta
+    por tabela a cada ttl, qualquer que seja o número de páginas ou de reruns.
+    """
+    return {
+        op["id"]: get_metrics_pbx(op["tabela"], op["sufixo"])
+        for op in registro["operacoes"] if op["entra_no_total"]
+    }
 
-# ==========================
-# COLETA DAS MÉTRICAS VIVO
-# ==========================
-metrics_soc = get_metrics_pbx("operacao_soc", "soc")
-metrics_rpo = get_metrics_pbx("operacao_rpo", "rpo")
-metrics_fmg = get_metrics_pbx("operacao_fmg", "fmg")
-metrics_rpa = get_metrics_pbx("operacao_rpa", "rpa")
+@st.cache_resource
+def obter_rollup_incremental() -> RollupIncremental:
+    """
+    Compartilhado entre sessões: cada rerun só aplica as operações cuja linha mudou.
+    """
+    return RollupIncremental(obter_registro())
 
-# ==========================
-# LAYOUT EM 2 QUADRANTES
-# ==========================
-quad_esq, quad_dir = st.columns(2)
-
-# ===== QUADRANTE ESQUERDO (PBX) =====
-with quad_esq:
-    st.markdown('<div class="quad">', unsafe_allow_html=True)
-    st.markdown('<div class="quad-title">QUADRANTE PBX</div>', unsafe_allow_html=True)
-
-    # ✅ PBX Total SOMENTE PBX1..PBX4
-    render_secao_total(
-        titulo="Operação PBX Total",
-        subtitulo="Resumo consolidado das operações PBX1 a PBX4.",
-        metrics_list=[metrics_pbx1, metrics_pbx2, metrics_pbx3, metrics_pbx4],
-        bg_color="#fed7aa",
-        limites_dict=LIMITES,
-        title_class="op-title-total",
-        metric_wrapper_class="pbx-total-metric",
-    )
+def calcular_totais(registro: dict) -> dict:
+    """
+    As somas por grupo vêm prontas do Postgres (payload e trabalho em Python
+    constantes, qualquer que seja o tamanho dos grupos); sem a função instalada
+    (ou com PAINEL_TOTAIS_SQL=0), cai para o rollup incremental a partir das linhas.
+    """
+    if TOTAIS_VIA_SQL:
+        sql = carregar_totais_sql(operacoes_totais_sql(registro))
+        if sql is not None:
+            linhas, salvo_em = sql
+            return {gid: {**total, "salvo_em": salvo_em} for gid, total in calcular_rollup_sql(registro, linhas).items()}
+    metricas = metricas_total(registro)
+    rollup = obter_rollup_incremental()
+    rollup.atualizar_varios(metricas)
+    # ✅ total feito com alguma linha da cópia salva leva a hora da mais antiga
+    salvos = salvo_em_por_grupo(registro, metricas)
+    return {gid: {**total, "salvo_em": salvos[gid]} for gid, total in rollup.totais().items()}
+
+# ========== CARREGAMENTO CONCORRENTE ==========
+@st.cache_resource
+def obter_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=FETCH_PARALELO, thread_name_prefix="painel-fetch")
+
+def em_paralelo(fn, *args) -> Future:
+    """
+    Roda fn no pool levando o contexto do rerun (st.cache_data e o rastreio de fases
+    continuam valendo na outra thread). Só busca dados: desenhar fica na thread do script.
+    """
+    ctx = get_script_run_ctx()
+    contexto = contextvars.copy_context()
 
-    render_secao("Operação PBX1", "Monitoramento em tempo quase real — PBX1.", "operacao_pbx1", "pbx1", "#ffe0b8", LIMITES)
-    render_secao("Operação PBX2", "Indicadores dedicados à operação PBX2.", "operacao_pbx2", "pbx2", "#ffe9c7", LIMITES)
-    render_secao("Operação PBX3", "Visão consolidada da operação PBX3.", "operacao_pbx3", "pbx3", "#fff1d7", LIMITES)
-    render_secao("Operação PBX4", "Indicadores dedicados à operação PBX4.", "operacao_pbx4", "pbx4", "#fff7e6", LIMITES)
-    render_secao("Operação PBX5", "Indicadores dedicados à operação PBX5.", "operacao_pbx5", "pbx5", "#fffaf0", LIMITES)
+    def tarefa():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return contexto.run(fn, *args)
 
-    st.markdown("</div>", unsafe_allow_html=True)
+    return obter_pool().submit(tarefa)
 
-# ===== QUADRANTE DIREITO (VIVO) =====
-with quad_dir:
-    st.markdown('<div class="quad">', unsafe_allow_html=True)
-    st.markdown('<div class="quad-title">QUADRANTE VIVO</div>', unsafe_allow_html=True)
-
-    render_secao_total(
-        titulo="Operação Vivo Total",
-        subtitulo="Resumo consolidado das operações SOC, RPO e FMG.",
-        metrics_list=[metrics_soc, metrics_rpo, metrics_fmg],
-        bg_color="#ddd6fe",
-        limites_dict=LIMITES,
-        title_class="op-title-total",
-        metric_wrapper_class=None,
+def carregar_limites() -> tuple:
+    """
+    (limites, salvo_em). Sem cache: sempre lê na execução atual (ou usa a leitura
+    do aquecimento, se ainda válida); com a planilha fora, a cópia salva e a hora dela.
+    """
+    with fase("limites"):
+        limites = AQUECIMENTO.limites()
+        if limites is None and COMPARTILHADO:
+            limites = COMPARTILHADO.limites()
+        if limites is None:
+            limites = carregar_limites_google(GOOGLE_SHEET_URL, GOOGLE_SHEET_GID)
+    if SNAPSHOT:
+        if limites:
+            SNAPSHOT.atualizar_limites(limites)
+        elif SNAPSHOT.limites:
+            return SNAPSHOT.limites, SNAPSHOT.limites_em
+    return limites, None
+
+def carregar_totais() -> dict:
+    with fase("totais"):
+        return calcular_totais(REGISTRO)
+
+def resultado(futuro: Future, padrao=None):
+    try:
+        return futuro.result()
+    except Exception:
+        return padrao
+
+def render_esqueleto(slot, titulo: str, bg_color: str, title_class: str = "op-title"):
+    slot.markdown(
+        f'<div class="op-card skeleton" style="background-color:{bg_color};">'
+        f'<div class="{title_class}">{titulo}</div>'
+        '<div class="sk-line"></div><div class="sk-line"></div><div class="sk-line short"></div>'
+        "</div>",
+        unsafe_allow_html=True,
     )
 
-    render_secao("Operação SOC (Vivo)", "Indicadores da operação Vivo — SOC.", "operacao_soc", "soc", "#e0d4ff", LIMITES)
-    render_secao("Operação RPO (Vivo)", "Indicadores da operação Vivo — RPO.", "operacao_rpo", "rpo", "#e9ddff", LIMITES)
-    render_secao("Operação FMG (Vivo)", "Indicadores da operação Vivo — FMG.", "operacao_fmg", "fmg", "#f3eaff", LIMITES)
-    render_secao("Operação RPA (Vivo)", "Indicadores da operação Vivo — RPA.", "operacao_rpa", "rpa", "#f3eaff", LIMITES)
+# ==========================
+# LAYOUT EM QUADRANTES (UM POR GRUPO RAIZ)
+# ==========================
+def desenhar_total(gid: str):
+    grupo = REGISTRO["grupos_por_id"][gid]
+    with fase("render", grupo["titulo"]), SLOTS_TOTAL[gid].container():
+        render_secao_total(
+            titulo=grupo["titulo"],
+            subtitulo=grupo["subtitulo"],
+            total=TOTAIS[gid],
+            bg_color=grupo["bg_color"],
+            limites_dict=LIMITES,
+            title_class=grupo["title_class"],
+            metric_wrapper_class=grupo["metric_wrapper_class"],
+            grupo_id=gid,
+        )
 
-    st.markdown("</div>", unsafe_allow_html=True)
+def desenhar_op(op_id: str, linha: dict | None = None):
+    """linha: desenha com esta linha (ex.: a cópia salva) em vez da que está em LINHAS."""
+    op, slot = SLOTS_OP[op_id]
+    if linha is not None:
+        LINHAS[op["tabela"]] = linha  # só antes das buscas começarem; sai logo abaixo
+    with fase("render", op["titulo"]), slot.container():
+        render_secao(op["titulo"], op["subtitulo"], op["tabela"], op["sufixo"], op["bg_color"], LIMITES, op_id=op["id"])
+    if linha is not None:
+        del LINHAS[op["tabela"]]
+
+# ✅ primeiro o esqueleto (só depende do registro), depois cada card preenche quando os dados chegam
+LIMITES = {}
+quadrantes = st.columns(len(REGISTRO["raizes"]))
+SLOTS_TOTAL = {}  # gid -> st.empty()
+SLOTS_OP = {}     # op_id -> (op, st.empty())
+
+for quad, raiz in zip(quadrantes, REGISTRO["raizes"]):
+    grupo_raiz = REGISTRO["grupos_por_id"][raiz]
+    with quad:
+        st.markdown('<div class="quad">', unsafe_allow_html=True)
+        st.markdown(f'<div class="quad-title">{grupo_raiz["quadrante"]}</div>', unsafe_allow_html=True)
+
+        # ✅ total do grupo e dos subgrupos (PBX5/RPA ficam fora via entra_no_total)
+        for gid in subgrupos(REGISTRO, raiz):
+            grupo = REGISTRO["grupos_por_id"][gid]
+            SLOTS_TOTAL[gid] = st.empty()
+            render_esqueleto(SLOTS_TOTAL[gid], grupo["titulo"], grupo["bg_color"], grupo["title_class"])
+
+        # ✅ só a página visível é buscada e renderizada
+        n_paginas = PAGINAS_POR_GRUPO[raiz]
+        pagina = render_seletor_pagina(raiz, pagina_atual(raiz, n_paginas), n_paginas)
+
+        for op in paginar(operacoes_do_grupo(REGISTRO, raiz, incluir_subgrupos=True), pagina):
+            SLOTS_OP[op["id"]] = (op, st.empty())
+            # ✅ logo depois de um restart: números da cópia salva (marcados) no lugar do esqueleto
+            salva = SNAPSHOT.linha(op["tabela"]) if SNAPSHOT and not SNAPSHOT.fresca(op["tabela"]) else None
+            if salva:
+                desenhar_op(op["id"], salva)
+            else:
+                render_esqueleto(SLOTS_OP[op["id"]][1], op["titulo"], op["bg_color"])
+
+        st.markdown("</div>", unsafe_allow_html=True)
+
+# ✅ limites e linhas buscados ao mesmo tempo; a planilha não segura mais a página
+LIMITES_SALVOS_EM = None
+OPS_TOTAL = [op for op in REGISTRO["operacoes"] if op["entra_no_total"]]
+futuros = {em_paralelo(carregar_limites): ("limites", None)}
+TOTAIS_SQL = totais_sql_disponivel()
+if TOTAIS_SQL:
+    futuros[em_paralelo(carregar_totais)] = ("totais", None)
+    tabelas = {op["tabela"] for op, _ in SLOTS_OP.values()}
+else:
+    tabelas = {op["tabela"] for op, _ in SLOTS_OP.values()} | {op["tabela"] for op in OPS_TOTAL}
+for tabela in sorted(tabelas):
+    futuros[em_paralelo(buscar_linha, tabela)] = ("linha", tabela)
+
+TOTAIS = None
+faltam_total = {op["tabela"] for op in OPS_TOTAL} if not TOTAIS_SQL else set()
+desenhados_sem_limites = []
+
+for futuro in as_completed(futuros):
+    tipo, tabela = futuros[futuro]
+    if tipo == "limites":
+        LIMITES, LIMITES_SALVOS_EM = resultado(futuro, ({}, None))
+        # cards que já apareceram sem limites são redesenhados (cor de alerta / ritmo)
+        for op_id in desenhados_sem_limites:
+            desenhar_op(op_id)
+        if TOTAIS is not None:
+            for gid in SLOTS_TOTAL:
+                desenhar_total(gid)
+        continue
+    if tipo == "totais":
+        TOTAIS = resultado(futuro)
+    else:
+        LINHAS[tabela] = resultado(futuro)
+        for op_id, (op, _) in SLOTS_OP.items():
+            if op["tabela"] == tabela:
+                desenhar_op(op_id)
+                if not LIMITES:
+                    desenhados_sem_limites.append(op_id)
+        faltam_total.discard(tabela)
+        if TOTAIS is not None or faltam_total:
+            continue
+        # ✅ todos os totais (grupos e subgrupos) numa única passada, com as linhas já em LINHAS
+        TOTAIS = carregar_totais()
+    if TOTAIS is None:
+        TOTAIS = {gid: None for gid in REGISTRO["grupos_por_id"]}
+    for gid in SLOTS_TOTAL:
+        desenhar_total(gid)
+
+if LIMITES_SALVOS_EM:
+    st.caption(
+        f"⚠️ Planilha de limites indisponível: usando a cópia salva de "
+        f"{fmt_datetime_br(datetime.fromtimestamp(LIMITES_SALVOS_EM, TZ_SP))}."
+    )
 
 # ✅ Debug temporário (deixe ligado até validar tudo)
 with st.expander("Debug limites (Google Sheets)"):
     st.write("GID usado:", GOOGLE_SHEET_GID)
-    st.write("Limites carregados agora:", LIMITES)
+    # st.json em vez de st.write(dict): o st.write importa pandas para testar se é um dataframe
+    st.write("Limites carregados agora:")
+    st.json(LIMITES)
+    if MOTOR:
+        st.write("Últimas transições de alerta:")
+        st.json(MOTOR.transicoes(20), expanded=False)
+
+def tabela_markdown(linhas: list) -> str:
+    """Tabela em markdown (st.dataframe carregaria pandas/pyarrow em todo rerun)."""
+    if not linhas:
+        return ""
+    colunas = list(linhas[0])
+    cel = lambda v: "" if v is None else str(v).replace("|", "\\|")
+    return "\n".join(
+        ["| " + " | ".join(colunas) + " |", "|" + "---|" * len(colunas)]
+        + ["| " + " | ".join(cel(l[c]) for c in colunas) + " |" for l in linhas]
+    )
+
+with st.expander("Diagnóstico (tempos deste rerun)"):
+    st.write(f"Total até aqui: {RASTREIO.total_ms():.0f} ms")
+    st.markdown(tabela_markdown(
+        [{"fase": r["fase"], "chamadas": r["chamadas"], "ms": f"{r['ms']:.1f}"} for r in RASTREIO.resumo()]
+    ))
+    st.markdown(tabela_markdown([
+        {
+            "fase": "· " * f["nivel"] + f["fase"],
+            "detalhe": f["detalhe"],
+            "início (ms)": f"{f['inicio_ms']:.1f}",
+            "ms": f"{f['ms']:.1f}" if f["ms"] is not None else None,
+        }
+        for f in RASTREIO.fases
+    ]))
+    st.write("Aquecimento do processo:")
+    st.json(AQUECIMENTO.estado(), expanded=False)
+    if COMPARTILHADO:
+        st.write("Snapshot compartilhado:")
+        st.json(COMPARTILHADO.estado(), expanded=False)
+
+st.caption("Atualização automática a cada 120 segundos (2 minutos).")
 
-st.caption("Atualização automática a cada 120 segundos (2 minutos).")
\ No newline at end of file
+telemetria.RERUN_SEGUNDOS.observar(RASTREIO.total_ms() / 1000)
\ No newline at end of file
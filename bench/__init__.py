@@ -0,0 +1 @@
+"""Benchmarks do painel (python -m bench.rerun, bench.carga, bench.micro, bench.importacao)."""
@@ -0,0 +1,156 @@
+"""
+Teste de carga: N sessões simultâneas do painel, cada uma fazendo rerun a
+cada --ciclo segundos (120 s no painel real), contra os servidores locais
+de bench/servidores.py.
+
+Cada sessão é um AppTest numa thread própria, todas no mesmo processo e
+compartilhando os caches do Streamlit, como as abas de um mesmo servidor.
+Os servidores locais rodam num processo filho (servidores.EmProcesso), então
+CPU e memória medidas são só as do painel. Para cada estágio (ex.: --sessoes
+1,5,20) informa CPU do processo, memória residente (mediana das amostras do
+estágio) e por sessão, requisições ao Supabase e à planilha e percentis de
+latência do rerun.
+
+Uso (na raiz do repositório):
+    python -m bench.carga --sessoes 1,5,10,20 --ciclo 10 --duracao 60
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+from bench.rerun import RAIZ, _percentil, configurar_ambiente
+
+
+AMOSTRA_RSS_S = 0.5
+
+
+def rss_mb() -> float:
+    """Memória residente atual (Linux); nan fora dele (o ru_maxrss é o pico, não serve)."""
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def _amostrar_rss(parar: threading.Event, amostras: list):
+    while not parar.wait(AMOSTRA_RSS_S):
+        amostras.append(rss_mb())
+
+
+def _sessao(app: str, args, parar: threading.Event, latencias: list, erros: list, lock: threading.Lock):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app, default_timeout=args.timeout)
+    parar.wait(random.uniform(0, args.ciclo))  # espalha as sessões ao longo do ciclo
+    while not parar.is_set():
+        t0 = time.perf_counter()
+        try:
+            at.run()
+            falhou = bool(at.exception)
+        except Exception:
+            falhou = True
+        dt = (time.perf_counter() - t0) * 1000
+        with lock:
+            latencias.append(dt)
+            if falhou:
+                erros.append(dt)
+        parar.wait(max(0.0, args.ciclo - dt / 1000))
+
+
+def estagio(app: str, n: int, args, supabase, sheets) -> dict:
+    parar = threading.Event()
+    latencias, erros, lock = [], [], threading.Lock()
+    amostras_rss = []
+    supabase.zerar_contagem()
+    sheets.zerar_contagem()
+    rss0 = rss_mb()
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+
+    threads = [
+        threading.Thread(target=_sessao, args=(app, args, parar, latencias, erros, lock), daemon=True)
+        for _ in range(n)
+    ]
+    for t in threads:
+        t.start()
+    threading.Thread(target=_amostrar_rss, args=(parar, amostras_rss), daemon=True).start()
+    time.sleep(args.duracao)
+    parar.set()
+    for t in threads:
+        t.join(args.timeout)
+
+    duracao = time.perf_counter() - t0
+    minutos = duracao / 60
+    rss = statistics.median(amostras_rss) if amostras_rss else rss_mb()
+    return {
+        "sessoes": n,
+        "reruns": len(latencias),
+        "erros": len(erros),
+        "cpu_nucleos": (time.process_time() - cpu0) / duracao,
+        "rss_mb": rss,
+        "mb_por_sessao": (rss - rss0) / n,
+        "supabase_por_min": supabase.total_requisicoes() / minutos,
+        "sheets_por_min": sheets.total_requisicoes() / minutos,
+        "p50_ms": _percentil(latencias, 0.50),
+        "p95_ms": _percentil(latencias, 0.95),
+        "p99_ms": _percentil(latencias, 0.99),
+        "max_ms": max(latencias) if latencias else float("nan"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessoes", default="1,5,10", help="estágios, ex.: 1,5,10,20")
+    parser.add_argument("--ciclo", type=float, default=120.0, help="segundos entre reruns de cada sessão")
+    parser.add_argument("--duracao", type=float, default=300.0, help="segundos de cada estágio")
+    parser.add_argument("--latencia-supabase", type=float, default=50.0)
+    parser.add_argument("--latencia-sheets", type=float, default=200.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--horas", type=float, default=24.0)
+    parser.add_argument("--historico", action="store_true", help="liga o coletor em segundo plano (PAINEL_HISTORICO=1)")
+    parser.add_argument("--dados-dir", default=os.path.join(RAIZ, ".painel", "bench"))
+    parser.add_argument("--reproduzir", metavar="ARQUIVO", help="responde com uma gravação de painel.gravacao")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="grava o resultado neste arquivo")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, RAIZ)
+    from bench.servidores import EmProcesso, FakePostgrest, FakeSheets
+
+    supabase = EmProcesso(FakePostgrest, horas=args.horas, latencia_ms=args.latencia_supabase, jitter_ms=args.jitter)
+    sheets = EmProcesso(FakeSheets, latencia_ms=args.latencia_sheets, jitter_ms=args.jitter)
+    configurar_ambiente(args, supabase, sheets)
+    app = os.path.join(RAIZ, "app.py")
+
+    # um rerun antes dos estágios: imports e recursos do processo não contam como custo de sessão
+    from streamlit.testing.v1 import AppTest
+    AppTest.from_file(app, default_timeout=args.timeout).run()
+
+    resultados = []
+    print(f"{'sessões':>8}{'reruns':>8}{'erros':>7}{'CPU':>7}{'RSS MB':>9}{'MB/sess':>9}"
+          f"{'supa/min':>10}{'sheet/min':>10}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for n in [int(x) for x in args.sessoes.split(",") if x.strip()]:
+        r = estagio(app, n, args, supabase, sheets)
+        resultados.append(r)
+        print(f"{r['sessoes']:>8}{r['reruns']:>8}{r['erros']:>7}{r['cpu_nucleos']:>7.2f}{r['rss_mb']:>9.0f}"
+              f"{r['mb_por_sessao']:>9.1f}{r['supabase_por_min']:>10.1f}{r['sheets_por_min']:>10.1f}"
+              f"{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}{r['p99_ms']:>9.0f}", flush=True)
+
+    supabase.parar()
+    sheets.parar()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "estagios": resultados}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Tempo de importação e de primeiro rerun num processo novo (o que cada
+réplica paga depois de reiniciar o container).
+
+Cada cenário roda --vezes em subprocessos novos e informa a mediana e os
+módulos pesados que acabaram carregados:
+- painel: as camadas de dados/formatação (painel.*) usadas pelo app.py;
+- primeiro_rerun: import do Streamlit + primeiro AppTest.run() do app.py
+  contra os servidores locais de bench/servidores.py;
+- referencia_pandas_requests: só `import pandas, requests`, o custo que
+  sai do caminho quente quando eles não são importados.
+
+Uso (na raiz do repositório):
+    python -m bench.importacao --vezes 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ("pandas", "numpy", "pyarrow", "requests")
+
+_MEDIR = """
+import json, sys, time
+t0 = time.perf_counter()
+{codigo}
+dt = time.perf_counter() - t0
+print(json.dumps({{"s": dt, "modulos": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+CENARIOS = {
+    "painel": """
+import painel.dados, painel.formatacao, painel.limites, painel.registro, painel.rollup, painel.tempo
+""",
+    "primeiro_rerun": """
+import os
+from bench.servidores import FakePostgrest, FakeSheets
+supabase, sheets = FakePostgrest(), FakeSheets()
+os.environ.update({{"SUPABASE_URL": supabase.url, "SUPABASE_KEY": "bench", "PAINEL_SHEETS_BASE_URL": sheets.url,
+                    "PAINEL_METRICS_PORTA": "0", "PAINEL_HISTORICO": "0"}})
+t0 = time.perf_counter()  # sem contar os servidores falsos
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+assert not at.exception, at.exception
+""",
+    "referencia_pandas_requests": """
+import pandas, requests
+""",
+}
+
+
+def medir(cenario: str) -> dict:
+    codigo = CENARIOS[cenario].format(app=os.path.join(RAIZ, "app.py"))
+    script = _MEDIR.format(codigo=codigo, pesados=PESADOS)
+    saida = subprocess.run(
+        [sys.executable, "-c", script], cwd=RAIZ, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": RAIZ},
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--vezes", type=int, default=5)
+    parser.add_argument("--json", help="grava o resultado neste arquivo")
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    print(f"{'cenário':<28}{'mediana ms':>12}{'mín ms':>10}  módulos pesados carregados")
+    for cenario in CENARIOS:
+        amostras = [medir(cenario) for _ in range(args.vezes)]
+        tempos = [a["s"] * 1000 for a in amostras]
+        modulos = sorted({m for a in amostras for m in a["modulos"]})
+        resultados[cenario] = {"mediana_ms": statistics.median(tempos), "min_ms": min(tempos), "modulos": modulos}
+        print(f"{cenario:<28}{statistics.median(tempos):>12.0f}{min(tempos):>10.0f}  {', '.join(modulos) or '-'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
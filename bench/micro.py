@@ -0,0 +1,190 @@
+"""
+Microbenchmarks dos helpers que rodam para cada card em cada rerun
+(painel.formatacao e a busca de limites), com baseline gravada em
+bench/baseline_micro.json e aviso de regressão.
+
+Os tempos são normalizados por um laço de calibração medido na mesma
+execução, para a comparação com a baseline não depender tanto da máquina.
+Cada rodada mede a calibração e todos os casos, intercalados; vale a mediana
+das rodadas. Casos abaixo de um microssegundo oscilam mais que a tolerância
+com a máquina parada, então só contam como regressão se também ficarem
+--piso-ns mais lentos em tempo absoluto.
+
+Uso (na raiz do repositório):
+    python -m bench.micro                 # compara com a baseline; sai com 1 se houver regressão
+    python -m bench.micro --salvar        # grava a baseline atual
+    python -m bench.micro -k fmt_datetime --tolerancia 0.5 --rodadas 7
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_micro.json")
+
+
+def _calibracao():
+    total = 0
+    for i in range(200):
+        total += i * i
+    return total
+
+
+def _limites_realistas(registro: dict) -> dict:
+    limites = {}
+    for item in registro["grupos"] + registro["operacoes"]:
+        limites[item["titulo"].replace("Operação ", "")] = {"valor_consumido": 500.0, "ticket": 2.5}
+    return limites
+
+
+def casos() -> list:
+    """[(nome, função sem argumentos)]."""
+    sys.path.insert(0, RAIZ)
+    from painel.formatacao import fmt_datetime_br, fmt_float, fmt_int, fmt_moeda_brl, normalize_text, to_float_safe
+    from painel.limites import ResolvedorLimites, get_limites_operacao, montar_aliases_limites
+    from painel.registro import carregar_registro
+    from painel.tempo import _de_texto, _fmt_texto, fmt_br_lote, para_datetime
+
+    registro = carregar_registro()
+    aliases = montar_aliases_limites(registro)
+    limites = _limites_realistas(registro)
+    # planilha grande sem nenhuma linha que case: todos os passos da busca varrem tudo
+    limites_grandes = {f"Servidor Desconhecido {i:04d} (Vivo)": {"valor_consumido": 1.0, "ticket": 1.0} for i in range(500)}
+    texto_longo = "Operação Ação Índice Último Pôr ÇÃO " * 30
+    datas_lote = [f"2026-10-18T15:{i:02d}:05.123456+00:00" for i in range(20)]
+    resolvedor = ResolvedorLimites(limites, aliases)
+
+    def sem_memo(fn, *args):
+        # custo de uma string nova (created_at que acabou de mudar), não o do acerto no memo
+        def caso():
+            _de_texto.cache_clear()
+            _fmt_texto.cache_clear()
+            return fn(*args)
+        return caso
+    resolvedor_grande = ResolvedorLimites(limites_grandes, aliases)
+
+    return [
+        ("calibracao", _calibracao),
+        ("fmt_int/int", lambda: fmt_int(123456789)),
+        ("fmt_int/str_invalida", lambda: fmt_int("abc")),
+        ("fmt_int/none", lambda: fmt_int(None)),
+        ("fmt_float/float", lambda: fmt_float(1234567.891)),
+        ("fmt_float/nan", lambda: fmt_float(float("nan"))),
+        ("fmt_float/enorme", lambda: fmt_float(1e300)),
+        ("fmt_moeda_brl/float", lambda: fmt_moeda_brl(1234.5)),
+        ("fmt_moeda_brl/str_invalida", lambda: fmt_moeda_brl("x")),
+        ("fmt_datetime_br/iso_utc", lambda: fmt_datetime_br("2026-10-18T15:04:05.123456+00:00")),
+        ("fmt_datetime_br/naive", lambda: fmt_datetime_br("2026-10-18 12:04:05")),
+        ("fmt_datetime_br/invalida", lambda: fmt_datetime_br("ontem à tarde")),
+        ("fmt_datetime_br/vazia", lambda: fmt_datetime_br("")),
+        ("fmt_datetime_br/iso_utc_sem_memo", sem_memo(fmt_datetime_br, "2026-10-18T15:04:05.123456+00:00")),
+        ("fmt_datetime_br/naive_sem_memo", sem_memo(fmt_datetime_br, "2026-10-18 12:04:05")),
+        ("tempo/para_datetime_iso", lambda: para_datetime("2026-10-18T15:04:05.123456+00:00")),
+        ("tempo/para_datetime_iso_sem_memo", sem_memo(para_datetime, "2026-10-18T15:04:05.123456+00:00")),
+        ("tempo/fmt_br_lote_20", lambda: fmt_br_lote(datas_lote)),
+        ("tempo/fmt_br_lote_20_sem_memo", sem_memo(fmt_br_lote, datas_lote)),
+        ("to_float_safe/float", lambda: to_float_safe(12.5)),
+        ("to_float_safe/brl", lambda: to_float_safe("R$ 1.234.567,89")),
+        ("to_float_safe/espacos", lambda: to_float_safe("   ")),
+        ("to_float_safe/invalida", lambda: to_float_safe("n/d")),
+        ("normalize_text/titulo", lambda: normalize_text("Operação FMG (Vivo)")),
+        ("normalize_text/longo", lambda: normalize_text(texto_longo)),
+        ("get_limites_operacao/exato", lambda: get_limites_operacao(limites, "PBX1", aliases)),
+        ("get_limites_operacao/alias", lambda: get_limites_operacao(limites, "Operação FMG (Vivo)", aliases)),
+        ("get_limites_operacao/ausente", lambda: get_limites_operacao(limites, "Operação Inexistente", aliases)),
+        ("get_limites_operacao/planilha_500", lambda: get_limites_operacao(limites_grandes, "Operação SOC (Vivo)", aliases)),
+        ("ResolvedorLimites/alias", lambda: resolvedor.resolver("Operação FMG (Vivo)")),
+        ("ResolvedorLimites/planilha_500", lambda: resolvedor_grande.resolver("Operação SOC (Vivo)")),
+    ]
+
+
+def chamadas_por_medida(fn, alvo_s: float = 0.05) -> int:
+    n, tempo = timeit.Timer(fn).autorange()
+    return max(1, int(n * alvo_s / max(tempo, 1e-9)))
+
+
+def medir(fn, n: int, repeticoes: int = 5) -> float:
+    """Tempo mediano por chamada (ns) entre as repetições."""
+    return statistics.median(timeit.Timer(fn).repeat(repeat=repeticoes, number=n)) / n * 1e9
+
+
+def rodar(selecionados: list, rodadas: int) -> tuple:
+    """(calibração em ns, {nome: ns}, {nome: relativo}): medianas das rodadas."""
+    chamadas = {nome: chamadas_por_medida(fn) for nome, fn in selecionados}
+    calibracoes, ns, relativos = [], {}, {}
+    for _ in range(rodadas):
+        medidas = {nome: medir(fn, chamadas[nome]) for nome, fn in selecionados}
+        calib = medidas.pop("calibracao")
+        calibracoes.append(calib)
+        for nome, valor in medidas.items():
+            ns.setdefault(nome, []).append(valor)
+            relativos.setdefault(nome, []).append(valor / calib)
+    mediana = lambda d: {nome: statistics.median(v) for nome, v in d.items()}
+    return statistics.median(calibracoes), mediana(ns), mediana(relativos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="filtro", help="só os casos cujo nome contém este texto")
+    parser.add_argument("--salvar", action="store_true", help="grava os resultados como nova baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="fração mais lenta que a baseline aceita")
+    parser.add_argument("--piso-ns", type=float, default=150.0,
+                        help="diferença absoluta mínima (ns, na escala da calibração atual) para contar regressão")
+    parser.add_argument("--rodadas", type=int, default=5, help="rodadas intercaladas; vale a mediana")
+    parser.add_argument("--baseline", default=BASELINE)
+    args = parser.parse_args(argv)
+
+    todos = casos()
+    selecionados = [(n, f) for n, f in todos if n == "calibracao" or not args.filtro or args.filtro in n]
+
+    calib, resultados, relativos = rodar(selecionados, max(1, args.rodadas))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    regressoes = []
+    print(f"{'caso':<36}{'ns/chamada':>12}{'relativo':>10}{'baseline':>10}{'variação':>10}")
+    for nome, ns in resultados.items():
+        rel = relativos[nome]
+        base = baseline.get("casos", {}).get(nome, {}).get("relativo")
+        if base:
+            variacao = rel / base - 1
+            acima_do_piso = (rel - base) * calib > args.piso_ns
+            marca = "  ⚠️ regressão" if variacao > args.tolerancia and acima_do_piso else ""
+            if marca:
+                regressoes.append(nome)
+            print(f"{nome:<36}{ns:>12.0f}{rel:>10.2f}{base:>10.2f}{variacao:>+10.0%}{marca}")
+        else:
+            print(f"{nome:<36}{ns:>12.0f}{rel:>10.2f}{'-':>10}{'-':>10}")
+
+    if args.salvar:
+        casos_salvos = dict(baseline.get("casos", {}))
+        casos_salvos.update({
+            nome: {"ns": round(ns, 1), "relativo": round(relativos[nome], 5)}
+            for nome, ns in resultados.items()
+        })
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "maquina": platform.machine(),
+                "calibracao_ns": round(calib, 1),
+                "casos": casos_salvos,
+            }, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\nbaseline gravada em {args.baseline}")
+    elif regressoes:
+        print(
+            f"\n{len(regressoes)} caso(s) acima da tolerância de {args.tolerancia:.0%} "
+            f"e do piso de {args.piso_ns:.0f} ns: {', '.join(regressoes)}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
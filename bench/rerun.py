@@ -0,0 +1,166 @@
+"""
+Benchmark de rerun do app.py contra os servidores locais de bench/servidores.py.
+
+Mede o tempo de ponta a ponta de cada rerun (AppTest.run) em três situações:
+- primeira: primeiro rerun do processo (imports, recursos, caches vazios);
+- fria: caches de dados limpos (st.cache_data.clear()) antes do rerun;
+- quente: rerun logo em seguida, com os caches válidos.
+e o custo por fase lido do expander "Diagnóstico" do próprio app.
+
+Uso (na raiz do repositório):
+    python -m bench.rerun --reruns 10 --latencia-supabase 80 --latencia-sheets 300
+    python -m bench.rerun --json resultado.json
+    python -m bench.rerun --reproduzir .painel/gravacao.jsonl   # dados reais gravados, sem rede
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    if not ordenados:
+        return float("nan")
+    k = (len(ordenados) - 1) * p
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i)
+
+
+def resumir(amostras: list) -> dict:
+    return {
+        "n": len(amostras),
+        "media_ms": statistics.fmean(amostras) if amostras else float("nan"),
+        "p50_ms": _percentil(amostras, 0.50),
+        "p95_ms": _percentil(amostras, 0.95),
+        "max_ms": max(amostras) if amostras else float("nan"),
+    }
+
+
+def fases_do_diagnostico(at) -> dict:
+    """{fase: ms} do resumo mostrado no expander "Diagnóstico" do app."""
+    for exp in at.expander:
+        if not exp.label.startswith("Diagnóstico"):
+            continue
+        for md in exp.markdown:
+            linhas = md.value.splitlines()
+            if linhas and linhas[0] == "| fase | chamadas | ms |":
+                celulas = [[c.strip() for c in l.strip("|").split("|")] for l in linhas[2:]]
+                return {c[0]: float(c[2]) for c in celulas}
+    return {}
+
+
+def configurar_ambiente(args, supabase, sheets):
+    os.environ.update({
+        "SUPABASE_URL": supabase.url,
+        "SUPABASE_KEY": "bench",
+        "PAINEL_SHEETS_BASE_URL": sheets.url,
+        "PAINEL_METRICS_PORTA": "0",
+        "PAINEL_HISTORICO": "1" if args.historico else "0",
+        "PAINEL_DADOS_DIR": args.dados_dir,
+    })
+    if getattr(args, "reproduzir", None):
+        # respostas gravadas (painel.gravacao) no lugar dos servidores locais
+        os.environ.update({"PAINEL_GRAVACAO": "reproduzir", "PAINEL_GRAVACAO_ARQUIVO": os.path.abspath(args.reproduzir)})
+
+
+def rodar(args) -> dict:
+    sys.path.insert(0, RAIZ)
+    from bench.servidores import FakePostgrest, FakeSheets
+
+    supabase = FakePostgrest(horas=args.horas, latencia_ms=args.latencia_supabase, jitter_ms=args.jitter)
+    sheets = FakeSheets(latencia_ms=args.latencia_sheets, jitter_ms=args.jitter)
+    configurar_ambiente(args, supabase, sheets)
+
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    app = os.path.join(RAIZ, "app.py")
+    resultados = {"primeira": [], "fria": [], "quente": []}
+    fases = {"primeira": [], "fria": [], "quente": []}
+    requisicoes = {"primeira": [], "fria": [], "quente": []}
+
+    def medir(tipo: str):
+        at = AppTest.from_file(app, default_timeout=args.timeout)
+        supabase.zerar_contagem()
+        sheets.zerar_contagem()
+        t0 = time.perf_counter()
+        at.run()
+        resultados[tipo].append((time.perf_counter() - t0) * 1000)
+        if at.exception:
+            raise RuntimeError(f"app.py falhou: {at.exception[0].value}")
+        fases[tipo].append(fases_do_diagnostico(at))
+        requisicoes[tipo].append({"supabase": supabase.total_requisicoes(), "sheets": sheets.total_requisicoes()})
+
+    medir("primeira")
+    for _ in range(args.reruns):
+        st.cache_data.clear()
+        medir("fria")
+        medir("quente")
+
+    saida = {
+        "config": vars(args),
+        "rerun": {tipo: resumir(v) for tipo, v in resultados.items()},
+        "fases_ms": {
+            tipo: {
+                fase: statistics.fmean(f.get(fase, 0.0) for f in lista)
+                for fase in sorted({k for f in lista for k in f})
+            }
+            for tipo, lista in fases.items() if lista
+        },
+        "requisicoes": {
+            tipo: {k: statistics.fmean(r[k] for r in lista) for k in ("supabase", "sheets")}
+            for tipo, lista in requisicoes.items() if lista
+        },
+    }
+    supabase.parar()
+    sheets.parar()
+    return saida
+
+
+def imprimir(saida: dict):
+    print(f"{'rerun':<10}{'n':>4}{'média':>10}{'p50':>10}{'p95':>10}{'máx':>10}  (ms)")
+    for tipo, r in saida["rerun"].items():
+        print(f"{tipo:<10}{r['n']:>4}{r['media_ms']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['max_ms']:>10.1f}")
+    print()
+    print("requisições por rerun (média):")
+    for tipo, r in saida["requisicoes"].items():
+        print(f"  {tipo:<10} supabase={r['supabase']:.1f}  sheets={r['sheets']:.1f}")
+    print()
+    print("fases (ms, média; fases aninhadas também contam na fase de fora):")
+    tipos = list(saida["fases_ms"])
+    todas = sorted({f for t in tipos for f in saida["fases_ms"][t]},
+                   key=lambda f: -max(saida["fases_ms"][t].get(f, 0.0) for t in tipos))
+    print(f"  {'fase':<20}" + "".join(f"{t:>12}" for t in tipos))
+    for f in todas:
+        print(f"  {f:<20}" + "".join(f"{saida['fases_ms'][t].get(f, 0.0):>12.1f}" for t in tipos))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--reruns", type=int, default=5, help="pares fria/quente a medir")
+    parser.add_argument("--latencia-supabase", type=float, default=50.0, help="ms por requisição ao PostgREST local")
+    parser.add_argument("--latencia-sheets", type=float, default=200.0, help="ms por requisição à planilha local")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± ms aleatórios em cada requisição")
+    parser.add_argument("--horas", type=float, default=24.0, help="horas de dados gerados por tabela")
+    parser.add_argument("--historico", action="store_true", help="liga o coletor em segundo plano (PAINEL_HISTORICO=1)")
+    parser.add_argument("--dados-dir", default=os.path.join(RAIZ, ".painel", "bench"), help="PAINEL_DADOS_DIR do app")
+    parser.add_argument("--reproduzir", metavar="ARQUIVO", help="responde com uma gravação (PAINEL_GRAVACAO=gravar) em vez dos dados gerados")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="grava o resultado neste arquivo")
+    args = parser.parse_args(argv)
+
+    saida = rodar(args)
+    imprimir(saida)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(saida, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
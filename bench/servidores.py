@@ -0,0 +1,219 @@
+"""
+Servidores locais que fazem o papel do Supabase (PostgREST) e do Google
+Sheets (export CSV) nos benchmarks, com latência configurável.
+
+- FakePostgrest: GET /rest/v1/<tabela> com select/order/limit e filtros
+  created_at=gt./gte./lt./lte.; as linhas são geradas a partir do
+  operacoes.json (uma a cada passo_s nas últimas `horas`), com contadores
+  que crescem ao longo do dia, então o coletor e a tela veem dados coerentes.
+  POST /rest/v1/rpc/* devolve 404 (o app cai no rollup em Python).
+- FakeSheets: GET /spreadsheets/d/<id>/export devolve a planilha de limites
+  com uma linha por grupo/operação do registro.
+
+Cada servidor conta as requisições (contagem) e aplica latencia_ms ± jitter_ms
+antes de responder; os dois atributos podem ser trocados com o servidor no ar.
+EmProcesso(FakePostgrest, ...) sobe o mesmo servidor num processo filho, para
+a CPU e a memória dele não entrarem nas medidas do processo que o usa.
+"""
+import json
+import multiprocessing
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+from painel.registro import carregar_registro
+from painel.tempo import TZ_SP
+
+
+class _Servidor:
+    def __init__(self, porta: int = 0, latencia_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.contagem = {}
+        self._lock = threading.Lock()
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _responder(self, status: int, corpo: bytes, tipo: str):
+                servidor._esperar()
+                self.send_response(status)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def do_GET(self):
+                servidor._contar("GET " + urlparse(self.path).path)
+                self._responder(*servidor.get(self.path))
+
+            def do_POST(self):
+                servidor._contar("POST " + urlparse(self.path).path)
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._responder(*servidor.post(self.path))
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", porta), Handler)
+        self._http.daemon_threads = True
+        self.porta = self._http.server_address[1]
+        self.url = f"http://127.0.0.1:{self.porta}"
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+
+    def _esperar(self):
+        atraso = self.latencia_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if atraso > 0:
+            time.sleep(atraso / 1000)
+
+    def _contar(self, chave: str):
+        with self._lock:
+            self.contagem[chave] = self.contagem.get(chave, 0) + 1
+
+    def total_requisicoes(self) -> int:
+        with self._lock:
+            return sum(self.contagem.values())
+
+    def zerar_contagem(self):
+        with self._lock:
+            self.contagem.clear()
+
+    def get(self, caminho: str) -> tuple:
+        return 404, b"{}", "application/json"
+
+    def post(self, caminho: str) -> tuple:
+        return 404, b"{}", "application/json"
+
+    def parar(self):
+        self._http.shutdown()
+
+
+class FakePostgrest(_Servidor):
+    def __init__(self, registro: dict | None = None, horas: float = 24, passo_s: int = 60, **kwargs):
+        self.registro = registro or carregar_registro()
+        self.ops_por_tabela = {op["tabela"]: op for op in self.registro["operacoes"]}
+        self.horas = horas
+        self.passo_s = passo_s
+        super().__init__(**kwargs)
+
+    def _linha(self, op: dict, ts: int) -> dict:
+        s = op["sufixo"]
+        semente = zlib.crc32(op["tabela"].encode())
+        dt = datetime.fromtimestamp(ts, tz=TZ_SP)
+        seg_dia = dt.hour * 3600 + dt.minute * 60 + dt.second
+        leads = seg_dia * (1 + semente % 5) // 600
+        chamadas = leads * (3 + semente % 4)
+        valor = round(leads * (1.5 + (semente % 100) / 100), 2)
+        iso = datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+        return {
+            "id": ts,
+            "created_at": iso,
+            f"st_campanhas_{s}": "ATIVA",
+            f"qtde_mailing_{s}": 1000 + semente % 9000,
+            f"ticket_medio_{s}": round(valor / leads, 4) if leads else None,
+            f"qtde_lead_{s}": leads,
+            f"qtde_chamadas_{s}": chamadas,
+            f"ultimo_lead_{s}": iso,
+            f"valor_consumido_{s}": valor,
+        }
+
+    def _linhas(self, op: dict, filtros: list, desc: bool, limite: int) -> list:
+        fim = int(time.time()) // self.passo_s * self.passo_s
+        inicio = fim - int(self.horas * 3600) // self.passo_s * self.passo_s
+        lo, hi = inicio, fim
+        for operador, valor in filtros:
+            ts = datetime.fromisoformat(valor).timestamp()
+            if operador == "gt":
+                lo = max(lo, (int(ts) // self.passo_s + 1) * self.passo_s)
+            elif operador == "gte":
+                lo = max(lo, -(-int(ts) // self.passo_s) * self.passo_s)
+            elif operador == "lt":
+                hi = min(hi, (-(-int(ts) // self.passo_s) - 1) * self.passo_s)
+            elif operador == "lte":
+                hi = min(hi, int(ts) // self.passo_s * self.passo_s)
+        if lo > hi:
+            return []
+        if desc:
+            tss = range(hi, max(lo, hi - (limite - 1) * self.passo_s) - 1, -self.passo_s)
+        else:
+            tss = range(lo, min(hi, lo + (limite - 1) * self.passo_s) + 1, self.passo_s)
+        return [self._linha(op, t) for t in tss]
+
+    def get(self, caminho: str) -> tuple:
+        url = urlparse(caminho)
+        if not url.path.startswith("/rest/v1/"):
+            return super().get(caminho)
+        op = self.ops_por_tabela.get(url.path.rsplit("/", 1)[1])
+        if op is None:
+            return 404, b'{"message": "relation does not exist"}', "application/json"
+        params = parse_qsl(url.query)
+        ordem = dict(params).get("order", "created_at.asc")
+        if not ordem.startswith("created_at"):
+            return 400, b'{"message": "column does not exist"}', "application/json"
+        filtros = [tuple(v.split(".", 1)) for k, v in params if k == "created_at"]
+        limite = int(dict(params).get("limit", "1000"))
+        linhas = self._linhas(op, filtros, desc=".desc" in ordem, limite=limite)
+        return 200, json.dumps(linhas).encode(), "application/json"
+
+
+class FakeSheets(_Servidor):
+    def __init__(self, registro: dict | None = None, **kwargs):
+        registro = registro or carregar_registro()
+        linhas = ["Servidor,Valor Consumido,Ticket Médio"]
+        for item in registro["grupos"] + registro["operacoes"]:
+            linhas.append(f'{item["titulo"]},"{2000 if item in registro["grupos"] else 500},00","2,50"')
+        self.csv = ("\n".join(linhas) + "\n").encode("utf-8")
+        super().__init__(**kwargs)
+
+    def get(self, caminho: str) -> tuple:
+        if "/export" not in urlparse(caminho).path:
+            return super().get(caminho)
+        return 200, self.csv, "text/csv; charset=utf-8"
+
+
+def _servir(conn, classe, kwargs: dict):
+    servidor = classe(**kwargs)
+    conn.send((servidor.porta, servidor.url))
+    while True:
+        comando = conn.recv()
+        if comando == "contagem":
+            with servidor._lock:
+                conn.send(dict(servidor.contagem))
+            continue
+        conn.send(getattr(servidor, comando)())
+        if comando == "parar":
+            return
+
+
+class EmProcesso:
+    """Um _Servidor num processo filho, com contagem, total_requisicoes, zerar_contagem e parar."""
+
+    def __init__(self, classe, **kwargs):
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, filho = ctx.Pipe()
+        self._lock = threading.Lock()
+        self._processo = ctx.Process(target=_servir, args=(filho, classe, kwargs), daemon=True)
+        self._processo.start()
+        self.porta, self.url = self._conn.recv()
+
+    def _pedir(self, comando: str):
+        with self._lock:
+            self._conn.send(comando)
+            return self._conn.recv()
+
+    @property
+    def contagem(self) -> dict:
+        return self._pedir("contagem")
+
+    def total_requisicoes(self) -> int:
+        return self._pedir("total_requisicoes")
+
+    def zerar_contagem(self):
+        self._pedir("zerar_contagem")
+
+    def parar(self):
+        self._pedir("parar")
+        self._processo.join(5)
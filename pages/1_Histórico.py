@@ -0,0 +1,128 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+from supabase import create_client
+
+from painel.downsample import lttb
+from painel.historico import HistoricoStore, caminho_historico
+from painel.registro import carregar_registro
+from painel.tempo import TZ_SP
+
+# ========== CONFIG ==========
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+DADOS_DIR = os.getenv("PAINEL_DADOS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".painel"))
+PONTOS_GRAFICO = int(os.getenv("PAINEL_PONTOS_GRAFICO", "300"))
+
+# período -> (início, tamanho do balde em segundos)
+PERIODOS = {
+    "Hoje": (lambda agora: agora.replace(hour=0, minute=0, second=0, microsecond=0), 300),
+    "Últimos 7 dias": (lambda agora: agora - timedelta(days=7), 3600),
+}
+METRICAS = {
+    "valor_consumido": "Valor consumido",
+    "qtde_leads": "Leads",
+    "qtde_chamadas": "Chamadas",
+    "ticket_medio": "Ticket médio",
+}
+FONTE_SERVIDOR = "Servidor (baldes no Postgres)"
+FONTE_LOCAL = "Histórico local (LTTB)"
+
+st.set_page_config(page_title="Histórico — Painel Supervisório", layout="wide")
+st.markdown("### 📈 Histórico das operações")
+
+if not SUPABASE_URL or not SUPABASE_KEY:
+    st.error("Variáveis de ambiente SUPABASE_URL e/ou SUPABASE_KEY não definidas.")
+    st.stop()
+
+@st.cache_resource
+def obter_registro() -> dict:
+    return carregar_registro()
+
+@st.cache_resource
+def obter_store() -> HistoricoStore:
+    return HistoricoStore(caminho_historico(DADOS_DIR))  # o mesmo arquivo do coletor do app.py
+
+@st.cache_resource
+def obter_cliente():
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+@st.cache_data(ttl=60)
+def carregar_buckets(tabela: str, sufixo: str, desde_iso: str, ate_iso: str, bucket_s: int) -> list | None:
+    """
+    Baldes de tempo calculados no Postgres (sql/painel_historico_buckets.sql).
+    None se a função não estiver instalada.
+    """
+    try:
+        resp = obter_cliente().rpc(
+            "painel_historico_buckets",
+            {"tabela": tabela, "sufixo": sufixo, "desde": desde_iso, "ate": ate_iso, "bucket_s": bucket_s},
+        ).execute()
+        return resp.data or []
+    except Exception:
+        return None
+
+registro = obter_registro()
+
+col1, col2, col3, col4 = st.columns([2, 1, 1, 2])
+with col1:
+    op = st.selectbox("Operação", registro["operacoes"], format_func=lambda o: o["titulo"])
+with col2:
+    periodo = st.radio("Período", list(PERIODOS), horizontal=True)
+with col3:
+    campo = st.selectbox("Métrica", list(METRICAS), format_func=METRICAS.get)
+with col4:
+    fonte = st.radio("Fonte", [FONTE_SERVIDOR, FONTE_LOCAL], horizontal=True)
+
+agora = datetime.now(TZ_SP)
+inicio_fn, bucket_s = PERIODOS[periodo]
+# ✅ início e fim alinhados aos baldes: mesma chave de cache durante o balde inteiro
+desde = datetime.fromtimestamp(int(inicio_fn(agora).timestamp()) // bucket_s * bucket_s, tz=TZ_SP)
+ate_ts = (int(agora.timestamp()) // bucket_s + 1) * bucket_s
+ate = datetime.fromtimestamp(ate_ts, tz=TZ_SP)
+
+df = None
+if fonte == FONTE_SERVIDOR:
+    linhas = carregar_buckets(op["tabela"], op["sufixo"], desde.isoformat(), ate.isoformat(), bucket_s)
+    if linhas is None:
+        st.warning("Função painel_historico_buckets indisponível no Supabase; usando o histórico local.")
+        fonte = FONTE_LOCAL
+    elif linhas:
+        df = pd.DataFrame(linhas)
+        df["bucket"] = pd.to_datetime(df["bucket"], utc=True).dt.tz_convert(TZ_SP)
+        df = df.set_index("bucket")[[f"{campo}_{s}" for s in ("min", "max", "ultimo", "media")]]
+        df.columns = ["mín", "máx", "último", "média"]
+        st.caption(f"{len(df)} baldes de {bucket_s // 60} min.")
+
+if fonte == FONTE_LOCAL:
+    t0 = time.perf_counter()
+    serie = obter_store().serie(op["id"], desde_ts=desde.timestamp(), ate_ts=ate.timestamp(), campos=(campo,))
+    ts, valores = lttb(serie["ts"], serie[campo], PONTOS_GRAFICO)
+    if ts:
+        df = pd.DataFrame(
+            {METRICAS[campo]: valores},
+            index=pd.to_datetime(ts, unit="s", utc=True).tz_convert(TZ_SP),
+        )
+        st.caption(
+            f"{len(serie['ts'])} linhas locais reduzidas a {len(ts)} pontos "
+            f"em {(time.perf_counter() - t0) * 1000:.0f} ms."
+        )
+
+if df is None or df.empty:
+    st.info(f"Sem histórico para **{op['titulo']}** no período.")
+else:
+    st.line_chart(df)
+
+# ✅ fechamento diário pré-calculado pelo histórico local (agregados_dia)
+fechamentos = obter_store().agregados_dia(op["id"], n_dias=7)
+if fechamentos:
+    st.markdown("#### Fechamento dos últimos dias")
+    st.dataframe(
+        pd.DataFrame(
+            [{"Dia": dia, **{METRICAS[c]: v for c, v in valores.items()}} for dia, valores in fechamentos]
+        ).set_index("Dia"),
+        use_container_width=True,
+    )
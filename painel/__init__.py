@@ -0,0 +1 @@
+"""Módulos de apoio do painel supervisório (app.py)."""
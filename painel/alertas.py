@@ -0,0 +1,126 @@
+"""
+Motor de alertas de limite, independente da interface.
+
+Roda no coletor (gancho pós-ciclo): a cada snapshot, avalia numa única
+passada todas as operações e todos os grupos contra os limites da planilha
+(valor consumido e ticket médio acima do limite) e guarda o estado de cada
+(alvo, regra) com as transições ok <-> alerta. A tela só lê estado(), então
+o custo da avaliação não depende de quantas pessoas estão com o painel aberto.
+
+Com histerese > 0, um alerta ativo só volta a ok quando o valor cai abaixo
+de limite * (1 - histerese), para um valor oscilando em cima do limite não
+ficar alternando de estado a cada ciclo.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+from painel.formatacao import to_float_safe
+from painel.rollup import RollupIncremental
+
+# regra -> (campo das métricas, coluna da planilha)
+REGRAS_LIMITE = {
+    "valor": ("valor_consumido", "valor_consumido"),
+    "ticket": ("ticket_medio", "ticket"),
+}
+
+MAX_TRANSICOES = 500
+
+log = logging.getLogger(__name__)
+
+
+def acima_do_limite(valor: float | None, limite: float | None, ja_ativo: bool = False, histerese: float = 0.0) -> bool:
+    """Regra de cada (alvo, regra): acima do limite; já em alerta, só sai abaixo de limite * (1 - histerese)."""
+    if limite is None or valor is None:
+        return False
+    return valor > (limite * (1 - histerese) if ja_ativo else limite)
+
+
+class MotorAlertas:
+    def __init__(self, registro: dict, fonte_limites, histerese: float = 0.0):
+        """fonte_limites: objeto com atualizar() -> ResolvedorLimites (painel.limites.FonteLimites)."""
+        self.registro = registro
+        self.fonte_limites = fonte_limites
+        self.histerese = histerese
+        self.avaliado_em = None
+        self._rollup = RollupIncremental(registro)
+        self._lock = threading.Lock()
+        self._estados = {}  # (tipo, alvo_id) -> {regra: {"ativo", "valor", "limite", "desde"}}
+        self._transicoes = deque(maxlen=MAX_TRANSICOES)
+        self._ouvintes = []
+
+    def adicionar_ouvinte(self, ouvinte):
+        """ouvinte(transicoes: list[dict]) — chamado após cada avaliação que mudou algum estado."""
+        self._ouvintes.append(ouvinte)
+
+    def _alvos(self, ultimas: dict):
+        """(tipo, id, título, métricas) de cada operação com dados e de cada grupo."""
+        for op in self.registro["operacoes"]:
+            m = ultimas.get(op["id"])
+            if m:
+                yield "operacao", op["id"], op["titulo"], m
+        self._rollup.atualizar_varios({
+            op["id"]: ultimas.get(op["id"]) for op in self.registro["operacoes"] if op["entra_no_total"]
+        })
+        for gid, total in self._rollup.totais().items():
+            if total["n_operacoes"]:
+                yield "grupo", gid, self.registro["grupos_por_id"][gid]["titulo"], total
+
+    def avaliar(self, ultimas: dict, agora: float | None = None) -> list:
+        """Avalia o snapshot {operacao_id: métricas}; devolve as transições desta passada."""
+        agora = agora or time.time()
+        resolvedor = self.fonte_limites.atualizar()
+        transicoes = []
+        with self._lock:
+            for tipo, alvo_id, titulo, m in self._alvos(ultimas):
+                limites = resolvedor.resolver(titulo)
+                estados = self._estados.setdefault((tipo, alvo_id), {})
+                for regra, (campo, coluna) in REGRAS_LIMITE.items():
+                    valor = to_float_safe(m.get(campo))
+                    limite = to_float_safe(limites.get(coluna))
+                    anterior = estados.get(regra)
+                    ativo = acima_do_limite(valor, limite, bool(anterior and anterior["ativo"]), self.histerese)
+                    if anterior is None or anterior["ativo"] != ativo:
+                        if anterior is not None or ativo:
+                            transicoes.append({
+                                "tipo": tipo, "alvo": alvo_id, "titulo": titulo, "regra": regra,
+                                "de": "alerta" if anterior and anterior["ativo"] else "ok",
+                                "para": "alerta" if ativo else "ok",
+                                "valor": valor, "limite": limite, "ts": agora,
+                            })
+                        desde = agora
+                    else:
+                        desde = anterior["desde"]
+                    estados[regra] = {"ativo": ativo, "valor": valor, "limite": limite, "desde": desde}
+            self._transicoes.extend(transicoes)
+            self.avaliado_em = agora
+
+        if transicoes:
+            for ouvinte in self._ouvintes:
+                try:
+                    ouvinte(transicoes)
+                except Exception:
+                    log.exception("ouvinte do motor de alertas falhou")
+        return transicoes
+
+    def estado(self, tipo: str, alvo_id: str) -> dict | None:
+        """{regra: {"ativo", "valor", "limite", "desde"}} ou None se o alvo ainda não foi avaliado."""
+        with self._lock:
+            estados = self._estados.get((tipo, alvo_id))
+            return {r: dict(e) for r, e in estados.items()} if estados else None
+
+    def destaque(self, tipo: str, alvo_id: str, regra: str, valor: float | None, limite: float | None) -> bool:
+        """
+        Cor do card para o valor e o limite que ele mostra (linha e planilha da
+        sessão, que podem estar mais novas que o último ciclo); do motor só vem
+        se o alerta já estava ativo, para a histerese valer igual na tela.
+        """
+        with self._lock:
+            anterior = self._estados.get((tipo, alvo_id), {}).get(regra)
+        return acima_do_limite(valor, limite, bool(anterior and anterior["ativo"]), self.histerese)
+
+    def transicoes(self, n: int = 50) -> list:
+        """As n transições mais recentes, da mais nova para a mais antiga."""
+        with self._lock:
+            return list(self._transicoes)[-n:][::-1]
@@ -0,0 +1,114 @@
+"""
+Detecção incremental de anomalias nas métricas das operações.
+
+Cada (operação, regra) mantém média e variância exponenciais (EWMA) e,
+a cada linha nova, compara o valor com o que era esperado (z-score) antes
+de atualizar as estatísticas. Nada do histórico é relido: o custo é O(1)
+por linha e a memória é fixa por operação.
+
+Regras em modo "taxa" olham o incremento por minuto de um contador (ex.:
+chamadas feitas desde a linha anterior); em modo "nivel", o próprio valor.
+"""
+import math
+import threading
+import time
+
+from painel.tempo import para_epoch
+
+REGRAS_PADRAO = (
+    {"id": "queda_chamadas", "campo": "qtde_chamadas", "modo": "taxa", "direcao": "queda", "rotulo": "Queda nas chamadas"},
+    {"id": "pico_ticket", "campo": "ticket_medio", "modo": "nivel", "direcao": "pico", "rotulo": "Pico no ticket médio"},
+)
+
+
+class EWMA:
+    """Média/variância exponenciais (atualização incremental de Finch)."""
+
+    __slots__ = ("alpha", "media", "var", "n")
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.media = 0.0
+        self.var = 0.0
+        self.n = 0
+
+    def zscore(self, x: float) -> float | None:
+        if self.n < 2 or self.var <= 0:
+            return None
+        return (x - self.media) / math.sqrt(self.var)
+
+    def atualizar(self, x: float):
+        if self.n == 0:
+            self.media = x
+        else:
+            diff = x - self.media
+            incr = self.alpha * diff
+            self.media += incr
+            self.var = (1 - self.alpha) * (self.var + diff * incr)
+        self.n += 1
+
+
+class DetectorAnomalias:
+    """Usado como ouvinte do Coletor; a UI só lê ativas()."""
+
+    def __init__(self, regras: tuple = REGRAS_PADRAO, alpha: float = 0.1, limiar_z: float = 3.0, aquecimento: int = 10):
+        self.regras = regras
+        self.alpha = alpha
+        self.limiar_z = limiar_z
+        self.aquecimento = aquecimento
+        self._lock = threading.Lock()
+        self._stats = {}     # (op_id, regra_id) -> EWMA
+        self._anterior = {}  # (op_id, regra_id) -> (ts, valor) para regras de taxa
+        self._ativas = {}    # op_id -> {regra_id: {"rotulo", "z", "valor", "desde"}}
+
+    def _observar(self, op_id: str, regra: dict, ts: float, bruto):
+        if bruto is None:
+            return
+        chave = (op_id, regra["id"])
+        x = float(bruto)
+
+        if regra["modo"] == "taxa":
+            anterior = self._anterior.get(chave)
+            self._anterior[chave] = (ts, x)
+            if anterior is None or ts <= anterior[0] or x < anterior[1]:
+                return  # primeiro ponto ou contador zerado
+            x = (x - anterior[1]) / (ts - anterior[0]) * 60
+
+        stats = self._stats.get(chave)
+        if stats is None:
+            stats = self._stats[chave] = EWMA(self.alpha)
+
+        z = stats.zscore(x) if stats.n >= self.aquecimento else None
+        stats.atualizar(x)
+
+        ativas = self._ativas.setdefault(op_id, {})
+        anomalo = z is not None and (z <= -self.limiar_z if regra["direcao"] == "queda" else z >= self.limiar_z)
+        if anomalo:
+            desde = ativas.get(regra["id"], {}).get("desde", ts)
+            ativas[regra["id"]] = {"rotulo": regra["rotulo"], "z": z, "valor": x, "desde": desde}
+        else:
+            ativas.pop(regra["id"], None)
+
+    def ouvinte(self, op: dict, novas: list):
+        with self._lock:
+            for m in novas:
+                ts = para_epoch(m["created_at"])
+                if ts is None:
+                    continue
+                for regra in self.regras:
+                    self._observar(op["id"], regra, ts, m.get(regra["campo"]))
+
+    def preencher(self, store, registro: dict, janela_s: float, agora: float | None = None):
+        """Aquecimento a partir do histórico local (só na subida do processo)."""
+        campos = tuple(dict.fromkeys(r["campo"] for r in self.regras))
+        desde = (agora or time.time()) - janela_s
+        for op in registro["operacoes"]:
+            serie = store.serie(op["id"], desde_ts=desde, campos=campos)
+            with self._lock:
+                for i, ts in enumerate(serie["ts"]):
+                    for regra in self.regras:
+                        self._observar(op["id"], regra, ts, serie[regra["campo"]][i])
+
+    def ativas(self, op_id: str) -> list:
+        with self._lock:
+            return list(self._ativas.get(op_id, {}).values())
@@ -0,0 +1,144 @@
+"""
+Aquecimento do processo: antes do primeiro visitante, traz a planilha de
+limites (com o índice do ResolvedorLimites já montado para todos os títulos
+do registro), a última linha de cada operação e, se houver, os totais por
+grupo da função painel_totais.
+
+O lançador (python -m painel.servidor) inicia o aquecimento junto com o
+servidor. O estado fica no módulo, compartilhado com o app.py do mesmo
+processo, que usa o que ainda estiver dentro da validade em vez de ir ao
+Supabase/planilha. O /ready do servidor de métricas só responde 200 depois
+da primeira passada. Sem o lançador nada é iniciado e pronto() é sempre True.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from painel.limites import ResolvedorLimites, carregar_limites_google, montar_aliases_limites
+
+log = logging.getLogger(__name__)
+
+
+class Aquecimento:
+    def __init__(self):
+        self.validade_s = 30.0
+        self.linhas = {}  # tabela -> (linha, ts)
+        self.totais_item = None  # ({"linhas": list | None}, ts); linhas None = função não instalada
+        self.resolvedor = None
+        self.resolvedor_em = None
+        self.passadas = 0
+        self.inicio = None
+        self.pronto_em = None
+        self.erros = {}  # tarefa -> mensagem da última falha
+        self._pronto = threading.Event()
+        self._thread = None
+
+    def executar(self, registro: dict, carregar_linha, sheet_url: str, gid: str, paralelo: int = 8,
+                 carregar_totais=None):
+        """
+        Uma passada: limites + índice do resolvedor, a última linha de cada tabela do
+        registro e, com carregar_totais() -> list | None, os totais do painel_totais.
+        """
+        aliases = montar_aliases_limites(registro)
+        titulos = [item["titulo"] for item in registro["grupos"] + registro["operacoes"]]
+        tabelas = sorted({op["tabela"] for op in registro["operacoes"]})
+
+        def limites():
+            resolvedor = ResolvedorLimites(carregar_limites_google(sheet_url, gid), aliases)
+            for titulo in titulos:
+                resolvedor.resolver(titulo)
+            return resolvedor
+
+        with ThreadPoolExecutor(max_workers=paralelo, thread_name_prefix="painel-aquecimento") as pool:
+            tarefas = {"limites": pool.submit(limites)}
+            tarefas.update({f"linha:{t}": pool.submit(carregar_linha, t) for t in tabelas})
+            if carregar_totais:
+                tarefas["totais"] = pool.submit(carregar_totais)
+
+        agora = time.time()
+        for nome, futuro in tarefas.items():
+            try:
+                valor = futuro.result()
+            except Exception as e:
+                self.erros[nome] = repr(e)
+                continue
+            self.erros.pop(nome, None)
+            if nome == "limites":
+                if valor.limites:  # planilha fora do ar: não troca um índice bom por um vazio
+                    self.resolvedor, self.resolvedor_em = valor, agora
+            elif nome == "totais":
+                self.totais_item = ({"linhas": valor}, agora)
+            elif valor is not None:
+                self.linhas[nome.split(":", 1)[1]] = (valor, agora)
+        self.passadas += 1
+
+    def iniciar(self, registro: dict, carregar_linha, sheet_url: str, gid: str,
+                paralelo: int = 8, validade_s: float = 30.0, manter_s: float = 300.0,
+                carregar_totais=None) -> threading.Thread:
+        """
+        Primeira passada numa thread daemon; depois repete a cada validade_s até
+        manter_s após o início, para os primeiros visitantes ainda pegarem tudo quente.
+        """
+        if self._thread is not None:
+            return self._thread
+        self.validade_s = validade_s
+        self.inicio = time.time()
+
+        def rodar():
+            while True:
+                t0 = time.time()
+                try:
+                    self.executar(registro, carregar_linha, sheet_url, gid, paralelo, carregar_totais)
+                except Exception:
+                    log.exception("falha no aquecimento")
+                if not self._pronto.is_set():
+                    self.pronto_em = time.time()
+                    self._pronto.set()
+                    log.info("aquecimento pronto em %.1f s (%d erro(s))", self.pronto_em - self.inicio, len(self.erros))
+                if time.time() - self.inicio >= manter_s:
+                    return
+                time.sleep(max(0.0, validade_s - (time.time() - t0)))
+
+        self._thread = threading.Thread(target=rodar, name="painel-aquecimento", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def pronto(self) -> bool:
+        return self._thread is None or self._pronto.is_set()
+
+    def _fresco(self, ts: float | None) -> bool:
+        return ts is not None and time.time() - ts < self.validade_s
+
+    def linha(self, tabela: str) -> dict | None:
+        """Última linha aquecida, se ainda dentro da validade."""
+        item = self.linhas.get(tabela)
+        return item[0] if item and self._fresco(item[1]) else None
+
+    def totais(self) -> dict | None:
+        """{"linhas": list | None} aquecido, se ainda dentro da validade."""
+        item = self.totais_item
+        return item[0] if item and self._fresco(item[1]) else None
+
+    def limites(self) -> dict | None:
+        """Limites aquecidos, se ainda dentro da validade (o dict do próprio resolvedor)."""
+        return self.resolvedor.limites if self.resolvedor and self._fresco(self.resolvedor_em) else None
+
+    def resolvedor_de(self, limites_dict: dict) -> ResolvedorLimites | None:
+        """O índice pronto, quando limites_dict é exatamente o que saiu de limites()."""
+        resolvedor = self.resolvedor
+        return resolvedor if resolvedor is not None and resolvedor.limites is limites_dict else None
+
+    def estado(self) -> dict:
+        return {
+            "pronto": self.pronto(),
+            "segundos_ate_pronto": self.pronto_em - self.inicio if self.pronto_em else None,
+            "passadas": self.passadas,
+            "linhas": len(self.linhas),
+            "limites": len(self.resolvedor.limites) if self.resolvedor else 0,
+            "erros": dict(self.erros),
+        }
+
+
+# um por processo (o lançador inicia, o app.py consome)
+AQUECIMENTO = Aquecimento()
@@ -0,0 +1,152 @@
+"""
+Ritmo de consumo (burn rate) e projeção do valor consumido por operação.
+
+Cada operação tem uma regressão linear valor x tempo numa janela deslizante
+(somas Σt, Σv, Σt², Σtv mantidas ao entrar/sair pontos), então cada ponto
+novo custa O(1) amortizado. Com o limite da planilha, projeta quando o
+limite será cruzado e o valor no fim do dia.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from painel.tempo import TZ_SP, para_epoch
+
+
+class EstimadorTaxa:
+    __slots__ = ("janela_s", "_pontos", "_t0", "_st", "_sv", "_stt", "_stv")
+
+    def __init__(self, janela_s: float):
+        self.janela_s = janela_s
+        self._zerar()
+
+    def _zerar(self):
+        self._pontos = deque()
+        self._t0 = None
+        self._st = self._sv = self._stt = self._stv = 0.0
+
+    def _somar(self, t: float, v: float, sinal: float):
+        self._st += sinal * t
+        self._sv += sinal * v
+        self._stt += sinal * t * t
+        self._stv += sinal * t * v
+
+    @property
+    def ultimo(self) -> tuple | None:
+        """(ts, valor) do ponto mais recente."""
+        if not self._pontos:
+            return None
+        t, v = self._pontos[-1]
+        return t + self._t0, v
+
+    def adicionar(self, ts: float, valor: float):
+        if self._pontos:
+            t_ult, v_ult = self.ultimo
+            if ts <= t_ult:
+                return
+            # valor caiu: virada do dia / contador zerado na origem
+            if valor < v_ult:
+                self._zerar()
+        if self._t0 is None:
+            self._t0 = ts
+        t = ts - self._t0  # tempo relativo: evita perder precisão em Σt² com epoch
+        self._pontos.append((t, valor))
+        self._somar(t, valor, 1.0)
+        while self._pontos and self._pontos[0][0] < t - self.janela_s:
+            t_old, v_old = self._pontos.popleft()
+            self._somar(t_old, v_old, -1.0)
+        if self._pontos[0][0] > self.janela_s:
+            self._reancorar()
+
+    def _reancorar(self):
+        """
+        Leva _t0 para o ponto mais antigo da janela e refaz as somas do zero: sem
+        isso, t cresce sem parar em execuções longas e Σt² / Σtv perdem precisão
+        (e os erros de somar/subtrair se acumulam). Roda uma vez a cada ~janela_s,
+        então continua O(1) amortizado.
+        """
+        desloc = self._pontos[0][0]
+        self._t0 += desloc
+        pontos = [(t - desloc, v) for t, v in self._pontos]
+        self._pontos = deque(pontos)
+        self._st = self._sv = self._stt = self._stv = 0.0
+        for t, v in pontos:
+            self._somar(t, v, 1.0)
+
+    def taxa_por_s(self) -> float | None:
+        n = len(self._pontos)
+        if n < 2:
+            return None
+        den = n * self._stt - self._st * self._st
+        if den <= 0:
+            return None
+        return (n * self._stv - self._st * self._sv) / den
+
+    def projecao(self, limite: float | None, agora: float | None = None) -> dict | None:
+        """
+        {"taxa_h", "valor_atual", "fim_dia", "eta_s", "ultrapassado"}: eta_s = segundos
+        até cruzar o limite no ritmo atual (None sem limite ou sem ritmo positivo);
+        ultrapassado só quando o último valor já está no limite (eta_s = 0). Um
+        cruzamento projetado para antes de agora, com o valor ainda abaixo do
+        limite, também dá eta_s = 0, mas é iminente, não ultrapassado.
+        """
+        taxa = self.taxa_por_s()
+        ultimo = self.ultimo
+        if taxa is None or ultimo is None:
+            return None
+        agora = agora or time.time()
+        ts_ult, valor_atual = ultimo
+        amanha = (datetime.fromtimestamp(agora, tz=TZ_SP) + timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        fim_dia = valor_atual + max(taxa, 0.0) * (amanha.timestamp() - ts_ult)
+
+        eta_s = None
+        ultrapassado = limite is not None and valor_atual >= limite
+        if ultrapassado:
+            eta_s = 0.0
+        elif limite is not None and taxa > 0:
+            eta_s = max(0.0, (limite - valor_atual) / taxa - (agora - ts_ult))
+
+        return {
+            "taxa_h": taxa * 3600, "valor_atual": valor_atual, "fim_dia": fim_dia,
+            "eta_s": eta_s, "ultrapassado": ultrapassado,
+        }
+
+
+class TaxasOperacoes:
+    """Um EstimadorTaxa de valor_consumido por operação; usado como ouvinte do Coletor."""
+
+    def __init__(self, janela_s: float):
+        self.janela_s = janela_s
+        self._lock = threading.Lock()
+        self._estimadores = {}
+
+    def _adicionar(self, op_id: str, ts: float, valor):
+        if valor is None:
+            return
+        est = self._estimadores.get(op_id)
+        if est is None:
+            est = self._estimadores[op_id] = EstimadorTaxa(self.janela_s)
+        est.adicionar(ts, float(valor))
+
+    def ouvinte(self, op: dict, novas: list):
+        with self._lock:
+            for m in novas:
+                ts = para_epoch(m["created_at"])
+                if ts is not None:
+                    self._adicionar(op["id"], ts, m.get("valor_consumido"))
+
+    def preencher(self, store, registro: dict, agora: float | None = None):
+        desde = (agora or time.time()) - self.janela_s
+        for op in registro["operacoes"]:
+            serie = store.serie(op["id"], desde_ts=desde, campos=("valor_consumido",))
+            with self._lock:
+                for ts, valor in zip(serie["ts"], serie["valor_consumido"]):
+                    self._adicionar(op["id"], ts, valor)
+
+    def projecao(self, op_id: str, limite: float | None, agora: float | None = None) -> dict | None:
+        with self._lock:
+            est = self._estimadores.get(op_id)
+            return est.projecao(limite, agora) if est else None
@@ -0,0 +1,100 @@
+"""
+Coletor em segundo plano (uma thread por processo do Streamlit).
+
+A cada ciclo sincroniza o histórico local de todas as operações do registro
+(só deltas) e entrega as linhas novas aos ouvintes registrados. Roda
+independente de quantas sessões estão abertas.
+
+Também mantém `ultimas` (a linha mais recente de cada operação) e, ao fim
+de cada ciclo, chama os ganchos pós-ciclo com esse snapshot completo, para
+quem precisa olhar todas as operações de uma vez (ex.: o motor de alertas).
+
+Com várias réplicas no mesmo host, todas abrem o mesmo histórico e passam
+lider() (ex.: o flock do painel.compartilhado): só a eleita consulta o
+Supabase; as outras leem do arquivo as linhas que ela gravou e entregam aos
+ouvintes do mesmo jeito.
+"""
+import logging
+import threading
+import time
+
+from painel.historico import HistoricoStore, sincronizar_operacao
+
+log = logging.getLogger(__name__)
+
+
+class Coletor:
+    def __init__(self, cliente, registro: dict, store: HistoricoStore, intervalo_s: float = 60.0, lider=None):
+        """lider() -> bool; None = este processo sempre consulta o Supabase."""
+        self.cliente = cliente
+        self.registro = registro
+        self.store = store
+        self.intervalo_s = intervalo_s
+        self.ultimo_ciclo = None
+        self.lider = lider
+        self.ultimas = store.ultimas()
+        self._vistos = store.ultimos_ts()  # operacao -> ts da última linha já entregue
+        self._ouvintes = []
+        self._pos_ciclo = []
+        self._parar = threading.Event()
+        self._thread = None
+
+    def adicionar_ouvinte(self, ouvinte):
+        """ouvinte(op: dict, novas: list[dict]) — chamado a cada ciclo com as linhas novas da operação."""
+        self._ouvintes.append(ouvinte)
+
+    def adicionar_pos_ciclo(self, gancho):
+        """gancho(ultimas: dict) — chamado ao fim de cada ciclo com {operacao_id: métricas}."""
+        self._pos_ciclo.append(gancho)
+
+    def _ler_do_store(self, op: dict) -> list:
+        pontos = self.store.posteriores(op["id"], self._vistos.get(op["id"], 0.0))
+        if pontos:
+            self._vistos[op["id"]] = pontos[-1][0]
+        return [m for _, m in pontos]
+
+    def ciclo(self) -> int:
+        total = 0
+        consultar = self.lider is None or self.lider()
+        for op in self.registro["operacoes"]:
+            if consultar:
+                novas = sincronizar_operacao(self.cliente, self.store, op)
+            else:
+                novas = self._ler_do_store(op)
+            if not novas:
+                continue
+            total += len(novas)
+            self.ultimas[op["id"]] = novas[-1]
+            for ouvinte in self._ouvintes:
+                try:
+                    ouvinte(op, novas)
+                except Exception:
+                    log.exception("ouvinte do coletor falhou (%s)", op["id"])
+        if consultar and total:
+            self._vistos = self.store.ultimos_ts()  # se perder a eleição, segue daqui
+        snapshot = dict(self.ultimas)
+        for gancho in self._pos_ciclo:
+            try:
+                gancho(snapshot)
+            except Exception:
+                log.exception("gancho pós-ciclo do coletor falhou")
+        self.ultimo_ciclo = time.time()
+        return total
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                self.ciclo()
+            except Exception:
+                log.exception("ciclo do coletor falhou")
+            self._parar.wait(self.intervalo_s)
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name="painel-coletor", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
@@ -0,0 +1,66 @@
+"""
+Comparação "hoje x mesmo horário de ontem" por operação.
+
+Mantém em memória os agregados por minuto das últimas ~48h (pré-calculados
+pelo histórico local) e é atualizado pelo coletor a cada linha nova; o card
+faz consultas de dicionário, voltando minuto a minuto no máximo até o início
+da hora anterior.
+"""
+import threading
+import time
+
+from painel.historico import CAMPOS_AGREGADOS, hora_de, minuto_de
+from painel.tempo import para_epoch
+
+JANELA_S = 49 * 3600
+UM_DIA_S = 24 * 3600
+
+
+class ComparativoDiario:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._minutos = {}  # {op_id: {minuto: (ultimo_ts, {campo: valor})}}
+
+    def preencher(self, store, agora: float | None = None):
+        agora = agora or time.time()
+        linhas = store.agregados_minuto(desde_ts=agora - JANELA_S)
+        with self._lock:
+            for op_id, minuto, ultimo_ts, valores in linhas:
+                self._minutos.setdefault(op_id, {})[minuto] = (ultimo_ts, valores)
+
+    def ouvinte(self, op: dict, novas: list):
+        with self._lock:
+            minutos = self._minutos.setdefault(op["id"], {})
+            for m in novas:
+                ts = para_epoch(m["created_at"])
+                if ts is None:
+                    continue
+                minuto = minuto_de(ts)
+                atual = minutos.get(minuto)
+                if atual is None or ts >= atual[0]:
+                    minutos[minuto] = (ts, {c: m.get(c) for c in CAMPOS_AGREGADOS})
+            # descarta o que já saiu da janela de comparação
+            limite = time.time() - JANELA_S
+            for minuto in [mi for mi in minutos if mi < limite]:
+                del minutos[minuto]
+
+    def ontem(self, op_id: str, agora: float | None = None) -> dict | None:
+        """
+        Valores de 24h atrás: o fechamento do minuto mais recente cujo último ponto
+        não passa de agora - 24h, voltando no máximo até o início da hora anterior
+        (se a hora de ontem ainda não tinha dados). None sem dados.
+        """
+        agora = agora or time.time()
+        alvo = agora - UM_DIA_S
+        with self._lock:
+            minutos = self._minutos.get(op_id)
+            if not minutos:
+                return None
+            minuto = minuto_de(alvo)
+            primeiro = hora_de(alvo) - 3600
+            while minuto >= primeiro:
+                item = minutos.get(minuto)
+                if item and item[0] <= alvo:
+                    return item[1]
+                minuto -= 60
+        return None
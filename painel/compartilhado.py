@@ -0,0 +1,182 @@
+"""
+Snapshot compartilhado entre as réplicas do Streamlit no mesmo host.
+
+Todas as réplicas apontam para o mesmo diretório. Uma delas ganha o flock de
+poller.lock e vira a única a consultar o Supabase e a planilha: a cada
+intervalo_s grava a última linha de cada tabela, os totais do painel_totais
+(se houver buscar_totais) e os limites em
+compartilhado.json (arquivo temporário + os.replace). As outras só leem esse
+arquivo, e só o releem quando ele muda (um os.stat por leitura). Se o
+processo eleito morre, o kernel solta o lock e outra réplica assume na
+tentativa seguinte.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # sem flock (Windows): cada processo consulta por conta própria
+    fcntl = None
+
+from painel.telemetria import CACHE_TOTAL
+
+log = logging.getLogger(__name__)
+
+VERSAO = 1
+
+
+class SnapshotCompartilhado:
+    def __init__(self, diretorio: str, buscar_linha, buscar_limites, tabelas: list, intervalo_s: float = 30.0,
+                 buscar_totais=None):
+        """
+        buscar_linha(tabela) -> dict | None, buscar_limites() -> dict e buscar_totais()
+        -> list | None (None: função não instalada) só rodam no processo eleito;
+        tabelas: as do registro.
+        """
+        self.caminho = os.path.join(diretorio, "compartilhado.json")
+        self.caminho_lock = os.path.join(diretorio, "poller.lock")
+        self.buscar_linha = buscar_linha
+        self.buscar_limites = buscar_limites
+        self.buscar_totais = buscar_totais
+        self.tabelas = list(tabelas)
+        self.intervalo_s = intervalo_s
+        self.lider = False
+        self._fd_lock = None
+        self._assinatura = None  # (inode, mtime) do arquivo já lido
+        self._dados = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        os.makedirs(diretorio, exist_ok=True)
+
+    # ---------- eleição / poller ----------
+    def _tentar_liderar(self) -> bool:
+        if fcntl is None:
+            return True
+        fd = os.open(self.caminho_lock, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd_lock = fd  # aberto até o processo sair: é o que mantém o lock
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        return True
+
+    def ciclo(self):
+        """Uma rodada do poller: consulta tudo e troca o arquivo de uma vez."""
+        linhas = {}
+        for tabela in self.tabelas:
+            try:
+                linha = self.buscar_linha(tabela)
+            except Exception:
+                log.exception("poller: falha em %s", tabela)
+                continue
+            if linha is not None:
+                linhas[tabela] = linha
+        try:
+            limites = self.buscar_limites() or {}
+        except Exception:
+            log.exception("poller: falha nos limites")
+            limites = {}
+        totais = None
+        if self.buscar_totais:
+            try:
+                totais = {"linhas": self.buscar_totais(), "em": time.time()}
+            except Exception:
+                log.exception("poller: falha nos totais")
+        anterior = self._ler() or {}
+        dados = {
+            "versao": VERSAO,
+            "gerado_em": time.time(),
+            "pid": os.getpid(),
+            # tabela que falhou nesta rodada mantém a linha anterior (com a hora dela)
+            "linhas": {**anterior.get("linhas", {}), **{t: {"linha": l, "em": time.time()} for t, l in linhas.items()}},
+            "limites": limites or anterior.get("limites", {}),
+            "totais": totais or anterior.get("totais"),
+        }
+        tmp = f"{self.caminho}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, separators=(",", ":"), default=str)
+        os.replace(tmp, self.caminho)
+
+    def _loop(self):
+        while True:
+            t0 = time.time()
+            if not self.lider and self._tentar_liderar():
+                self.lider = True
+                log.info("processo %d eleito poller de %s", os.getpid(), self.caminho)
+            if self.lider:
+                try:
+                    self.ciclo()
+                except Exception:
+                    log.exception("poller: falha ao gravar %s", self.caminho)
+            time.sleep(max(0.0, self.intervalo_s - (time.time() - t0)))
+
+    def iniciar(self) -> threading.Thread:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="painel-compartilhado", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    # ---------- leitura (todas as réplicas) ----------
+    def _ler(self) -> dict | None:
+        try:
+            st = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None
+        assinatura = (st.st_ino, st.st_mtime_ns)
+        with self._lock:
+            if assinatura != self._assinatura:
+                try:
+                    with open(self.caminho, encoding="utf-8") as f:
+                        dados = json.load(f)
+                except (OSError, ValueError):
+                    return self._dados or None
+                if dados.get("versao") == VERSAO:
+                    self._dados, self._assinatura = dados, assinatura
+            return self._dados or None
+
+    def _fresco(self, dados: dict | None) -> bool:
+        # poller parado há mais de 3 ciclos: cada réplica volta a consultar sozinha
+        return bool(dados) and time.time() - dados["gerado_em"] < 3 * self.intervalo_s
+
+    def linha(self, tabela: str) -> dict | None:
+        """
+        Linha da tabela se o arquivo e a própria tabela estão em dia. Uma tabela que
+        falha seguidamente no poller fica com a linha antiga no arquivo: passado o
+        limite, volta None e quem chamou consulta sozinho (ou usa a cópia salva marcada).
+        """
+        dados = self._ler()
+        item = dados["linhas"].get(tabela) if self._fresco(dados) else None
+        if item and time.time() - item["em"] >= 3 * self.intervalo_s:
+            item = None
+        CACHE_TOTAL.inc("compartilhado", "hit" if item else "miss")
+        return item["linha"] if item else None
+
+    def totais(self) -> dict | None:
+        """
+        {"linhas": list | None} do painel_totais (linhas None: a função não está
+        instalada); None se o arquivo ou os totais estão velhos.
+        """
+        dados = self._ler()
+        item = dados.get("totais") if self._fresco(dados) else None
+        if not item or time.time() - item["em"] >= 3 * self.intervalo_s:
+            return None
+        return {"linhas": item["linhas"]}
+
+    def limites(self) -> dict | None:
+        dados = self._ler()
+        return (dados["limites"] or None) if self._fresco(dados) else None
+
+    def estado(self) -> dict:
+        dados = self._ler() or {}
+        return {
+            "lider": self.lider,
+            "pid_poller": dados.get("pid"),
+            "idade_s": time.time() - dados["gerado_em"] if dados else None,
+            "tabelas": len(dados.get("linhas", {})),
+        }
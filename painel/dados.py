@@ -0,0 +1,121 @@
+"""
+Leitura das linhas das tabelas operacao_* (Supabase) em métricas do painel.
+"""
+import contextlib
+import re
+import time
+
+from painel.gravacao import GRAVACAO, GravacaoAusente
+from painel.rastreio import fase
+
+# algumas tabelas antigas têm a coluna de criação grafada "creta_at"
+COLUNAS_CRIACAO = ("created_at", "creta_at")
+
+RPC_AUSENTE_S = 600  # painel_totais não instalada: só tenta de novo depois disso
+_totais_ausente_ate = 0.0
+
+
+def _to_float(v):
+    try:
+        return float(v) if v is not None else 0.0
+    except Exception:
+        return 0.0
+
+
+def _to_int(v):
+    try:
+        return int(v) if v is not None else 0
+    except Exception:
+        return 0
+
+
+def extrair_metricas(row: dict, sufixo: str) -> dict:
+    status_campanhas = row.get(f"st_campanhas_{sufixo}")
+    qtde_mailing = _to_int(row.get(f"qtde_mailing_{sufixo}"))
+    ticket_medio = row.get(f"ticket_medio_{sufixo}")
+    ticket_medio_f = _to_float(ticket_medio) if ticket_medio is not None else None
+
+    qtde_leads_raw = row.get(f"qtde_lead_{sufixo}")
+    if qtde_leads_raw is None:
+        qtde_leads_raw = row.get(f"qtde_leads_{sufixo}")
+    qtde_leads = _to_int(qtde_leads_raw)
+
+    qtde_chamadas = _to_int(row.get(f"qtde_chamadas_{sufixo}"))
+    ultimo_lead = row.get(f"ultimo_lead_{sufixo}")
+    valor_consumido = _to_float(row.get(f"valor_consumido_{sufixo}"))
+    created_at = row.get("created_at") or row.get("creta_at")
+
+    return {
+        "status": status_campanhas,
+        "qtde_mailing": qtde_mailing,
+        "ticket_medio": ticket_medio_f,
+        "qtde_leads": qtde_leads,
+        "qtde_chamadas": qtde_chamadas,
+        "ultimo_lead": ultimo_lead,
+        "valor_consumido": valor_consumido,
+        "created_at": created_at,
+    }
+
+
+def consultar_ultima_linha(cliente, tabela: str, medir=None) -> dict | None:
+    """
+    Linha mais recente da tabela (created_at, ou creta_at nas tabelas antigas).
+    medir(tabela) devolve um context manager em volta de cada ida ao banco.
+    """
+    medir = medir or (lambda _tabela: contextlib.nullcontext())
+    for coluna in COLUNAS_CRIACAO:
+        try:
+            with fase("supabase", f"{tabela} ({coluna})"), medir(tabela):
+                dados = GRAVACAO.chamar(
+                    "supabase",
+                    f"{tabela}?order={coluna}.desc&limit=1",
+                    lambda: cliente.table(tabela).select("*").order(coluna, desc=True).limit(1).execute().data,
+                )
+        except Exception:
+            continue
+        dados = dados or []
+        return dados[0] if len(dados) else None
+    return None
+
+
+def _funcao_ausente(erro: Exception) -> bool:
+    # PostgREST: 404 / PGRST202 quando a função não existe (também no texto de uma falha
+    # gravada); reproduzindo uma gravação sem a chamada, vale como não instalada
+    if isinstance(erro, GravacaoAusente):
+        return True
+    texto = f"{getattr(erro, 'code', '')} {erro} {erro!r}"
+    return "PGRST202" in texto or re.search(r"\b404\b", texto) is not None
+
+
+def totais_sql_ausente() -> bool:
+    """A última chamada achou painel_totais não instalada (por até RPC_AUSENTE_S)."""
+    return time.time() < _totais_ausente_ate
+
+
+def operacoes_totais_sql(registro: dict) -> tuple:
+    """Argumento do painel_totais: ((grupo, tabela, sufixo), ...) das operações que entram no total."""
+    return tuple((op["grupo"], op["tabela"], op["sufixo"]) for op in registro["operacoes"] if op["entra_no_total"])
+
+
+def consultar_totais_sql(cliente, operacoes, medir=None) -> list | None:
+    """
+    Somas por grupo feitas no Postgres numa única chamada (sql/painel_totais.sql).
+    operacoes: [(grupo, tabela, sufixo), ...]. None se a função não estiver
+    instalada, e aí sem nova ida ao banco por RPC_AUSENTE_S; outras falhas propagam.
+    """
+    global _totais_ausente_ate
+    if totais_sql_ausente():
+        return None
+    medir = medir or (lambda _tabela: contextlib.nullcontext())
+    corpo = {"operacoes": [{"grupo": g, "tabela": t, "sufixo": s} for g, t, s in operacoes]}
+    try:
+        with fase("supabase", "rpc painel_totais"), medir("rpc:painel_totais"):
+            dados = GRAVACAO.chamar(
+                "supabase", "rpc/painel_totais", lambda: cliente.rpc("painel_totais", corpo).execute().data
+            )
+    except Exception as e:
+        if not _funcao_ausente(e):
+            raise
+        _totais_ausente_ate = time.time() + RPC_AUSENTE_S
+        return None
+    return dados or []
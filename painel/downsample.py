@@ -0,0 +1,45 @@
+"""
+Redução de pontos para gráficos (Largest-Triangle-Three-Buckets).
+
+Mantém o primeiro e o último ponto e, em cada balde intermediário, o ponto
+que forma o maior triângulo com o escolhido no balde anterior e a média do
+próximo balde — preserva picos e vales com poucas centenas de pontos.
+"""
+import math
+
+
+def lttb(ts: list, valores: list, n_pontos: int) -> tuple:
+    """(ts, valores) reduzidos a no máximo n_pontos; NaN/None são descartados."""
+    pontos = [
+        (t, float(v)) for t, v in zip(ts, valores)
+        if v is not None and not (isinstance(v, float) and math.isnan(v))
+    ]
+    if n_pontos >= len(pontos) or n_pontos < 3:
+        return [p[0] for p in pontos], [p[1] for p in pontos]
+
+    saida = [pontos[0]]
+    tamanho = (len(pontos) - 2) / (n_pontos - 2)
+    a = 0
+
+    for i in range(n_pontos - 2):
+        # média do próximo balde (ponto C do triângulo)
+        prox_ini = int((i + 1) * tamanho) + 1
+        prox_fim = min(int((i + 2) * tamanho) + 1, len(pontos))
+        prox = pontos[prox_ini:prox_fim] or [pontos[-1]]
+        c_t = sum(p[0] for p in prox) / len(prox)
+        c_v = sum(p[1] for p in prox) / len(prox)
+
+        ini = int(i * tamanho) + 1
+        fim = int((i + 1) * tamanho) + 1
+        a_t, a_v = pontos[a]
+        melhor, melhor_area = ini, -1.0
+        for j in range(ini, fim):
+            t, v = pontos[j]
+            area = abs((a_t - c_t) * (v - a_v) - (a_t - t) * (c_v - a_v))
+            if area > melhor_area:
+                melhor, melhor_area = j, area
+        saida.append(pontos[melhor])
+        a = melhor
+
+    saida.append(pontos[-1])
+    return [p[0] for p in saida], [p[1] for p in saida]
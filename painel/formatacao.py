@@ -0,0 +1,72 @@
+"""
+Formatação (padrão brasileiro) e conversões usadas pelos cards e pelos limites.
+"""
+import math
+import unicodedata
+
+from painel.tempo import fmt_br
+
+
+def fmt_int(x):
+    try:
+        return f"{int(x):,}".replace(",", ".")
+    except Exception:
+        return "-"
+
+
+def fmt_float(x, casas=2):
+    try:
+        if x is None or (isinstance(x, float) and math.isnan(x)):
+            return "-"
+        return (
+            f"{float(x):,.{casas}f}"
+            .replace(",", "X")
+            .replace(".", ",")
+            .replace("X", ".")
+        )
+    except Exception:
+        return "-"
+
+
+def fmt_moeda_brl(x):
+    v = fmt_float(x, 2)
+    return f"R$ {v}" if v != "-" else "-"
+
+
+def fmt_datetime_br(dt_str):
+    if dt_str is None or dt_str == "":
+        return "-"
+    try:
+        # ✅ fromisoformat + memo (painel.tempo); pandas só para formatos fora do ISO
+        texto = fmt_br(dt_str)
+        return texto if texto is not None else "-"
+    except Exception:
+        return str(dt_str)
+
+
+def to_float_safe(v):
+    try:
+        if v is None:
+            return None
+        if isinstance(v, str):
+            vv = v.strip().replace("R$", "").replace(" ", "")
+            if vv == "":
+                return None
+            # 1.234,56 -> 1234.56
+            if "," in vv and "." in vv:
+                vv = vv.replace(".", "").replace(",", ".")
+            elif "," in vv:
+                vv = vv.replace(",", ".")
+            return float(vv)
+        return float(v)
+    except Exception:
+        return None
+
+
+def normalize_text(s: str) -> str:
+    if s is None:
+        return ""
+    s = str(s).strip().lower()
+    s = "".join(ch for ch in unicodedata.normalize("NFD", s) if unicodedata.category(ch) != "Mn")
+    s = " ".join(s.split())
+    return s
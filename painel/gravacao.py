@@ -0,0 +1,101 @@
+"""
+Gravação e reprodução das respostas cruas que o painel recebe: a última
+linha de cada tabela no Supabase (painel.dados.consultar_ultima_linha), o
+painel_totais (painel.dados.consultar_totais_sql), os lotes do coletor do
+histórico (painel.historico) e o texto do CSV da planilha
+(painel.limites.carregar_csv_google_sem_cache), com o tempo de cada chamada.
+
+    PAINEL_GRAVACAO=gravar       anexa cada resposta em PAINEL_GRAVACAO_ARQUIVO (JSON lines)
+    PAINEL_GRAVACAO=reproduzir   devolve as respostas do arquivo, sem rede: por chave, na
+                                 ordem em que foram gravadas, voltando ao início no fim
+    PAINEL_GRAVACAO_TEMPO=0      na reprodução, não espera o tempo gravado de cada chamada
+
+Falhas também são gravadas e voltam como GravacaoErro, para os caminhos de
+reserva (a segunda consulta quando a de created_at falha, a cópia salva, o
+download sem cabeçalhos) rodarem igual.
+"""
+import json
+import os
+import threading
+import time
+
+MODOS = ("", "gravar", "reproduzir")
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class GravacaoErro(Exception):
+    """Falha gravada (ou chave ausente na gravação) durante a reprodução."""
+
+
+class GravacaoAusente(GravacaoErro):
+    """Chave que a gravação não tem (chamada que não existia quando foi gravada)."""
+
+
+class Gravacao:
+    def __init__(self, modo: str = "", caminho: str = "", respeitar_tempo: bool = True):
+        if modo not in MODOS:
+            raise ValueError(f"PAINEL_GRAVACAO inválido: {modo!r} (use gravar ou reproduzir)")
+        self.modo = modo
+        self.caminho = caminho
+        self.respeitar_tempo = respeitar_tempo
+        self._lock = threading.Lock()
+        self._respostas = {}  # (fonte, chave) -> [registro, ...]
+        self._posicao = {}    # (fonte, chave) -> próximo índice
+        if modo == "reproduzir":
+            self._carregar()
+
+    def _carregar(self):
+        with open(self.caminho, encoding="utf-8") as f:
+            for linha in f:
+                if linha.strip():
+                    r = json.loads(linha)
+                    self._respostas.setdefault((r["fonte"], r["chave"]), []).append(r)
+
+    def chamar(self, fonte: str, chave: str, fn):
+        """fn() no modo normal; grava ou reproduz a resposta nos outros modos."""
+        if self.modo == "reproduzir":
+            return self._reproduzir(fonte, chave)
+        if self.modo != "gravar":
+            return fn()
+        t0 = time.perf_counter()
+        registro = {"fonte": fonte, "chave": chave, "em": time.time()}
+        try:
+            resposta = fn()
+        except Exception as e:
+            registro.update(ms=(time.perf_counter() - t0) * 1000, erro=repr(e))
+            self._anexar(registro)
+            raise
+        registro.update(ms=(time.perf_counter() - t0) * 1000, resposta=resposta)
+        self._anexar(registro)
+        return resposta
+
+    def _anexar(self, registro: dict):
+        texto = json.dumps(registro, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(texto + "\n")
+
+    def _reproduzir(self, fonte: str, chave: str):
+        with self._lock:
+            respostas = self._respostas.get((fonte, chave))
+            if not respostas:
+                raise GravacaoAusente(f"sem resposta gravada para {fonte} {chave}")
+            i = self._posicao.get((fonte, chave), 0)
+            self._posicao[(fonte, chave)] = (i + 1) % len(respostas)
+        registro = respostas[i]
+        if self.respeitar_tempo:
+            time.sleep(registro["ms"] / 1000)
+        if "erro" in registro:
+            raise GravacaoErro(registro["erro"])
+        return registro["resposta"]
+
+
+GRAVACAO = Gravacao(
+    os.getenv("PAINEL_GRAVACAO", ""),
+    os.getenv(
+        "PAINEL_GRAVACAO_ARQUIVO",
+        os.path.join(os.getenv("PAINEL_DADOS_DIR", os.path.join(_RAIZ, ".painel")), "gravacao.jsonl"),
+    ),
+    respeitar_tempo=os.getenv("PAINEL_GRAVACAO_TEMPO", "1") == "1",
+)
@@ -0,0 +1,286 @@
+"""
+Histórico local das operações (SQLite em disco).
+
+A cada ciclo do coletor só as linhas novas de cada tabela operacao_* são
+buscadas, a partir da marca d'água (último created_at já gravado). Na
+primeira vez, o histórico é preenchido só até HISTORICO_BACKFILL_S atrás,
+em lotes limitados por ciclo, para não baixar a tabela inteira de uma vez.
+Os gráficos consultam este arquivo, nunca o Supabase.
+
+Junto com cada append são mantidos agregados por minuto e por dia (último
+valor observado no período): o de minuto serve a comparação com o mesmo
+horário de ontem e o de dia o fechamento diário, sem varrer as linhas brutas.
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from painel.dados import COLUNAS_CRIACAO, extrair_metricas
+from painel.gravacao import GRAVACAO
+from painel.telemetria import SUPABASE_SEGUNDOS
+from painel.tempo import TZ_SP, para_epoch
+
+HISTORICO_BACKFILL_S = int(os.getenv("PAINEL_HISTORICO_BACKFILL_S", str(7 * 24 * 3600)))
+LOTE_LINHAS = 1000
+MAX_LOTES_POR_CICLO = 5
+
+CAMPOS_SERIE = ("valor_consumido", "qtde_leads", "qtde_chamadas", "qtde_mailing", "ticket_medio")
+CAMPOS_AGREGADOS = ("valor_consumido", "qtde_leads", "qtde_chamadas")
+_CAMPOS_METRICAS = (
+    "created_at", "status", "qtde_mailing", "ticket_medio", "qtde_leads", "qtde_chamadas", "ultimo_lead", "valor_consumido",
+)
+
+_SCHEMA = """
+create table if not exists historico (
+    operacao text not null,
+    ts real not null,
+    created_at text,
+    status text,
+    qtde_mailing integer,
+    ticket_medio real,
+    qtde_leads integer,
+    qtde_chamadas integer,
+    ultimo_lead text,
+    valor_consumido real,
+    primary key (operacao, ts)
+) without rowid;
+
+-- substituído por agregados_minuto (reconstruído das linhas brutas na abertura)
+drop table if exists agregados_hora;
+
+create table if not exists agregados_minuto (
+    operacao text not null,
+    minuto real not null,
+    ultimo_ts real not null,
+    valor_consumido real,
+    qtde_leads integer,
+    qtde_chamadas integer,
+    primary key (operacao, minuto)
+) without rowid;
+
+create table if not exists agregados_dia (
+    operacao text not null,
+    dia text not null,
+    ultimo_ts real not null,
+    valor_consumido real,
+    qtde_leads integer,
+    qtde_chamadas integer,
+    primary key (operacao, dia)
+) without rowid;
+
+create table if not exists marcas (
+    tabela text primary key,
+    coluna text not null,
+    valor text not null
+) without rowid;
+"""
+
+
+class HistoricoStore:
+    def __init__(self, caminho: str):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute("pragma synchronous=normal")
+        self._conn.executescript(_SCHEMA)
+        self._reconstruir_agregados_se_vazio()
+
+    def _reconstruir_agregados_se_vazio(self):
+        """Histórico gravado antes dos agregados existirem: recalcula uma vez."""
+        with self._lock, self._conn:
+            if self._conn.execute("select 1 from agregados_minuto limit 1").fetchone():
+                return
+            rows = self._conn.execute(
+                "select operacao, ts, valor_consumido, qtde_leads, qtde_chamadas from historico order by operacao, ts"
+            ).fetchall()
+            self._upsert_agregados(rows)
+
+    def _upsert_agregados(self, rows: list):
+        """rows: (operacao, ts, valor_consumido, qtde_leads, qtde_chamadas); o ponto mais recente vence."""
+        colunas = ", ".join(CAMPOS_AGREGADOS)
+        atualiza = ", ".join(f"{c} = excluded.{c}" for c in ("ultimo_ts",) + CAMPOS_AGREGADOS)
+        self._conn.executemany(
+            f"insert into agregados_minuto (operacao, minuto, ultimo_ts, {colunas}) values (?, ?, ?, ?, ?, ?) "
+            f"on conflict (operacao, minuto) do update set {atualiza} where excluded.ultimo_ts >= agregados_minuto.ultimo_ts",
+            [(op, minuto_de(ts), ts, *vals) for op, ts, *vals in rows],
+        )
+        self._conn.executemany(
+            f"insert into agregados_dia (operacao, dia, ultimo_ts, {colunas}) values (?, ?, ?, ?, ?, ?) "
+            f"on conflict (operacao, dia) do update set {atualiza} where excluded.ultimo_ts >= agregados_dia.ultimo_ts",
+            [(op, dia_de(ts), ts, *vals) for op, ts, *vals in rows],
+        )
+
+    def marca(self, tabela: str) -> tuple | None:
+        """(coluna, valor) do último created_at gravado para a tabela."""
+        with self._lock:
+            row = self._conn.execute("select coluna, valor from marcas where tabela = ?", (tabela,)).fetchone()
+        return tuple(row) if row else None
+
+    def anexar(self, operacao: str, tabela: str, metricas: list, coluna: str, marca: str) -> list:
+        """
+        Grava as linhas novas e avança a marca d'água na mesma transação. Linhas
+        já gravadas (mesma chave operacao + ts) são ignoradas; devolve só as novas.
+        """
+        por_ts = {}
+        for m in metricas:
+            ts = para_epoch(m["created_at"])
+            if ts is not None:
+                por_ts.setdefault(ts, m)
+        with self._lock, self._conn:
+            if por_ts:
+                existentes = {r[0] for r in self._conn.execute(
+                    "select ts from historico where operacao = ? and ts between ? and ?",
+                    (operacao, min(por_ts), max(por_ts)),
+                )}
+                for ts in existentes:
+                    por_ts.pop(ts, None)
+            linhas = [
+                (operacao, ts, m["created_at"], m["status"], m["qtde_mailing"], m["ticket_medio"],
+                 m["qtde_leads"], m["qtde_chamadas"], m["ultimo_lead"], m["valor_consumido"])
+                for ts, m in por_ts.items()
+            ]
+            self._conn.executemany("insert into historico values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", linhas)
+            self._upsert_agregados([(l[0], l[1], l[9], l[6], l[7]) for l in linhas])
+            self._conn.execute(
+                "insert or replace into marcas (tabela, coluna, valor) values (?, ?, ?)", (tabela, coluna, marca)
+            )
+        return list(por_ts.values())
+
+    def serie(
+        self,
+        operacao: str,
+        desde_ts: float | None = None,
+        ate_ts: float | None = None,
+        campos: tuple = CAMPOS_SERIE,
+    ) -> dict:
+        """Série em colunas: {"ts": [...], campo: [...]} ordenada por tempo."""
+        for c in campos:
+            if c not in CAMPOS_SERIE:
+                raise ValueError(f"campo de série desconhecido: {c}")
+        sql = f"select ts, {', '.join(campos)} from historico where operacao = ? and ts >= ? and ts <= ? order by ts"
+        with self._lock:
+            rows = self._conn.execute(
+                sql, (operacao, desde_ts if desde_ts is not None else 0.0, ate_ts if ate_ts is not None else 1e12)
+            ).fetchall()
+        colunas = ("ts",) + tuple(campos)
+        return {c: [r[i] for r in rows] for i, c in enumerate(colunas)}
+
+    def agregados_minuto(self, desde_ts: float) -> list:
+        """[(operacao, minuto, ultimo_ts, {campo: último valor})] a partir de desde_ts."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"select operacao, minuto, ultimo_ts, {', '.join(CAMPOS_AGREGADOS)} from agregados_minuto where minuto >= ?",
+                (desde_ts,),
+            ).fetchall()
+        return [(r[0], r[1], r[2], dict(zip(CAMPOS_AGREGADOS, r[3:]))) for r in rows]
+
+    def agregados_dia(self, operacao: str, n_dias: int = 7) -> list:
+        """Fechamento (último valor) dos n_dias mais recentes: [(dia, {campo: valor})]."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"select dia, {', '.join(CAMPOS_AGREGADOS)} from agregados_dia where operacao = ? order by dia desc limit ?",
+                (operacao, n_dias),
+            ).fetchall()
+        return [(r[0], dict(zip(CAMPOS_AGREGADOS, r[1:]))) for r in rows]
+
+    def ultimas(self) -> dict:
+        """{operacao: métricas da linha mais recente}, no mesmo formato de extrair_metricas."""
+        with self._lock:
+            rows = self._conn.execute(
+                "select h.operacao, h.created_at, h.status, h.qtde_mailing, h.ticket_medio, h.qtde_leads, "
+                "h.qtde_chamadas, h.ultimo_lead, h.valor_consumido from historico h "
+                "join (select operacao, max(ts) ts from historico group by operacao) u "
+                "on u.operacao = h.operacao and u.ts = h.ts"
+            ).fetchall()
+        return {r[0]: dict(zip(_CAMPOS_METRICAS, r[1:])) for r in rows}
+
+    def posteriores(self, operacao: str, desde_ts: float, limite: int = LOTE_LINHAS * MAX_LOTES_POR_CICLO) -> list:
+        """[(ts, métricas)] gravadas depois de desde_ts, em ordem (réplica que só lê o arquivo)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "select ts, created_at, status, qtde_mailing, ticket_medio, qtde_leads, qtde_chamadas, ultimo_lead, "
+                "valor_consumido from historico where operacao = ? and ts > ? order by ts limit ?",
+                (operacao, desde_ts, limite),
+            ).fetchall()
+        return [(r[0], dict(zip(_CAMPOS_METRICAS, r[1:]))) for r in rows]
+
+    def ultimos_ts(self) -> dict:
+        """{operacao: ts da linha mais recente}."""
+        with self._lock:
+            rows = self._conn.execute("select operacao, max(ts) from historico group by operacao").fetchall()
+        return dict(rows)
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+
+def caminho_historico(dados_dir: str) -> str:
+    """
+    Arquivo do histórico: em dados_dir ou, com o snapshot compartilhado ligado
+    (PAINEL_COMPARTILHADO=1), em PAINEL_COMPARTILHADO_DIR, onde a réplica eleita
+    grava para todas. Usado pelo app.py e pela página de histórico.
+    """
+    if os.getenv("PAINEL_COMPARTILHADO", "0") == "1":
+        dados_dir = os.getenv("PAINEL_COMPARTILHADO_DIR", dados_dir)
+    return os.path.join(dados_dir, "historico.sqlite3")
+
+
+def minuto_de(ts: float) -> float:
+    return float(int(ts) // 60 * 60)
+
+
+def hora_de(ts: float) -> float:
+    """Início da hora (epoch). O fuso de São Paulo tem offset inteiro, então coincide com a hora local."""
+    return float(int(ts) // 3600 * 3600)
+
+
+def dia_de(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=TZ_SP).strftime("%Y-%m-%d")
+
+
+def _puxar(cliente, store: HistoricoStore, op: dict, coluna: str, marca: str | None) -> list:
+    # gte, não gt: nada do mesmo instante da marca fica de fora da consulta; o que
+    # já está no histórico (a própria linha da marca) o anexar descarta pela chave.
+    # A chave da gravação não leva a marca: reproduzindo, os lotes voltam na ordem gravada
+    chave = f"{op['tabela']}?order={coluna}&{coluna}=gte&limit={LOTE_LINHAS}"
+    novas = []
+    for _ in range(MAX_LOTES_POR_CICLO):
+        query = cliente.table(op["tabela"]).select("*").order(coluna).limit(LOTE_LINHAS)
+        if marca:
+            query = query.gte(coluna, marca)
+        else:
+            desde = datetime.fromtimestamp(time.time() - HISTORICO_BACKFILL_S, tz=timezone.utc)
+            query = query.gte(coluna, desde.isoformat())
+        t0 = time.perf_counter()
+        dados = GRAVACAO.chamar("supabase", chave, lambda q=query: q.execute().data) or []
+        SUPABASE_SEGUNDOS.observar(time.perf_counter() - t0, op["tabela"], "coletor")
+        if not dados:
+            break
+        nova_marca = dados[-1].get(coluna)
+        if marca and (para_epoch(nova_marca) or 0) < (para_epoch(marca) or 0):
+            break  # lote anterior à marca (reprodução voltando ao início): a marca não recua
+        metricas = [extrair_metricas(r, op["sufixo"]) for r in dados]
+        novas.extend(store.anexar(op["id"], op["tabela"], metricas, coluna, nova_marca))
+        if len(dados) < LOTE_LINHAS or nova_marca == marca:
+            break  # lote inteiro no instante da marca: repetir traria as mesmas linhas
+        marca = nova_marca
+    return novas
+
+
+def sincronizar_operacao(cliente, store: HistoricoStore, op: dict) -> list:
+    """
+    Busca só as linhas posteriores à marca d'água da tabela e grava no histórico.
+    Devolve as métricas novas em ordem cronológica.
+    """
+    marca = store.marca(op["tabela"])
+    colunas = (marca[0],) if marca else COLUNAS_CRIACAO
+    for coluna in colunas:
+        try:
+            return _puxar(cliente, store, op, coluna, marca[1] if marca else None)
+        except Exception:
+            continue
+    return []
@@ -0,0 +1,293 @@
+"""
+Limites por operação vindos da planilha pública do Google Sheets.
+"""
+import csv
+import os
+import threading
+import time
+import urllib.request
+from io import StringIO
+from urllib.parse import urlparse
+
+from painel.formatacao import normalize_text, to_float_safe
+from painel.gravacao import GRAVACAO
+from painel.rastreio import fase
+from painel.telemetria import CACHE_TOTAL, LIMITES_SEGUNDOS, LIMITES_TOTAL
+
+# planilha pública com os limites (dinâmicos); o app.py e o lançador usam a mesma
+PLANILHA_LIMITES_URL = "https://docs.google.com/spreadsheets/d/1MrG40xIke5idxF-lIu-koeyL2oNyjTXMEtcqK3E2qps/edit?usp=sharing"
+
+# trocável para apontar para um servidor local (bench/)
+SHEETS_BASE_URL = os.getenv("PAINEL_SHEETS_BASE_URL", "https://docs.google.com").rstrip("/")
+
+
+def extrair_sheet_id(url: str) -> str | None:
+    try:
+        parts = urlparse(url).path.split("/")
+        if "d" in parts:
+            idx = parts.index("d")
+            return parts[idx + 1]
+        return None
+    except Exception:
+        return None
+
+
+def build_gsheet_csv_url(sheet_url: str, gid: str = "0", force_ts: bool = True) -> str | None:
+    sheet_id = extrair_sheet_id(sheet_url)
+    if not sheet_id:
+        return None
+    url = f"{SHEETS_BASE_URL}/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+    if force_ts:
+        url += f"&_ts={int(time.time())}"
+    return url
+
+
+def _baixar_texto(url: str, headers: dict | None = None, timeout: float = 15) -> str:
+    def baixar():
+        req = urllib.request.Request(url, headers=headers or {})
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            charset = resp.headers.get_content_charset() or "utf-8"
+            return resp.read().decode(charset, errors="replace")
+
+    # chave sem o host (SHEETS_BASE_URL muda entre ambientes) e sem o _ts anti-cache,
+    # que é sempre o último parâmetro (ver build_gsheet_csv_url)
+    partes = urlparse(url)
+    return GRAVACAO.chamar("sheets", f"{partes.path}?{partes.query}".split("&_ts=")[0], baixar)
+
+
+def carregar_csv_google_sem_cache(csv_url: str) -> list:
+    """Linhas da planilha como dicts {cabeçalho: texto} (csv da stdlib, sem pandas)."""
+    headers = {
+        "Cache-Control": "no-cache, no-store, max-age=0",
+        "Pragma": "no-cache",
+        "Expires": "0",
+        "User-Agent": "Mozilla/5.0"
+    }
+    with fase("limites.download"):
+        text = _baixar_texto(csv_url, headers)
+    if text.startswith("\ufeff"):
+        text = text.lstrip("\ufeff")
+    with fase("limites.csv"):
+        return list(csv.DictReader(StringIO(text)))
+
+
+def carregar_limites_google(sheet_url: str, gid: str) -> dict:
+    """
+    SEM CACHE (proposital): sempre busca os limites atuais da planilha.
+    """
+    csv_url = build_gsheet_csv_url(sheet_url, gid=gid, force_ts=True)
+    if not csv_url:
+        return {}
+
+    t0 = time.perf_counter()
+    try:
+        linhas = carregar_csv_google_sem_cache(csv_url)
+    except Exception:
+        try:
+            with fase("limites.download", "fallback sem cabeçalhos"):
+                text = _baixar_texto(csv_url).lstrip("\ufeff")
+            linhas = list(csv.DictReader(StringIO(text)))
+        except Exception:
+            LIMITES_SEGUNDOS.observar(time.perf_counter() - t0)
+            LIMITES_TOTAL.inc("erro")
+            return {}
+    LIMITES_SEGUNDOS.observar(time.perf_counter() - t0)
+
+    with fase("limites.parse"):
+        limites = limites_das_linhas(linhas)
+    LIMITES_TOTAL.inc("ok" if limites else "vazio")
+    return limites
+
+
+def limites_das_linhas(linhas: list) -> dict:
+    if not linhas:
+        return {}
+
+    # normaliza colunas
+    colunas = {normalize_text(c): c for c in linhas[0] if c is not None}
+
+    col_servidor = None
+    col_valor = None
+    col_ticket = None
+
+    for c in colunas:
+        # aceita variações de nome
+        if col_servidor is None and ("servidor" in c or "operacao" in c or "nome" in c):
+            col_servidor = c
+
+        if col_valor is None and (
+            ("valor" in c and "consum" in c) or
+            c in ["valor consumido", "limite valor", "valor"]
+        ):
+            col_valor = c
+
+        if col_ticket is None and (
+            "ticket" in c or c in ["ticket medio", "limite ticket", "ticket"]
+        ):
+            col_ticket = c
+
+    if not col_servidor:
+        return {}
+
+    limites = {}
+    for row in linhas:
+        nome_original = row.get(colunas[col_servidor]) or ""
+        nome = str(nome_original).strip()
+        if not nome or nome.lower() == "nan":
+            continue
+
+        lim_valor = to_float_safe(row.get(colunas[col_valor])) if col_valor else None
+        lim_ticket = to_float_safe(row.get(colunas[col_ticket])) if col_ticket else None
+
+        limites[nome] = {
+            "valor_consumido": lim_valor,
+            "ticket": lim_ticket
+        }
+
+    return limites
+
+
+def simplificar_nome(s: str) -> str:
+    return (
+        normalize_text(s)
+        .replace("operacao ", "")
+        .replace("(vivo)", "")
+        .replace(" vivo", "")
+        .strip()
+    )
+
+
+def get_limites_operacao(limites_dict: dict, titulo_operacao: str, aliases: dict | None = None) -> dict:
+    """
+    Busca limites com:
+    1) match exato
+    2) match normalizado
+    3) aliases por operação (PBX/Vivo)
+    4) contenção flexível
+    """
+    if titulo_operacao in limites_dict:
+        return limites_dict[titulo_operacao]
+
+    alvo = normalize_text(titulo_operacao)
+
+    # 1) match normalizado exato
+    for k, v in limites_dict.items():
+        if normalize_text(k) == alvo:
+            return v
+
+    # 2) aliases conhecidos (vindos do registro de operações, ver montar_aliases_limites)
+    if aliases is None:
+        aliases = {}
+
+    candidates = aliases.get(alvo, [alvo])
+
+    # índice normalizado da planilha
+    norm_map = {normalize_text(k): v for k, v in limites_dict.items()}
+
+    for cand in candidates:
+        if cand in norm_map:
+            return norm_map[cand]
+
+    # 3) simplificação
+    alvo_s = simplificar_nome(alvo)
+
+    for k, v in limites_dict.items():
+        nk_s = simplificar_nome(k)
+        if nk_s == alvo_s:
+            return v
+
+    # 4) contenção flexível
+    for k, v in limites_dict.items():
+        nk = normalize_text(k)
+        if any(c and (c in nk or nk in c) for c in candidates):
+            return v
+
+    return {}
+
+
+def montar_aliases_limites(registro: dict) -> dict:
+    aliases = {}
+    for item in registro["grupos"] + registro["operacoes"]:
+        alvo = normalize_text(item["titulo"])
+        aliases[alvo] = [normalize_text(a) for a in item["aliases"]] + [alvo]
+    return aliases
+
+
+class ResolvedorLimites:
+    """
+    Índice da planilha para resolver limites por título com a mesma prioridade de
+    get_limites_operacao, mas normalizando cada chave uma única vez e memorizando
+    a resposta por título.
+    """
+
+    def __init__(self, limites_dict: dict, aliases: dict | None = None):
+        self.limites = limites_dict
+        self.aliases = aliases or {}
+        self._normalizadas = []   # (chave normalizada, valor) na ordem da planilha
+        self._primeiro_norm = {}  # passo 1: primeiro match normalizado
+        self._ultimo_norm = {}    # passo 2: igual ao norm_map (último vence)
+        self._primeiro_simpl = {}
+        for k, v in limites_dict.items():
+            nk = normalize_text(k)
+            self._normalizadas.append((nk, v))
+            self._primeiro_norm.setdefault(nk, v)
+            self._ultimo_norm[nk] = v
+            self._primeiro_simpl.setdefault(simplificar_nome(k), v)
+        self._memo = {}
+
+    def _resolver(self, titulo: str) -> dict:
+        if titulo in self.limites:
+            return self.limites[titulo]
+        alvo = normalize_text(titulo)
+        if alvo in self._primeiro_norm:
+            return self._primeiro_norm[alvo]
+        candidates = self.aliases.get(alvo, [alvo])
+        for cand in candidates:
+            if cand in self._ultimo_norm:
+                return self._ultimo_norm[cand]
+        alvo_s = simplificar_nome(alvo)
+        if alvo_s in self._primeiro_simpl:
+            return self._primeiro_simpl[alvo_s]
+        for nk, v in self._normalizadas:
+            if any(c and (c in nk or nk in c) for c in candidates):
+                return v
+        return {}
+
+    def resolver(self, titulo: str) -> dict:
+        try:
+            return self._memo[titulo]
+        except KeyError:
+            v = self._memo[titulo] = self._resolver(titulo)
+            return v
+
+
+class FonteLimites:
+    """
+    Limites recarregados da planilha no máximo a cada intervalo_s (usado fora da UI,
+    pelo coletor). Se a leitura falhar, mantém o último resolvedor válido.
+    carregar() -> dict substitui o download da planilha (ex.: limites já trazidos
+    pelo poller compartilhado).
+    """
+
+    def __init__(self, sheet_url: str, gid: str, aliases: dict, intervalo_s: float = 60.0, carregar=None):
+        self.sheet_url = sheet_url
+        self.carregar = carregar or (lambda: carregar_limites_google(self.sheet_url, self.gid))
+        self.gid = gid
+        self.aliases = aliases
+        self.intervalo_s = intervalo_s
+        self.resolvedor = ResolvedorLimites({}, aliases)
+        self.atualizado_em = None
+        self._lock = threading.Lock()
+
+    def atualizar(self, forcar: bool = False) -> ResolvedorLimites:
+        with self._lock:
+            agora = time.time()
+            if forcar or self.atualizado_em is None or agora - self.atualizado_em >= self.intervalo_s:
+                CACHE_TOTAL.inc("limites", "miss")
+                limites = self.carregar()
+                if limites or self.atualizado_em is None:
+                    self.resolvedor = ResolvedorLimites(limites, self.aliases)
+                self.atualizado_em = agora
+            else:
+                CACHE_TOTAL.inc("limites", "hit")
+            return self.resolvedor
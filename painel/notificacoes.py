@@ -0,0 +1,203 @@
+"""
+Notificações das transições de alerta (ok -> alerta -> ok).
+
+O Notificador é ouvinte do MotorAlertas e decide o que vale notificar:
+- dedup: só notifica se o estado mudou em relação à última notificação
+  enviada para o mesmo (alvo, regra);
+- limite de frequência: no mínimo intervalo_min_s entre notificações do
+  mesmo (alvo, regra) e no máximo max_por_minuto no total. A transição
+  barrada fica pendente (só a mais recente de cada (alvo, regra)) e sai
+  em liberar(), chamado a cada ciclo, quando a janela abrir — senão uma
+  volta ao normal logo depois do alerta nunca seria avisada.
+A histerese fica no próprio motor (MotorAlertas(histerese=...)).
+
+Cada destino tem fila limitada e thread própria: enfileirar nunca bloqueia
+o ciclo do coletor; com a fila cheia, o evento é descartado e contado.
+DestinoMemoria é síncrono e serve de stub em testes.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+
+from painel.formatacao import fmt_moeda_brl
+
+log = logging.getLogger(__name__)
+
+ROTULOS_REGRA = {"valor": "Valor consumido", "ticket": "Ticket médio"}
+
+
+def texto_evento(evento: dict) -> str:
+    rotulo = ROTULOS_REGRA.get(evento["regra"], evento["regra"])
+    valor = fmt_moeda_brl(evento["valor"]) if evento["valor"] is not None else "-"
+    limite = fmt_moeda_brl(evento["limite"]) if evento["limite"] is not None else "-"
+    if evento["para"] == "alerta":
+        return f"🔴 {evento['titulo']}: {rotulo} {valor} acima do limite {limite}"
+    return f"🟢 {evento['titulo']}: {rotulo} voltou ao normal ({valor}, limite {limite})"
+
+
+class Destino:
+    """Base dos destinos assíncronos: subclasses implementam _entregar(evento)."""
+
+    nome = "destino"
+
+    def __init__(self, tamanho_fila: int = 100):
+        self.descartados = 0
+        self.falhas = 0
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._thread = threading.Thread(target=self._loop, name=f"painel-notif-{self.nome}", daemon=True)
+        self._thread.start()
+
+    def enviar(self, evento: dict):
+        try:
+            self._fila.put_nowait(evento)
+        except queue.Full:
+            self.descartados += 1
+
+    def _loop(self):
+        while True:
+            evento = self._fila.get()
+            try:
+                self._entregar(evento)
+            except Exception:
+                self.falhas += 1
+                log.exception("falha ao notificar via %s", self.nome)
+            finally:
+                self._fila.task_done()
+
+    def _entregar(self, evento: dict):
+        raise NotImplementedError
+
+    def aguardar(self):
+        """Bloqueia até a fila esvaziar (útil em scripts e testes)."""
+        self._fila.join()
+
+
+class DestinoLog(Destino):
+    nome = "log"
+
+    def _entregar(self, evento: dict):
+        nivel = logging.WARNING if evento["para"] == "alerta" else logging.INFO
+        log.log(nivel, "%s", evento["texto"])
+
+
+class DestinoArquivo(Destino):
+    """Uma linha JSON por evento (append)."""
+
+    nome = "arquivo"
+
+    def __init__(self, caminho: str, tamanho_fila: int = 100):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self.caminho = caminho
+        super().__init__(tamanho_fila)
+
+    def _entregar(self, evento: dict):
+        with open(self.caminho, "a", encoding="utf-8") as f:
+            f.write(json.dumps(evento, ensure_ascii=False) + "\n")
+
+
+class DestinoWebhook(Destino):
+    """POST JSON {"text": ..., "evento": {...}} (formato aceito por Slack/Teams/Google Chat)."""
+
+    nome = "webhook"
+
+    def __init__(self, url: str, timeout_s: float = 10.0, tamanho_fila: int = 100):
+        self.url = url
+        self.timeout_s = timeout_s
+        super().__init__(tamanho_fila)
+
+    def _entregar(self, evento: dict):
+        corpo = json.dumps({"text": evento["texto"], "evento": evento}, ensure_ascii=False).encode("utf-8")
+        req = urllib.request.Request(self.url, data=corpo, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout_s) as resp:
+            resp.read()
+
+
+class DestinoMemoria:
+    """Stub síncrono: guarda os eventos numa lista."""
+
+    nome = "memoria"
+
+    def __init__(self):
+        self.eventos = []
+        self.descartados = 0
+        self.falhas = 0
+
+    def enviar(self, evento: dict):
+        self.eventos.append(evento)
+
+    def aguardar(self):
+        pass
+
+
+class Notificador:
+    def __init__(self, destinos: list, intervalo_min_s: float = 600.0, max_por_minuto: int = 20):
+        self.destinos = destinos
+        self.intervalo_min_s = intervalo_min_s
+        self.max_por_minuto = max_por_minuto
+        self.suprimidos = 0
+        self._lock = threading.Lock()
+        self._notificado = {}  # (tipo, alvo, regra) -> (estado, ts) da última notificação enviada
+        self._pendentes = {}  # (tipo, alvo, regra) -> última transição barrada pela frequência
+        self._envios = deque()  # ts dos envios no último minuto
+
+    def _permitir(self, evento: dict, agora: float) -> bool:
+        chave = (evento["tipo"], evento["alvo"], evento["regra"])
+        self._pendentes.pop(chave, None)  # a transição mais nova substitui a pendente
+        ultimo = self._notificado.get(chave)
+        if ultimo is None and evento["para"] == "ok":
+            return False  # nunca avisou o alerta, não há o que normalizar
+        if ultimo is not None:
+            estado, ts = ultimo
+            if estado == evento["para"]:
+                return False
+            if agora - ts < self.intervalo_min_s:
+                self._pendentes[chave] = evento
+                return False
+        while self._envios and self._envios[0] <= agora - 60:
+            self._envios.popleft()
+        if len(self._envios) >= self.max_por_minuto:
+            self._pendentes[chave] = evento
+            return False
+        self._notificado[chave] = (evento["para"], agora)
+        self._envios.append(agora)
+        return True
+
+    def _entregar(self, permitidos: list):
+        for evento in permitidos:
+            for destino in self.destinos:
+                destino.enviar(evento)
+
+    def ouvinte(self, transicoes: list):
+        with self._lock:
+            permitidos = []
+            for t in transicoes:
+                if self._permitir(t, t["ts"]):
+                    permitidos.append({**t, "texto": texto_evento(t)})
+                else:
+                    self.suprimidos += 1
+        self._entregar(permitidos)
+
+    def liberar(self, agora: float | None = None) -> int:
+        """Envia as transições pendentes cuja janela já abriu; devolve quantas saíram."""
+        agora = agora or time.time()
+        with self._lock:
+            permitidos = [
+                {**t, "texto": texto_evento(t)}
+                for t in list(self._pendentes.values())
+                if self._permitir(t, agora)
+            ]
+        self._entregar(permitidos)
+        return len(permitidos)
+
+    def pos_ciclo(self, ultimas: dict):
+        """Gancho pós-ciclo do coletor (Coletor.adicionar_pos_ciclo)."""
+        self.liberar()
+
+    def pendentes(self) -> list:
+        with self._lock:
+            return list(self._pendentes.values())
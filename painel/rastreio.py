@@ -0,0 +1,66 @@
+"""
+Tempos por fase de cada rerun (limites, Supabase, métricas, totais, render).
+
+O app abre um Rastreio no início do rerun (iniciar_rastreio) e os módulos
+marcam trechos com `with fase("nome", detalhe=...)`. O rastreio corrente
+fica num ContextVar da thread do script, então código chamado fora de um
+rerun (ex.: o coletor) não registra nada e o custo é só o de um lookup.
+Tarefas do rerun que rodam em outras threads levam o rastreio junto com
+contextvars.copy_context(); o aninhamento é contado por thread.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+_atual = contextvars.ContextVar("painel_rastreio", default=None)
+
+
+class Rastreio:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fases = []  # {"fase", "detalhe", "nivel", "inicio_ms", "ms"} na ordem em que começaram
+        self._niveis = {}  # thread -> profundidade atual
+
+    @contextmanager
+    def fase(self, nome: str, detalhe: str = ""):
+        thread = threading.get_ident()
+        nivel = self._niveis.get(thread, 0)
+        registro = {"fase": nome, "detalhe": detalhe, "nivel": nivel, "inicio_ms": 0.0, "ms": None}
+        self.fases.append(registro)
+        self._niveis[thread] = nivel + 1
+        t0 = time.perf_counter()
+        registro["inicio_ms"] = (t0 - self.inicio) * 1000
+        try:
+            yield registro
+        finally:
+            registro["ms"] = (time.perf_counter() - t0) * 1000
+            self._niveis[thread] = nivel
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.inicio) * 1000
+
+    def resumo(self) -> list:
+        """Soma por fase: [{"fase", "chamadas", "ms"}] do mais lento para o mais rápido."""
+        por_fase = {}
+        for f in self.fases:
+            item = por_fase.setdefault(f["fase"], {"fase": f["fase"], "chamadas": 0, "ms": 0.0})
+            item["chamadas"] += 1
+            item["ms"] += f["ms"] or 0.0
+        return sorted(por_fase.values(), key=lambda i: i["ms"], reverse=True)
+
+
+def iniciar_rastreio() -> Rastreio:
+    rastreio = Rastreio()
+    _atual.set(rastreio)
+    return rastreio
+
+
+@contextmanager
+def fase(nome: str, detalhe: str = ""):
+    rastreio = _atual.get()
+    if rastreio is None:
+        yield None
+        return
+    with rastreio.fase(nome, detalhe) as registro:
+        yield registro
@@ -0,0 +1,152 @@
+"""
+Registro declarativo das operações do painel.
+
+O arquivo de configuração (operacoes.json) descreve os grupos (um quadrante
+por grupo raiz, com o card de total) e as operações (tabela Supabase, sufixo
+das colunas, grupo e estilo do card). Busca, agregação e renderização iteram
+sobre este registro em vez de chamadas fixas no app.
+
+Grupos podem ter "pai" (ex.: Vivo -> região -> campanha). "entra_no_total":
+false numa operação ou num subgrupo deixa o item fora do total do pai.
+"ticket_medio" (na raiz da configuração ou por grupo) escolhe como o ticket
+dos totais é agregado: "ponderado" (padrão), "valor_por_lead" ou "media".
+"anomalias" (opcional, na raiz) substitui as regras padrão de
+painel/anomalias.py.
+"""
+import json
+import os
+
+from painel.rollup import MODO_TICKET_PADRAO, MODOS_TICKET
+
+CAMPOS_GRUPO = ("id", "titulo", "subtitulo", "bg_color")
+CAMPOS_OPERACAO = ("grupo", "titulo", "subtitulo", "tabela", "sufixo", "bg_color")
+
+CAMPOS_REGRA_ANOMALIA = ("id", "campo", "modo", "direcao", "rotulo")
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "operacoes.json")
+
+
+def _exigir(item: dict, campos: tuple, contexto: str):
+    faltando = [c for c in campos if not item.get(c)]
+    if faltando:
+        raise ValueError(f"{contexto}: campos obrigatórios ausentes: {', '.join(faltando)}")
+
+
+def montar_registro(config: dict) -> dict:
+    """
+    Valida a configuração e devolve o registro normalizado:
+    {"grupos": [...], "operacoes": [...], "grupos_por_id": {...}, "operacoes_por_id": {...}}
+    """
+    modo_ticket = config.get("ticket_medio", MODO_TICKET_PADRAO)
+
+    grupos = []
+    grupos_por_id = {}
+    for i, g in enumerate(config.get("grupos") or []):
+        _exigir(g, CAMPOS_GRUPO, f"grupo #{i}")
+        if g["id"] in grupos_por_id:
+            raise ValueError(f"grupo duplicado: {g['id']}")
+        grupo = {
+            "pai": None,
+            "entra_no_total": True,
+            "title_class": "op-title-total",
+            "metric_wrapper_class": None,
+            "ticket_medio": modo_ticket,
+            "aliases": [],
+            **g,
+        }
+        if grupo["ticket_medio"] not in MODOS_TICKET:
+            raise ValueError(f"grupo {grupo['id']}: ticket_medio inválido '{grupo['ticket_medio']}'")
+        if grupo["pai"] is None and not grupo.get("quadrante"):
+            raise ValueError(f"grupo {grupo['id']}: grupo raiz precisa de 'quadrante'")
+        grupos.append(grupo)
+        grupos_por_id[grupo["id"]] = grupo
+
+    filhos = {g["id"]: [] for g in grupos}
+    for g in grupos:
+        if g["pai"] is not None:
+            if g["pai"] not in grupos_por_id:
+                raise ValueError(f"grupo {g['id']}: pai desconhecido '{g['pai']}'")
+            filhos[g["pai"]].append(g["id"])
+
+    operacoes = []
+    operacoes_por_id = {}
+    for i, op in enumerate(config.get("operacoes") or []):
+        _exigir(op, CAMPOS_OPERACAO, f"operação #{i}")
+        operacao = {
+            "id": op.get("id") or op["sufixo"],
+            "entra_no_total": True,
+            "aliases": [],
+            **op,
+        }
+        if operacao["id"] in operacoes_por_id:
+            raise ValueError(f"operação duplicada: {operacao['id']}")
+        if operacao["grupo"] not in grupos_por_id:
+            raise ValueError(f"operação {operacao['id']}: grupo desconhecido '{operacao['grupo']}'")
+        operacoes.append(operacao)
+        operacoes_por_id[operacao["id"]] = operacao
+
+    anomalias = config.get("anomalias")
+    for i, regra in enumerate(anomalias or []):
+        _exigir(regra, CAMPOS_REGRA_ANOMALIA, f"regra de anomalia #{i}")
+        if regra["modo"] not in ("taxa", "nivel") or regra["direcao"] not in ("queda", "pico"):
+            raise ValueError(f"regra de anomalia {regra['id']}: modo/direção inválidos")
+
+    raizes = [g["id"] for g in grupos if g["pai"] is None]
+    ordem_rollup = _pos_ordem(raizes, filhos)
+    if len(ordem_rollup) != len(grupos):
+        raise ValueError("hierarquia de grupos com ciclo (nenhum grupo raiz alcança todos)")
+
+    return {
+        "grupos": grupos,
+        "operacoes": operacoes,
+        "grupos_por_id": grupos_por_id,
+        "operacoes_por_id": operacoes_por_id,
+        "raizes": raizes,
+        "filhos": filhos,
+        "ordem_rollup": ordem_rollup,
+        "anomalias": tuple(anomalias) if anomalias else None,
+    }
+
+
+def _pos_ordem(raizes: list, filhos: dict) -> list:
+    """Filhos antes dos pais: cada subtotal fica pronto antes de ser somado ao pai."""
+    ordem = []
+    pilha = [(r, False) for r in reversed(raizes)]
+    while pilha:
+        gid, visitado = pilha.pop()
+        if visitado:
+            ordem.append(gid)
+            continue
+        pilha.append((gid, True))
+        pilha.extend((f, False) for f in reversed(filhos[gid]))
+    return ordem
+
+
+def carregar_registro(caminho: str | None = None) -> dict:
+    caminho = caminho or os.getenv("PAINEL_OPERACOES") or CAMINHO_PADRAO
+    with open(caminho, encoding="utf-8") as f:
+        return montar_registro(json.load(f))
+
+
+def subgrupos(registro: dict, grupo_id: str) -> list:
+    """Ids do grupo e de todos os descendentes (pré-ordem)."""
+    ids = []
+    pilha = [grupo_id]
+    while pilha:
+        gid = pilha.pop()
+        ids.append(gid)
+        pilha.extend(reversed(registro["filhos"][gid]))
+    return ids
+
+
+def operacoes_do_grupo(
+    registro: dict,
+    grupo_id: str,
+    somente_total: bool = False,
+    incluir_subgrupos: bool = False,
+) -> list:
+    grupos = set(subgrupos(registro, grupo_id)) if incluir_subgrupos else {grupo_id}
+    return [
+        op for op in registro["operacoes"]
+        if op["grupo"] in grupos and (op["entra_no_total"] or not somente_total)
+    ]
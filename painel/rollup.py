@@ -0,0 +1,259 @@
+"""
+Rollup hierárquico dos totais.
+
+Uma passada pelas métricas das operações acumula cada linha no seu grupo;
+depois os subtotais sobem pela árvore (filhos antes dos pais, ver
+registro["ordem_rollup"]), então cada grupo é somado uma única vez e
+reaproveitado pelos ancestrais. Adicionar um card de total novo custa
+só mais um acumulador.
+"""
+import threading
+
+from painel.tempo import para_datetime
+
+CAMPOS_SOMA = ("qtde_mailing", "qtde_leads", "qtde_chamadas", "valor_consumido")
+CAMPOS_ADITIVOS = CAMPOS_SOMA + ("ticket_soma", "ticket_n", "ticket_pond_num", "ticket_pond_den", "n_operacoes")
+
+# modo de agregação do ticket médio -> rótulo no card
+MODOS_TICKET = {
+    "ponderado": "ponderado",       # soma(ticket * leads) / soma(leads)
+    "valor_por_lead": "valor/lead",  # soma(valor consumido) / soma(leads)
+    "media": "média",               # média simples dos tickets não-zero (comportamento antigo)
+}
+MODO_TICKET_PADRAO = "ponderado"
+
+
+def _ts(valor):
+    """datetime comparável (tz-aware) ou None; horário sem fuso é tratado como São Paulo."""
+    if not valor:
+        return None
+    return para_datetime(valor)
+
+
+def _max(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a if a >= b else b
+
+
+def _min(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a if a <= b else b
+
+
+def acumulador_vazio() -> dict:
+    return {
+        "qtde_mailing": 0,
+        "qtde_leads": 0,
+        "qtde_chamadas": 0,
+        "valor_consumido": 0.0,
+        # numeradores/denominadores do ticket médio, um par por modo
+        "ticket_soma": 0.0,
+        "ticket_n": 0,
+        "ticket_pond_num": 0.0,
+        "ticket_pond_den": 0,
+        "ultimo_lead": None,
+        "created_at": None,
+        "n_operacoes": 0,
+    }
+
+
+def acumular(acc: dict, m: dict | None) -> dict:
+    """Soma as métricas de uma operação (saída de get_metrics_pbx) no acumulador."""
+    if m is None:
+        return acc
+    for campo in CAMPOS_SOMA:
+        acc[campo] += m[campo]
+    ticket = m["ticket_medio"]
+    if ticket is not None:
+        acc["ticket_pond_num"] += ticket * m["qtde_leads"]
+        acc["ticket_pond_den"] += m["qtde_leads"]
+        if ticket != 0:
+            acc["ticket_soma"] += ticket
+            acc["ticket_n"] += 1
+    acc["ultimo_lead"] = _max(acc["ultimo_lead"], _ts(m["ultimo_lead"]))
+    acc["created_at"] = _max(acc["created_at"], _ts(m["created_at"]))
+    acc["n_operacoes"] += 1
+    return acc
+
+
+def combinar(acc: dict, outro: dict) -> dict:
+    """Soma um subtotal (acumulador de um subgrupo) no acumulador do pai."""
+    for campo in CAMPOS_ADITIVOS:
+        acc[campo] += outro[campo]
+    acc["ultimo_lead"] = _max(acc["ultimo_lead"], outro["ultimo_lead"])
+    acc["created_at"] = _max(acc["created_at"], outro["created_at"])
+    return acc
+
+
+def _descontar(acc: dict, outro: dict) -> dict:
+    for campo in CAMPOS_ADITIVOS:
+        acc[campo] -= outro[campo]
+    return acc
+
+
+def ticket_medio(acc: dict, modo: str = MODO_TICKET_PADRAO) -> float | None:
+    if modo == "media":
+        num, den = acc["ticket_soma"], acc["ticket_n"]
+    elif modo == "valor_por_lead":
+        num, den = acc["valor_consumido"], acc["qtde_leads"]
+    else:
+        num, den = acc["ticket_pond_num"], acc["ticket_pond_den"]
+    return num / den if den else None
+
+
+def finalizar(acc: dict, modo: str = MODO_TICKET_PADRAO) -> dict:
+    total = dict(acc)
+    total["ticket_medio"] = ticket_medio(acc, modo)
+    total["ticket_modo"] = modo
+    return total
+
+
+def totalizar(metrics_list: list) -> dict:
+    """Total plano de uma lista de métricas (um único grupo)."""
+    acc = acumulador_vazio()
+    for m in metrics_list:
+        acumular(acc, m)
+    return finalizar(acc)
+
+
+def acumulador_de_linha_sql(linha: dict) -> dict:
+    """Converte uma linha de painel_totais (sql/painel_totais.sql) em acumulador."""
+    acc = acumulador_vazio()
+    for campo in ("qtde_mailing", "qtde_leads", "qtde_chamadas", "ticket_n", "n_operacoes"):
+        acc[campo] = int(linha.get(campo) or 0)
+    acc["valor_consumido"] = float(linha.get("valor_consumido") or 0.0)
+    acc["ticket_soma"] = float(linha.get("ticket_soma") or 0.0)
+    acc["ticket_pond_num"] = float(linha.get("ticket_pond_num") or 0.0)
+    acc["ticket_pond_den"] = int(linha.get("ticket_pond_den") or 0)
+    acc["ultimo_lead"] = _ts(linha.get("ultimo_lead"))
+    acc["created_at"] = _ts(linha.get("created_at"))
+    return acc
+
+
+def _finalizar_grupos(registro: dict, accs: dict) -> dict:
+    return {gid: finalizar(acc, registro["grupos_por_id"][gid]["ticket_medio"]) for gid, acc in accs.items()}
+
+
+def _propagar(registro: dict, accs: dict) -> dict:
+    for gid in registro["ordem_rollup"]:
+        grupo = registro["grupos_por_id"][gid]
+        if grupo["pai"] is not None and grupo["entra_no_total"]:
+            combinar(accs[grupo["pai"]], accs[gid])
+    return _finalizar_grupos(registro, accs)
+
+
+def calcular_rollup(registro: dict, metricas: dict) -> dict:
+    """
+    Totais de todos os grupos do registro.
+
+    metricas: {operacao_id: métricas ou None}. Operações com entra_no_total=false
+    e subgrupos com entra_no_total=false não sobem para o pai.
+    Devolve {grupo_id: total finalizado}.
+    """
+    accs = {gid: acumulador_vazio() for gid in registro["grupos_por_id"]}
+
+    for op in registro["operacoes"]:
+        if op["entra_no_total"]:
+            acumular(accs[op["grupo"]], metricas.get(op["id"]))
+
+    return _propagar(registro, accs)
+
+
+def calcular_rollup_sql(registro: dict, linhas: list) -> dict:
+    """
+    Mesmo resultado de calcular_rollup, partindo das somas por grupo já feitas no
+    Postgres (uma linha por grupo, só com as operações diretas de cada grupo).
+    """
+    accs = {gid: acumulador_vazio() for gid in registro["grupos_por_id"]}
+    for linha in linhas:
+        if linha.get("grupo") in accs:
+            combinar(accs[linha["grupo"]], acumulador_de_linha_sql(linha))
+    return _propagar(registro, accs)
+
+
+def salvo_em_por_grupo(registro: dict, metricas: dict) -> dict:
+    """
+    {grupo_id: salvo_em mais antigo entre as linhas que compõem o total} — só das
+    linhas servidas da cópia salva (métricas com "salvo_em"); None se todas vieram
+    do Supabase. Sobe pela árvore com as mesmas regras de calcular_rollup.
+    """
+    salvos = {gid: None for gid in registro["grupos_por_id"]}
+    for op in registro["operacoes"]:
+        m = metricas.get(op["id"])
+        if op["entra_no_total"] and m and m.get("salvo_em"):
+            salvos[op["grupo"]] = _min(salvos[op["grupo"]], m["salvo_em"])
+    for gid in registro["ordem_rollup"]:
+        grupo = registro["grupos_por_id"][gid]
+        if grupo["pai"] is not None and grupo["entra_no_total"]:
+            salvos[grupo["pai"]] = _min(salvos[grupo["pai"]], salvos[gid])
+    return salvos
+
+
+class RollupIncremental:
+    """
+    Totais mantidos incrementalmente: quando a linha de uma operação muda, só a
+    diferença (nova contribuição - antiga) é aplicada ao grupo dela e aos
+    ancestrais, em vez de somar de novo todos os membros.
+
+    Somas e pares numerador/denominador do ticket são invertíveis; o máximo de
+    ultimo_lead/created_at só é recalculado (a partir das contribuições
+    guardadas) no caso raro de o valor máximo de um grupo regredir.
+    """
+
+    def __init__(self, registro: dict):
+        self._registro = registro
+        self._lock = threading.Lock()
+        self._accs = {gid: acumulador_vazio() for gid in registro["grupos_por_id"]}
+        self._contrib = {}
+        self._ultimas = {}
+        self._caminhos = {}
+        self._membros = {gid: [] for gid in registro["grupos_por_id"]}
+
+        for op in registro["operacoes"]:
+            if not op["entra_no_total"]:
+                continue
+            caminho = [op["grupo"]]
+            grupo = registro["grupos_por_id"][op["grupo"]]
+            while grupo["pai"] is not None and grupo["entra_no_total"]:
+                grupo = registro["grupos_por_id"][grupo["pai"]]
+                caminho.append(grupo["id"])
+            self._caminhos[op["id"]] = caminho
+            for gid in caminho:
+                self._membros[gid].append(op["id"])
+
+    def atualizar(self, op_id: str, m: dict | None) -> bool:
+        """Aplica a linha nova de uma operação. Devolve False se nada mudou."""
+        caminho = self._caminhos.get(op_id)
+        if caminho is None:
+            return False
+        with self._lock:
+            if op_id in self._ultimas and self._ultimas[op_id] == m:
+                return False
+            nova = acumular(acumulador_vazio(), m)
+            antiga = self._contrib.get(op_id, acumulador_vazio())
+            self._contrib[op_id] = nova
+            self._ultimas[op_id] = m
+
+            for gid in caminho:
+                acc = self._accs[gid]
+                combinar(_descontar(acc, antiga), nova)
+                for campo in ("ultimo_lead", "created_at"):
+                    if antiga[campo] is not None and acc[campo] == antiga[campo] and nova[campo] != antiga[campo]:
+                        acc[campo] = None
+                        for membro in self._membros[gid]:
+                            acc[campo] = _max(acc[campo], self._contrib.get(membro, acumulador_vazio())[campo])
+            return True
+
+    def atualizar_varios(self, metricas: dict) -> int:
+        """metricas: {operacao_id: métricas ou None}. Devolve quantas operações mudaram."""
+        return sum(self.atualizar(op_id, m) for op_id, m in metricas.items())
+
+    def totais(self) -> dict:
+        with self._lock:
+            return _finalizar_grupos(self._registro, self._accs)
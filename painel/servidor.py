@@ -0,0 +1,79 @@
+"""
+Lançador do painel com aquecimento: sobe o /metrics + /ready, começa a
+trazer limites, últimas linhas e totais (painel.aquecimento) e roda o `streamlit run
+app.py` no mesmo processo, para o app.py encontrar tudo quente.
+
+O balanceador deve esperar GET /ready (porta PAINEL_METRICS_PORTA) dar 200
+antes de mandar tráfego. Por padrão a porta só escuta em 127.0.0.1; para um
+balanceador em outra máquina, PAINEL_METRICS_HOST=0.0.0.0. Argumentos extras vão direto para o streamlit run.
+
+Uso (na raiz do repositório):
+    python -m painel.servidor --server.port 8501 --server.headless true
+"""
+import logging
+import os
+import sys
+
+from painel import telemetria
+from painel.aquecimento import AQUECIMENTO
+from painel.dados import consultar_totais_sql, consultar_ultima_linha, operacoes_totais_sql
+from painel.limites import PLANILHA_LIMITES_URL
+from painel.registro import carregar_registro
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+PARALELO = int(os.getenv("PAINEL_FETCH_PARALELO", "8"))
+VALIDADE_S = float(os.getenv("PAINEL_AQUECIMENTO_VALIDADE_S", "30"))  # igual ao ttl do st.cache_data do app.py
+MANTER_S = float(os.getenv("PAINEL_AQUECIMENTO_MANTER_S", "300"))  # segue reaquecendo por este tempo após o start
+JANELA_SESSAO_S = 240  # 2× o auto-refresh do app.py, como em obter_servidor_metricas()
+
+
+def aquecer():
+    """Inicia o aquecimento em segundo plano (precisa de SUPABASE_URL/SUPABASE_KEY)."""
+    url, chave = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    if not url or not chave:
+        logging.warning("SUPABASE_URL/SUPABASE_KEY não definidas: sem aquecimento")
+        return None
+    from supabase import create_client
+
+    cliente = create_client(url, chave)
+    registro = carregar_registro()
+    carregar_totais = None
+    if os.getenv("PAINEL_TOTAIS_SQL", "1") == "1":  # igual ao TOTAIS_VIA_SQL do app.py
+        carregar_totais = lambda: consultar_totais_sql(cliente, operacoes_totais_sql(registro))
+    return AQUECIMENTO.iniciar(
+        registro,
+        lambda tabela: consultar_ultima_linha(cliente, tabela),
+        PLANILHA_LIMITES_URL,
+        os.getenv("GOOGLE_SHEET_GID", "0"),
+        paralelo=PARALELO,
+        validade_s=VALIDADE_S,
+        manter_s=MANTER_S,
+        carregar_totais=carregar_totais,
+    )
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # uma linha por consulta do aquecimento
+    argv = sys.argv[1:] if argv is None else argv
+
+    aquecer()
+    porta = int(os.getenv("PAINEL_METRICS_PORTA", "9108"))
+    if porta:
+        # aberto antes do Streamlit para o /ready existir durante o aquecimento;
+        # o obter_servidor_metricas() do app.py encontra a porta ocupada e usa este
+        telemetria.iniciar_servidor(
+            telemetria.metricas_padrao(janela_sessao_s=JANELA_SESSAO_S),
+            porta,
+            os.getenv("PAINEL_METRICS_HOST", telemetria.HOST_PADRAO),
+            pronto=AQUECIMENTO.pronto,
+        )
+
+    from streamlit.web import cli
+
+    sys.argv = ["streamlit", "run", APP, *argv]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()
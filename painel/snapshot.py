@@ -0,0 +1,106 @@
+"""
+Última cópia boa (last-known-good) das linhas e dos limites, em disco.
+
+Cada linha ou planilha nova que chega é gravada num JSON compacto dentro de
+DADOS_DIR (arquivo temporário + os.replace, então quem lê nunca vê o arquivo
+pela metade). Num restart, a cópia é lida na criação do objeto: o painel
+desenha números reais, marcados como desatualizados, enquanto busca os dados
+novos. Ela também serve de reserva quando o Supabase ou a planilha caem.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+VERSAO = 1
+CHAVE_SALVO_EM = "_salvo_em"  # marcada nas linhas servidas da cópia (epoch da última leitura boa)
+REGRAVAR_S = 60  # dado igual: a hora da confirmação vai para o disco no máximo a cada REGRAVAR_S
+
+
+class SnapshotDisco:
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.linhas = {}  # tabela -> {"linha", "em"}
+        self.limites = {}
+        self.limites_em = None
+        self.totais = None  # linhas do painel_totais
+        self.totais_em = None
+        self.frescas = set()  # tabelas que já vieram do Supabase neste processo
+        self._gravado_em = 0.0
+        self._lock = threading.Lock()
+        self.carregar()
+
+    def carregar(self):
+        try:
+            with open(self.caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            log.warning("cópia salva ilegível em %s; ignorando", self.caminho)
+            return
+        if dados.get("versao") != VERSAO:
+            return
+        self.linhas = dados.get("linhas") or {}
+        self.limites = dados.get("limites") or {}
+        self.limites_em = dados.get("limites_em")
+        self.totais = dados.get("totais")
+        self.totais_em = dados.get("totais_em")
+
+    def _gravar(self):
+        dados = {
+            "versao": VERSAO, "linhas": self.linhas, "limites": self.limites, "limites_em": self.limites_em,
+            "totais": self.totais, "totais_em": self.totais_em,
+        }
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        tmp = f"{self.caminho}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False, separators=(",", ":"), default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.caminho)
+            self._gravado_em = time.time()
+        except OSError:
+            log.exception("falha ao gravar a cópia salva em %s", self.caminho)
+
+    def atualizar_linha(self, tabela: str, linha: dict):
+        """
+        Guarda a linha lida agora. "em" é a hora da última leitura boa, mesmo que a
+        linha não tenha mudado: o aviso mostra quando o dado foi confirmado.
+        """
+        with self._lock:
+            self.frescas.add(tabela)
+            atual = self.linhas.get(tabela)
+            mudou = atual is None or atual["linha"] != linha
+            self.linhas[tabela] = {"linha": linha, "em": time.time()}
+            self._gravar_se(mudou)
+
+    def atualizar_limites(self, limites: dict):
+        with self._lock:
+            mudou = limites != self.limites
+            self.limites, self.limites_em = limites, time.time()
+            self._gravar_se(mudou)
+
+    def atualizar_totais(self, linhas: list):
+        with self._lock:
+            mudou = linhas != self.totais
+            self.totais, self.totais_em = linhas, time.time()
+            self._gravar_se(mudou)
+
+    def _gravar_se(self, mudou: bool):
+        if mudou or time.time() - self._gravado_em >= REGRAVAR_S:
+            self._gravar()
+
+    def linha(self, tabela: str) -> dict | None:
+        """Linha salva, marcada com CHAVE_SALVO_EM; None se não houver."""
+        item = self.linhas.get(tabela)
+        if not item:
+            return None
+        return {**item["linha"], CHAVE_SALVO_EM: item["em"]}
+
+    def fresca(self, tabela: str) -> bool:
+        return tabela in self.frescas
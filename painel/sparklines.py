@@ -0,0 +1,137 @@
+"""
+Sparklines por operação, alimentadas por ring buffers em memória.
+
+Cada operação tem um buffer de tamanho fixo (array de floats) por métrica;
+o coletor acrescenta as linhas novas e a renderização só lê os buffers,
+sem nenhuma consulta. A memória por operação é fixa:
+capacidade * métricas * 2 arrays * 8 bytes.
+"""
+import math
+import threading
+from array import array
+
+from painel.tempo import para_epoch
+
+CAMPOS_SPARKLINE = ("valor_consumido", "qtde_leads", "qtde_chamadas")
+
+
+class RingBuffer:
+    """Pares (ts, valor) em ordem de chegada; ao encher, sobrescreve o mais antigo."""
+
+    __slots__ = ("capacidade", "_ts", "_val", "_inicio", "_n")
+
+    def __init__(self, capacidade: int):
+        self.capacidade = max(1, int(capacidade))
+        self._ts = array("d", bytes(8 * self.capacidade))
+        self._val = array("d", bytes(8 * self.capacidade))
+        self._inicio = 0
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def ultimo_ts(self) -> float | None:
+        if not self._n:
+            return None
+        return self._ts[(self._inicio + self._n - 1) % self.capacidade]
+
+    def anexar(self, ts: float, valor) -> bool:
+        """Ignora pontos fora de ordem (reentrega do mesmo ciclo, backfill atrasado)."""
+        if self._n and ts <= self.ultimo_ts:
+            return False
+        valor = math.nan if valor is None else float(valor)
+        if self._n < self.capacidade:
+            idx = (self._inicio + self._n) % self.capacidade
+            self._n += 1
+        else:
+            idx = self._inicio
+            self._inicio = (self._inicio + 1) % self.capacidade
+        self._ts[idx] = ts
+        self._val[idx] = valor
+        return True
+
+    def itens(self, desde_ts: float | None = None) -> tuple:
+        """(lista de ts, lista de valores) em ordem cronológica."""
+        ts, vals = [], []
+        for i in range(self._n):
+            idx = (self._inicio + i) % self.capacidade
+            if desde_ts is not None and self._ts[idx] < desde_ts:
+                continue
+            ts.append(self._ts[idx])
+            vals.append(self._val[idx])
+        return ts, vals
+
+
+class BuffersOperacoes:
+    """Um RingBuffer por (operação, métrica); usado como ouvinte do Coletor."""
+
+    def __init__(self, capacidade: int, campos: tuple = CAMPOS_SPARKLINE):
+        self.capacidade = capacidade
+        self.campos = campos
+        self._lock = threading.Lock()
+        self._buffers = {}
+
+    def _buffers_op(self, op_id: str) -> dict:
+        bufs = self._buffers.get(op_id)
+        if bufs is None:
+            bufs = {c: RingBuffer(self.capacidade) for c in self.campos}
+            self._buffers[op_id] = bufs
+        return bufs
+
+    def anexar(self, op_id: str, ts: float, m: dict):
+        with self._lock:
+            bufs = self._buffers_op(op_id)
+            for c in self.campos:
+                bufs[c].anexar(ts, m.get(c))
+
+    def ouvinte(self, op: dict, novas: list):
+        for m in novas:
+            ts = para_epoch(m["created_at"])
+            if ts is not None:
+                self.anexar(op["id"], ts, m)
+
+    def preencher(self, store, registro: dict, desde_ts: float):
+        """Carrega do histórico local os pontos recentes (ex.: após reiniciar o processo)."""
+        for op in registro["operacoes"]:
+            serie = store.serie(op["id"], desde_ts=desde_ts, campos=self.campos)
+            with self._lock:
+                bufs = self._buffers_op(op["id"])
+                for i, ts in enumerate(serie["ts"]):
+                    for c in self.campos:
+                        bufs[c].anexar(ts, serie[c][i])
+
+    def serie(self, op_id: str, campo: str, desde_ts: float | None = None) -> tuple:
+        with self._lock:
+            bufs = self._buffers.get(op_id)
+            if not bufs:
+                return [], []
+            return bufs[campo].itens(desde_ts)
+
+
+def svg_sparkline(ts: list, valores: list, largura: int = 120, altura: int = 28, cor: str = "#475569") -> str:
+    """Polyline SVG inline (sem dependências); string vazia com menos de 2 pontos."""
+    pontos = [(t, v) for t, v in zip(ts, valores) if not math.isnan(v)]
+    if len(pontos) < 2:
+        return ""
+    t0, t1 = pontos[0][0], pontos[-1][0]
+    vmin = min(v for _, v in pontos)
+    vmax = max(v for _, v in pontos)
+    dt = (t1 - t0) or 1.0
+    dv = (vmax - vmin) or 1.0
+    margem = 2
+    coords = [
+        (
+            margem + (t - t0) / dt * (largura - 2 * margem),
+            altura - margem - (v - vmin) / dv * (altura - 2 * margem),
+        )
+        for t, v in pontos
+    ]
+    path = " ".join(f"{x:.1f},{y:.1f}" for x, y in coords)
+    x_fim, y_fim = coords[-1]
+    return (
+        f'<svg viewBox="0 0 {largura} {altura}" width="100%" height="{altura}" preserveAspectRatio="none">'
+        f'<polyline fill="none" stroke="{cor}" stroke-width="1.5" points="{path}"/>'
+        f'<circle cx="{x_fim:.1f}" cy="{y_fim:.1f}" r="2" fill="{cor}"/>'
+        "</svg>"
+    )
@@ -0,0 +1,204 @@
+"""
+Métricas do próprio painel no formato texto do Prometheus, servidas em
+/metrics por um http.server numa thread do processo (sem dependências),
+junto com o /ready para o balanceador esperar o aquecimento.
+
+Contadores e histogramas ficam em memória no nível do módulo, então somam
+todas as sessões e reruns do processo. Medidores calculados na hora da
+coleta (sessões ativas, idade dos dados) são registrados como funções.
+"""
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from painel.tempo import para_epoch
+
+HOST_PADRAO = "127.0.0.1"  # só a máquina local; outras interfaces com PAINEL_METRICS_HOST=0.0.0.0
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escapar(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(nomes: tuple, valores: tuple, extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _num(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v))
+
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = ()):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, rotulos
+        self._lock = threading.Lock()
+        self._valores = {}
+
+    def inc(self, *valores_rotulos, valor: float = 1.0):
+        with self._lock:
+            self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0.0) + valor
+
+    def valor(self, *valores_rotulos) -> float:
+        with self._lock:
+            return self._valores.get(valores_rotulos, 0.0)
+
+    def amostras(self) -> list:
+        with self._lock:
+            return [f"{self.nome}{_rotulos(self.rotulos, k)} {_num(v)}" for k, v in sorted(self._valores.items())]
+
+
+class Histograma:
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = (), buckets: tuple = BUCKETS_PADRAO):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, rotulos
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # rótulos -> [contagens por bucket..., soma, n]
+
+    def observar(self, valor: float, *valores_rotulos):
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [0] * len(self.buckets) + [0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[i] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def amostras(self) -> list:
+        linhas = []
+        with self._lock:
+            for k, serie in sorted(self._series.items()):
+                for limite, n in zip(self.buckets, serie):
+                    le = 'le="%s"' % _num(limite)
+                    linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, k, le)} {n}")
+                le_inf = 'le="+Inf"'
+                linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, k, le_inf)} {serie[-1]}")
+                linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, k)} {_num(serie[-2])}")
+                linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, k)} {serie[-1]}")
+        return linhas
+
+
+class Medidor:
+    """Valor calculado na coleta: fn() -> {tupla de rótulos: valor}."""
+
+    tipo = "gauge"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple, fn):
+        self.nome, self.ajuda, self.rotulos, self.fn = nome, ajuda, rotulos, fn
+
+    def amostras(self) -> list:
+        return [f"{self.nome}{_rotulos(self.rotulos, k)} {_num(v)}" for k, v in sorted(self.fn().items())]
+
+
+# ========== MÉTRICAS DO PAINEL ==========
+SUPABASE_SEGUNDOS = Histograma(
+    "painel_supabase_query_seconds", "Latência das consultas ao Supabase.", ("tabela", "origem")
+)
+LIMITES_SEGUNDOS = Histograma("painel_limites_fetch_seconds", "Latência da leitura da planilha de limites.")
+LIMITES_TOTAL = Contador("painel_limites_fetch_total", "Leituras da planilha de limites por resultado.", ("status",))
+CACHE_TOTAL = Contador("painel_cache_total", "Consultas aos caches por resultado (hit/miss).", ("cache", "resultado"))
+RERUN_SEGUNDOS = Histograma("painel_rerun_seconds", "Duração de cada rerun do script.")
+
+_sessoes = {}  # id da sessão -> último rerun (epoch)
+_ultimo_created_at = {}  # tabela -> epoch do created_at mais recente visto
+_lock = threading.Lock()
+
+
+def registrar_sessao(sessao_id: str, agora: float | None = None):
+    with _lock:
+        _sessoes[sessao_id] = agora or time.time()
+
+
+def sessoes_ativas(janela_s: float) -> int:
+    limite = time.time() - janela_s
+    with _lock:
+        for sid in [s for s, ts in _sessoes.items() if ts < limite]:
+            del _sessoes[sid]
+        return len(_sessoes)
+
+
+def registrar_created_at(tabela: str, ts: float | None):
+    if ts is None:
+        return
+    with _lock:
+        if ts > _ultimo_created_at.get(tabela, 0.0):
+            _ultimo_created_at[tabela] = ts
+
+
+def ouvinte_coletor(op: dict, novas: list):
+    """Ouvinte do Coletor: mantém a idade dos dados mesmo sem ninguém com o painel aberto."""
+    registrar_created_at(op["tabela"], para_epoch(novas[-1]["created_at"]))
+
+
+def idade_dados() -> dict:
+    agora = time.time()
+    with _lock:
+        return {(tabela,): agora - ts for tabela, ts in _ultimo_created_at.items()}
+
+
+def metricas_padrao(janela_sessao_s: float) -> list:
+    return [
+        SUPABASE_SEGUNDOS,
+        LIMITES_SEGUNDOS,
+        LIMITES_TOTAL,
+        CACHE_TOTAL,
+        RERUN_SEGUNDOS,
+        Medidor("painel_sessoes_ativas", "Sessões com rerun na janela de auto-refresh.", (),
+                lambda: {(): sessoes_ativas(janela_sessao_s)}),
+        Medidor("painel_dados_idade_seconds", "Agora menos o created_at mais recente de cada tabela.", ("tabela",),
+                idade_dados),
+    ]
+
+
+def exposicao(metricas: list) -> str:
+    linhas = []
+    for m in metricas:
+        linhas.append(f"# HELP {m.nome} {m.ajuda}")
+        linhas.append(f"# TYPE {m.nome} {m.tipo}")
+        linhas.extend(m.amostras())
+    return "\n".join(linhas) + "\n"
+
+
+def iniciar_servidor(metricas: list, porta: int, host: str = HOST_PADRAO, pronto=None) -> ThreadingHTTPServer:
+    """
+    GET /metrics numa thread daemon. Levanta OSError se a porta estiver ocupada.
+    GET /ready responde 200 quando pronto() (ex.: aquecimento concluído) e 503 antes.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, status: int, corpo: bytes, tipo: str):
+            self.send_response(status)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            caminho = self.path.split("?")[0]
+            if caminho == "/metrics":
+                self._responder(200, exposicao(metricas).encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+            elif caminho == "/ready":
+                ok = pronto is None or pronto()
+                self._responder(200 if ok else 503, b"ok\n" if ok else b"aquecendo\n", "text/plain; charset=utf-8")
+            else:
+                self.send_error(404)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, porta), Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="painel-metrics", daemon=True).start()
+    return servidor
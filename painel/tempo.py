@@ -0,0 +1,83 @@
+"""
+Conversões de data/hora (cards, totais, histórico, coletor).
+
+Horário sem fuso é tratado como America/Sao_Paulo. O caminho rápido é
+datetime.fromisoformat (o Supabase devolve ISO-8601), com memo por string:
+o mesmo created_at/ultimo_lead aparece em todo rerun até a linha mudar.
+Só formatos que o fromisoformat não lê caem no pd.to_datetime, importado
+sob demanda.
+"""
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+TZ_SP = ZoneInfo("America/Sao_Paulo")
+FORMATO_BR = "%d/%m/%Y %H:%M:%S"
+
+
+def _via_pandas(valor) -> datetime | None:
+    import pandas as pd
+
+    ts = pd.to_datetime(valor, errors="coerce")
+    if pd.isna(ts):
+        return None
+    return ts.to_pydatetime()
+
+
+@lru_cache(maxsize=4096)
+def _de_texto(texto: str) -> datetime | None:
+    try:
+        dt = datetime.fromisoformat(texto)
+    except ValueError:
+        try:
+            dt = _via_pandas(texto)
+        except Exception:
+            return None
+        if dt is None:
+            return None
+    return dt.replace(tzinfo=TZ_SP) if dt.tzinfo is None else dt
+
+
+def para_datetime(valor) -> datetime | None:
+    """datetime tz-aware a partir de str ISO-8601 / datetime; None se não der para ler."""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, datetime):
+        return valor.replace(tzinfo=TZ_SP) if valor.tzinfo is None else valor
+    if isinstance(valor, str):
+        return _de_texto(valor.strip())
+    try:
+        dt = _via_pandas(valor)
+    except Exception:
+        return None
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=TZ_SP) if dt.tzinfo is None else dt
+
+
+def para_datetimes(valores) -> list:
+    """Versão em lote de para_datetime (mesma ordem; None onde não der para ler)."""
+    return [para_datetime(v) for v in valores]
+
+
+def para_epoch(valor) -> float | None:
+    dt = para_datetime(valor)
+    return dt.timestamp() if dt is not None else None
+
+
+@lru_cache(maxsize=4096)
+def _fmt_texto(texto: str) -> str | None:
+    dt = _de_texto(texto.strip())
+    return dt.astimezone(TZ_SP).strftime(FORMATO_BR) if dt is not None else None
+
+
+def fmt_br(valor) -> str | None:
+    """"dd/mm/aaaa hh:mm:ss" no horário de São Paulo; None se não der para ler."""
+    if isinstance(valor, str):
+        return _fmt_texto(valor)
+    dt = para_datetime(valor)
+    return dt.astimezone(TZ_SP).strftime(FORMATO_BR) if dt is not None else None
+
+
+def fmt_br_lote(valores) -> list:
+    return [fmt_br(v) for v in valores]
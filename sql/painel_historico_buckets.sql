@@ -0,0 +1,110 @@
+-- =====================================================================
+-- painel_historico_buckets(tabela, sufixo, desde, ate, bucket_s)
+--
+-- Histórico de uma operação agregado em baldes de tempo (ex.: 300 s para
+-- "hoje", 3600 s para "últimos 7 dias"), usado pela página Histórico.
+-- Para cada balde devolve min / max / último / média de valor consumido,
+-- leads, chamadas e ticket médio, então o gráfico recebe algumas centenas
+-- de pontos em vez das linhas brutas.
+--
+-- Depende de painel_numero() (sql/painel_totais.sql).
+-- Instalação: rodar este arquivo no SQL editor do Supabase.
+-- =====================================================================
+
+create or replace function public.painel_historico_buckets(
+  tabela text,
+  sufixo text,
+  desde timestamptz,
+  ate timestamptz,
+  bucket_s integer
+)
+returns table (
+  bucket timestamptz,
+  n integer,
+  valor_consumido_min double precision,
+  valor_consumido_max double precision,
+  valor_consumido_ultimo double precision,
+  valor_consumido_media double precision,
+  qtde_leads_min bigint,
+  qtde_leads_max bigint,
+  qtde_leads_ultimo bigint,
+  qtde_leads_media double precision,
+  qtde_chamadas_min bigint,
+  qtde_chamadas_max bigint,
+  qtde_chamadas_ultimo bigint,
+  qtde_chamadas_media double precision,
+  ticket_medio_min double precision,
+  ticket_medio_max double precision,
+  ticket_medio_ultimo double precision,
+  ticket_medio_media double precision
+)
+language plpgsql
+stable
+security invoker
+set search_path = public
+as $$
+#variable_conflict use_column
+declare
+  v_col_ordem text;
+  v_col_leads text;
+begin
+  -- só tabelas de operação (a função fica exposta via PostgREST)
+  if tabela is null or tabela !~ '^operacao_[a-z0-9_]+$' or sufixo !~ '^[a-z0-9_]+$' then
+    return;
+  end if;
+  -- limita o trabalho por chamada: no mínimo 1 min por balde e no máximo 31 dias
+  if bucket_s is null or bucket_s < 60 or ate <= desde or ate - desde > interval '31 days' then
+    return;
+  end if;
+
+  select c.column_name into v_col_ordem
+  from information_schema.columns c
+  where c.table_schema = 'public'
+    and c.table_name = tabela
+    and c.column_name in ('created_at', 'creta_at')
+  order by c.column_name = 'created_at' desc
+  limit 1;
+
+  if v_col_ordem is null then
+    return;
+  end if;
+
+  select c.column_name into v_col_leads
+  from information_schema.columns c
+  where c.table_schema = 'public'
+    and c.table_name = tabela
+    and c.column_name in ('qtde_lead_' || sufixo, 'qtde_leads_' || sufixo)
+  order by c.column_name = 'qtde_lead_' || sufixo desc
+  limit 1;
+
+  return query execute format(
+    $q$
+    with linhas as (
+      select
+        to_timestamp(floor(extract(epoch from t.%1$I) / %3$s) * %3$s) as bucket,
+        t.%1$I as ts,
+        painel_numero(to_jsonb(t)->>'valor_consumido_%2$s')::double precision as valor,
+        trunc(painel_numero(to_jsonb(t)->>%4$L))::bigint as leads,
+        trunc(painel_numero(to_jsonb(t)->>'qtde_chamadas_%2$s'))::bigint as chamadas,
+        painel_numero(to_jsonb(t)->>'ticket_medio_%2$s')::double precision as ticket
+      from public.%5$I t
+      where t.%1$I >= $1 and t.%1$I < $2
+    )
+    select
+      bucket,
+      count(*)::integer,
+      min(valor), max(valor), (array_agg(valor order by ts desc))[1], avg(valor),
+      min(leads), max(leads), (array_agg(leads order by ts desc))[1], avg(leads)::double precision,
+      min(chamadas), max(chamadas), (array_agg(chamadas order by ts desc))[1], avg(chamadas)::double precision,
+      min(ticket), max(ticket), (array_agg(ticket order by ts desc))[1], avg(ticket)
+    from linhas
+    group by bucket
+    order by bucket
+    $q$,
+    v_col_ordem, sufixo, bucket_s, coalesce(v_col_leads, ''), tabela
+  )
+  using desde, ate;
+end;
+$$;
+
+grant execute on function public.painel_historico_buckets(text, text, timestamptz, timestamptz, integer) to anon, authenticated;
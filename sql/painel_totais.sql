@@ -0,0 +1,159 @@
+-- =====================================================================
+-- painel_totais(operacoes jsonb)
+--
+-- Totais por grupo calculados no Postgres (padrão do app; PAINEL_TOTAIS_SQL=0 desliga).
+-- Recebe a lista de operações que entram no total:
+--   [{"grupo": "pbx", "tabela": "operacao_pbx1", "sufixo": "pbx1"}, ...]
+-- e devolve uma linha por grupo com as mesmas contas do painel
+-- (painel/rollup.py): somas de mailing/leads/chamadas/valor, ticket médio
+-- como média simples dos tickets não-zero, os numeradores/denominadores de
+-- cada modo de ticket (para o rollup dos grupos pais) e o máximo de
+-- ultimo_lead / created_at.
+--
+-- Instalação: rodar este arquivo no SQL editor do Supabase.
+-- =====================================================================
+
+create or replace function public.painel_numero(valor text)
+returns numeric
+language plpgsql
+immutable
+as $$
+begin
+  return nullif(trim(valor), '')::numeric;
+exception when others then
+  return null;
+end;
+$$;
+
+-- Horário sem fuso é tratado como America/Sao_Paulo (igual a fmt_datetime_br).
+create or replace function public.painel_timestamp(valor text)
+returns timestamptz
+language plpgsql
+stable
+as $$
+begin
+  if valor is null or trim(valor) = '' then
+    return null;
+  end if;
+  -- só há fuso depois de um horário: '2024-01-15' termina em -15, mas é data pura
+  if valor ~ '[T ]\d{2}:\d{2}.*(Z|[+-]\d{2}(:?\d{2})?)$' then
+    return valor::timestamptz;
+  end if;
+  return valor::timestamp at time zone 'America/Sao_Paulo';
+exception when others then
+  return null;
+end;
+$$;
+
+-- drop: o tipo de retorno muda entre versões do painel
+drop function if exists public.painel_totais(jsonb);
+
+create or replace function public.painel_totais(operacoes jsonb)
+returns table (
+  grupo text,
+  n_operacoes integer,
+  qtde_mailing bigint,
+  qtde_leads bigint,
+  qtde_chamadas bigint,
+  valor_consumido double precision,
+  ticket_soma double precision,
+  ticket_n integer,
+  ticket_medio double precision,
+  ticket_pond_num double precision,
+  ticket_pond_den bigint,
+  ultimo_lead timestamptz,
+  created_at timestamptz
+)
+language plpgsql
+stable
+security invoker
+set search_path = public
+as $$
+#variable_conflict use_column
+declare
+  op jsonb;
+  v_tabela text;
+  v_sufixo text;
+  v_col_ordem text;
+  v_linha jsonb;
+  v_ticket numeric;
+  v_leads text;
+  v_linhas jsonb := '[]'::jsonb;
+begin
+  for op in select * from jsonb_array_elements(operacoes)
+  loop
+    v_tabela := op->>'tabela';
+    v_sufixo := op->>'sufixo';
+
+    -- só tabelas de operação (a função fica exposta via PostgREST)
+    if v_tabela is null or v_tabela !~ '^operacao_[a-z0-9_]+$' then
+      continue;
+    end if;
+
+    -- mesma regra do app: ordena por created_at e cai para "creta_at" se a coluna não existir
+    select c.column_name into v_col_ordem
+    from information_schema.columns c
+    where c.table_schema = 'public'
+      and c.table_name = v_tabela
+      and c.column_name in ('created_at', 'creta_at')
+    order by c.column_name = 'created_at' desc
+    limit 1;
+
+    if v_col_ordem is null then
+      continue;
+    end if;
+
+    execute format('select to_jsonb(t) from public.%I t order by %I desc limit 1', v_tabela, v_col_ordem)
+      into v_linha;
+
+    if v_linha is null then
+      continue;
+    end if;
+
+    v_ticket := painel_numero(v_linha->>('ticket_medio_' || v_sufixo));
+    v_leads := coalesce(v_linha->>('qtde_lead_' || v_sufixo), v_linha->>('qtde_leads_' || v_sufixo));
+
+    v_linhas := v_linhas || jsonb_build_object(
+      'grupo', op->>'grupo',
+      'qtde_mailing', coalesce(trunc(painel_numero(v_linha->>('qtde_mailing_' || v_sufixo))), 0),
+      'qtde_leads', coalesce(trunc(painel_numero(v_leads)), 0),
+      'qtde_chamadas', coalesce(trunc(painel_numero(v_linha->>('qtde_chamadas_' || v_sufixo))), 0),
+      'valor_consumido', coalesce(painel_numero(v_linha->>('valor_consumido_' || v_sufixo)), 0),
+      'ticket', case when v_ticket is not null and v_ticket <> 0 then v_ticket end,
+      'ticket_bruto', v_ticket,
+      'ultimo_lead', painel_timestamp(v_linha->>('ultimo_lead_' || v_sufixo)),
+      'created_at', painel_timestamp(coalesce(v_linha->>'created_at', v_linha->>'creta_at'))
+    );
+  end loop;
+
+  return query
+  select
+    x.grupo,
+    count(*)::integer,
+    sum(x.qtde_mailing)::bigint,
+    sum(x.qtde_leads)::bigint,
+    sum(x.qtde_chamadas)::bigint,
+    sum(x.valor_consumido)::double precision,
+    coalesce(sum(x.ticket), 0)::double precision,
+    count(x.ticket)::integer,
+    avg(x.ticket)::double precision,
+    coalesce(sum(x.ticket_bruto * x.qtde_leads), 0)::double precision,
+    coalesce(sum(x.qtde_leads) filter (where x.ticket_bruto is not null), 0)::bigint,
+    max(x.ultimo_lead),
+    max(x.created_at)
+  from jsonb_to_recordset(v_linhas) as x(
+    grupo text,
+    qtde_mailing numeric,
+    qtde_leads numeric,
+    qtde_chamadas numeric,
+    valor_consumido numeric,
+    ticket numeric,
+    ticket_bruto numeric,
+    ultimo_lead timestamptz,
+    created_at timestamptz
+  )
+  group by x.grupo;
+end;
+$$;
+
+grant execute on function public.painel_totais(jsonb) to anon, authenticated;
@@ -0,0 +1,64 @@
+"""Dublês para os testes: cliente do Supabase em memória e limites fixos."""
+from painel.limites import ResolvedorLimites
+
+
+class _Consulta:
+    def __init__(self, linhas: list, chamadas: list):
+        self._linhas = linhas
+        self._chamadas = chamadas
+        self._filtros = []
+        self._ordem = None
+        self._limite = None
+
+    def select(self, *_):
+        return self
+
+    def order(self, coluna, desc=False):
+        self._ordem = (coluna, desc)
+        return self
+
+    def limit(self, n):
+        self._limite = n
+        return self
+
+    def gt(self, coluna, valor):
+        self._filtros.append(lambda r: r.get(coluna) is not None and r[coluna] > valor)
+        return self
+
+    def gte(self, coluna, valor):
+        self._filtros.append(lambda r: r.get(coluna) is not None and r[coluna] >= valor)
+        return self
+
+    def execute(self):
+        self._chamadas.append(self)
+        linhas = [r for r in self._linhas if all(f(r) for f in self._filtros)]
+        if self._ordem:
+            coluna, desc = self._ordem
+            linhas.sort(key=lambda r: (r.get(coluna) or "", r.get("id", 0)), reverse=desc)
+        if self._limite is not None:
+            linhas = linhas[: self._limite]
+        return type("Resposta", (), {"data": linhas})()
+
+
+class ClienteFalso:
+    def __init__(self, tabelas: dict | None = None):
+        self.tabelas = tabelas or {}  # tabela -> [linha, ...]
+        self.chamadas = []
+
+    def table(self, nome):
+        return _Consulta(self.tabelas.setdefault(nome, []), self.chamadas)
+
+
+class FonteFixa:
+    def __init__(self, limites: dict):
+        self.resolvedor = ResolvedorLimites(limites, {})
+
+    def atualizar(self):
+        return self.resolvedor
+
+
+def metricas(valor: float) -> dict:
+    return {
+        "status": "ATIVA", "qtde_mailing": 10, "ticket_medio": 1.0, "qtde_leads": 10, "qtde_chamadas": 10,
+        "ultimo_lead": None, "valor_consumido": valor, "created_at": None,
+    }
@@ -0,0 +1,23 @@
+from falsos import FonteFixa, metricas
+
+from painel.alertas import MotorAlertas, acima_do_limite
+from painel.registro import carregar_registro
+
+T0 = 1_800_000_000.0
+
+
+def test_destaque_usa_o_valor_e_o_limite_do_card():
+    motor = MotorAlertas(carregar_registro(), FonteFixa({"Operação PBX1": {"valor_consumido": 100.0}}), histerese=0.05)
+    motor.avaliar({"pbx1": metricas(50)}, T0)  # ciclo do coletor: ainda ok
+    # a linha da sessão já passou do limite e a planilha da sessão tem outro limite
+    assert motor.destaque("operacao", "pbx1", "valor", 120.0, 100.0)
+    assert not motor.destaque("operacao", "pbx1", "valor", 120.0, 150.0)
+    assert not motor.destaque("operacao", "pbx1", "valor", None, 100.0)
+
+
+def test_destaque_segue_a_histerese_do_motor():
+    motor = MotorAlertas(carregar_registro(), FonteFixa({"Operação PBX1": {"valor_consumido": 100.0}}), histerese=0.05)
+    motor.avaliar({"pbx1": metricas(150)}, T0)
+    assert motor.destaque("operacao", "pbx1", "valor", 97.0, 100.0)  # em alerta: só sai abaixo de 95
+    assert not motor.destaque("operacao", "pbx1", "valor", 94.0, 100.0)
+    assert not acima_do_limite(97.0, 100.0)
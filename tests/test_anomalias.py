@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from painel.anomalias import EWMA, DetectorAnomalias
+
+OP = {"id": "pbx1"}
+T0 = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def linha(minuto: int, chamadas: float, ticket: float) -> dict:
+    return {"created_at": (T0 + timedelta(minutes=minuto)).isoformat(), "qtde_chamadas": chamadas, "ticket_medio": ticket}
+
+
+def test_ewma_valores_conhecidos():
+    e = EWMA(0.5)
+    assert e.zscore(1.0) is None
+    e.atualizar(0.0)
+    e.atualizar(2.0)
+    assert e.media == pytest.approx(1.0)
+    assert e.var == pytest.approx(1.0)  # (1 - a) * (var + diff * a * diff)
+    assert e.zscore(3.0) == pytest.approx(2.0)
+
+
+def test_ewma_serie_constante_nao_tem_zscore():
+    e = EWMA(0.1)
+    for _ in range(50):
+        e.atualizar(7.0)
+    assert e.media == pytest.approx(7.0) and e.var == 0 and e.zscore(100.0) is None
+
+
+def test_pico_no_ticket_so_depois_do_aquecimento():
+    det = DetectorAnomalias(aquecimento=10)
+    det.ouvinte(OP, [linha(i, i * 10, 1.0 + 0.1 * (i % 2)) for i in range(5)])
+    det.ouvinte(OP, [linha(5, 50, 9.0)])
+    assert det.ativas("pbx1") == []  # ainda aquecendo: nada é avaliado
+
+    det = DetectorAnomalias(aquecimento=10)
+    det.ouvinte(OP, [linha(i, i * 10, 1.0 + 0.1 * (i % 2)) for i in range(20)])
+    assert det.ativas("pbx1") == []
+    det.ouvinte(OP, [linha(20, 200, 9.0)])
+    (ativa,) = det.ativas("pbx1")
+    assert ativa["rotulo"] == "Pico no ticket médio" and ativa["z"] >= 3 and ativa["valor"] == 9.0
+    det.ouvinte(OP, [linha(21, 210, 1.0)])
+    assert det.ativas("pbx1") == []
+
+
+def test_queda_na_taxa_de_chamadas_e_contador_zerado():
+    det = DetectorAnomalias(aquecimento=10)
+    chamadas, linhas = 0, []
+    for i in range(20):
+        chamadas += 10 + (i % 3)
+        linhas.append(linha(i, chamadas, 1.0))
+    det.ouvinte(OP, linhas)
+    det.ouvinte(OP, [linha(20, chamadas, 1.0)])  # nenhuma chamada no último minuto
+    (ativa,) = det.ativas("pbx1")
+    assert ativa["rotulo"] == "Queda nas chamadas" and ativa["valor"] == 0.0
+    det.ouvinte(OP, [linha(21, chamadas + 11, 1.0)])
+    assert det.ativas("pbx1") == []
+
+    det.ouvinte(OP, [linha(22, 0, 1.0), linha(23, 11, 1.0)])  # contador zerado (virada do dia)
+    assert det.ativas("pbx1") == []  # o recomeço não vira taxa negativa
@@ -0,0 +1,53 @@
+from painel.burn_rate import EstimadorTaxa
+
+T0 = 1_800_000_000.0
+
+
+def alimentar(est, inicio, fim, passo_s, taxa_s, v0=0.0):
+    t = inicio
+    while t <= fim:
+        est.adicionar(T0 + t, v0 + taxa_s * t)
+        t += passo_s
+
+
+def test_taxa_de_uma_reta():
+    est = EstimadorTaxa(janela_s=3600)
+    alimentar(est, 0, 1800, 60, 0.01)
+    assert abs(est.taxa_por_s() - 0.01) < 1e-12
+    assert est.ultimo == (T0 + 1800, 18.0)
+
+
+def test_contador_zerado_recomeca_a_janela():
+    est = EstimadorTaxa(janela_s=3600)
+    alimentar(est, 0, 600, 60, 0.05)
+    est.adicionar(T0 + 660, 0.0)
+    assert est.taxa_por_s() is None
+    est.adicionar(T0 + 720, 0.6)
+    assert abs(est.taxa_por_s() - 0.01) < 1e-12
+
+
+def test_eta_e_ultrapassado():
+    est = EstimadorTaxa(janela_s=3600)
+    alimentar(est, 0, 1800, 60, 0.01)  # último: 18.0 em T0 + 1800
+    proj = est.projecao(limite=36.0, agora=T0 + 1800)
+    assert abs(proj["eta_s"] - 1800) < 1e-6 and not proj["ultrapassado"]
+    proj = est.projecao(limite=18.0, agora=T0 + 1800)
+    assert proj["eta_s"] == 0.0 and proj["ultrapassado"]
+
+
+def test_cruzamento_projetado_no_passado_e_iminente_nao_ultrapassado():
+    est = EstimadorTaxa(janela_s=3600)
+    alimentar(est, 0, 1800, 60, 0.01)
+    # sem ponto novo há 1h: no ritmo, 20.0 teria sido cruzado há muito, mas o valor visto é 18.0
+    proj = est.projecao(limite=20.0, agora=T0 + 5400)
+    assert proj["eta_s"] == 0.0
+    assert not proj["ultrapassado"]
+
+
+def test_execucao_longa_mantem_a_precisao():
+    est = EstimadorTaxa(janela_s=3600)
+    alimentar(est, 0, 30 * 24 * 3600, 60, 0.01, v0=1.0)  # 30 dias, um ponto por minuto
+    assert abs(est.taxa_por_s() - 0.01) < 1e-10
+    assert est._pontos[0][0] <= est.janela_s  # _t0 acompanha a janela
+    t_ult, v_ult = est.ultimo
+    assert t_ult == T0 + 30 * 24 * 3600 and abs(v_ult - (1.0 + 0.01 * 30 * 24 * 3600)) < 1e-6
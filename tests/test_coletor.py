@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+from falsos import ClienteFalso
+
+from painel.coletor import Coletor
+from painel.historico import HistoricoStore, caminho_historico, sincronizar_operacao
+from painel.registro import carregar_registro
+
+
+def linha(id_, created_at, valor):
+    return {"id": id_, "created_at": created_at, "valor_consumido_pbx1": valor, "qtde_lead_pbx1": 1}
+
+
+def test_replica_seguidora_le_o_historico_gravado_pela_eleita(tmp_path):
+    registro = carregar_registro()
+    registro = {**registro, "operacoes": [op for op in registro["operacoes"] if op["id"] == "pbx1"]}
+    caminho = str(tmp_path / "historico.sqlite3")
+    agora = datetime.now(timezone.utc).replace(microsecond=0)
+    ts = [(agora - timedelta(minutes=m)).isoformat() for m in (3, 2, 1)]
+    cliente = ClienteFalso({"operacao_pbx1": [linha(1, ts[0], 10.0), linha(2, ts[1], 20.0)]})
+
+    eleita = Coletor(cliente, registro, HistoricoStore(caminho), lider=lambda: True)
+    seguidora = Coletor(None, registro, HistoricoStore(caminho), lider=lambda: False)  # nunca consulta
+    recebidas = []
+    seguidora.adicionar_ouvinte(lambda op, novas: recebidas.extend(m["valor_consumido"] for m in novas))
+
+    assert eleita.ciclo() == 2
+    assert seguidora.ciclo() == 2
+    cliente.tabelas["operacao_pbx1"].append(linha(3, ts[2], 30.0))
+    eleita.ciclo()
+    seguidora.ciclo()
+    assert seguidora.ciclo() == 0
+    assert recebidas == [10.0, 20.0, 30.0]
+    assert seguidora.ultimas["pbx1"]["valor_consumido"] == 30.0
+
+
+def test_linha_da_marca_volta_na_consulta_mas_nao_e_entregue_de_novo(tmp_path):
+    registro = carregar_registro()
+    op = next(o for o in registro["operacoes"] if o["id"] == "pbx1")
+    agora = datetime.now(timezone.utc).replace(microsecond=0)
+    cliente = ClienteFalso({"operacao_pbx1": [linha(1, (agora - timedelta(minutes=2)).isoformat(), 10.0)]})
+    store = HistoricoStore(str(tmp_path / "historico.sqlite3"))
+
+    assert [m["valor_consumido"] for m in sincronizar_operacao(cliente, store, op)] == [10.0]
+    assert sincronizar_operacao(cliente, store, op) == []
+    cliente.tabelas["operacao_pbx1"].append(linha(2, (agora - timedelta(minutes=1)).isoformat(), 20.0))
+    assert [m["valor_consumido"] for m in sincronizar_operacao(cliente, store, op)] == [20.0]
+    assert store.serie("pbx1")["valor_consumido"] == [10.0, 20.0]
+
+
+def test_historico_vai_para_o_diretorio_compartilhado_quando_ligado(monkeypatch):
+    monkeypatch.delenv("PAINEL_COMPARTILHADO", raising=False)
+    assert caminho_historico("/dados") == "/dados/historico.sqlite3"
+    monkeypatch.setenv("PAINEL_COMPARTILHADO", "1")
+    monkeypatch.setenv("PAINEL_COMPARTILHADO_DIR", "/comum")
+    assert caminho_historico("/dados") == "/comum/historico.sqlite3"
+
+
+def test_coletor_reproduz_a_gravacao_sem_rede(tmp_path, monkeypatch):
+    from painel import historico
+    from painel.gravacao import Gravacao
+
+    registro = carregar_registro()
+    op = next(o for o in registro["operacoes"] if o["id"] == "pbx1")
+    agora = datetime.now(timezone.utc).replace(microsecond=0)
+    cliente = ClienteFalso({"operacao_pbx1": [linha(1, (agora - timedelta(minutes=2)).isoformat(), 10.0)]})
+    arquivo = str(tmp_path / "gravacao.jsonl")
+
+    monkeypatch.setattr(historico, "GRAVACAO", Gravacao("gravar", arquivo))
+    sincronizar_operacao(cliente, HistoricoStore(str(tmp_path / "a.sqlite3")), op)
+    cliente.tabelas["operacao_pbx1"].append(linha(2, (agora - timedelta(minutes=1)).isoformat(), 20.0))
+    sincronizar_operacao(cliente, HistoricoStore(str(tmp_path / "a.sqlite3")), op)
+
+    monkeypatch.setattr(historico, "GRAVACAO", Gravacao("reproduzir", arquivo, respeitar_tempo=False))
+    store = HistoricoStore(str(tmp_path / "b.sqlite3"))
+    sem_rede = ClienteFalso()
+    for _ in range(4):  # a reprodução volta ao primeiro lote: nada em dobro, a marca não recua
+        sincronizar_operacao(sem_rede, store, op)
+    assert sem_rede.chamadas == []
+    assert store.serie("pbx1")["valor_consumido"] == [10.0, 20.0]
+    assert store.marca("operacao_pbx1")[1] == (agora - timedelta(minutes=1)).isoformat()
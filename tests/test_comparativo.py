@@ -0,0 +1,58 @@
+import time
+from datetime import datetime, timezone
+
+from painel.comparativo import UM_DIA_S, ComparativoDiario
+from painel.historico import HistoricoStore, hora_de
+
+AGORA = hora_de(time.time()) + 20 * 60  # hh:20 (o ouvinte descarta o que passou de 49h)
+OP = {"id": "pbx1", "tabela": "operacao_pbx1"}
+
+
+def ponto(ts: float, valor: float) -> dict:
+    return {
+        "created_at": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(), "status": "ATIVA",
+        "qtde_mailing": 0, "ticket_medio": None, "qtde_leads": int(valor), "qtde_chamadas": 0,
+        "ultimo_lead": None, "valor_consumido": valor,
+    }
+
+
+def pontos_de_ontem() -> list:
+    ontem = AGORA - UM_DIA_S
+    # hora anterior fecha em 5; na hora de ontem: :10 -> 10, :20 -> 20, :59 -> 59
+    return [ponto(ontem - 30 * 60, 1.0), ponto(ontem - 21 * 60, 5.0),
+            ponto(ontem - 10 * 60, 10.0), ponto(ontem, 20.0), ponto(ontem + 39 * 60, 59.0)]
+
+
+def test_ontem_usa_o_ponto_do_mesmo_minuto_e_nao_o_fechamento_da_hora():
+    comparativo = ComparativoDiario()
+    comparativo.ouvinte(OP, pontos_de_ontem())
+    assert comparativo.ontem("pbx1", AGORA)["valor_consumido"] == 20.0
+    assert comparativo.ontem("pbx1", AGORA - 60)["valor_consumido"] == 10.0
+    assert comparativo.ontem("pbx1", AGORA + 38 * 60)["valor_consumido"] == 20.0
+
+
+def test_sem_ponto_na_hora_ainda_usa_o_fechamento_da_hora_anterior():
+    comparativo = ComparativoDiario()
+    comparativo.ouvinte(OP, pontos_de_ontem())
+    assert comparativo.ontem("pbx1", AGORA - 15 * 60)["valor_consumido"] == 5.0
+    assert comparativo.ontem("pbx1", AGORA + 2 * 3600) is None
+
+
+def test_preencher_le_os_pontos_do_historico(tmp_path):
+    store = HistoricoStore(str(tmp_path / "historico.sqlite3"))
+    novas = pontos_de_ontem()
+    store.anexar("pbx1", "operacao_pbx1", novas, "created_at", novas[-1]["created_at"])
+    comparativo = ComparativoDiario()
+    comparativo.preencher(store, agora=AGORA)
+    assert comparativo.ontem("pbx1", AGORA)["valor_consumido"] == 20.0
+
+
+def test_historico_antigo_ganha_os_agregados_por_minuto_na_abertura(tmp_path):
+    caminho = str(tmp_path / "historico.sqlite3")
+    store = HistoricoStore(caminho)
+    novas = pontos_de_ontem()
+    store.anexar("pbx1", "operacao_pbx1", novas, "created_at", novas[-1]["created_at"])
+    with store._conn:
+        store._conn.execute("delete from agregados_minuto")
+    store.fechar()
+    assert len(HistoricoStore(caminho).agregados_minuto(desde_ts=0)) == len(novas)
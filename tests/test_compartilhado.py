@@ -0,0 +1,22 @@
+import time
+
+from painel.compartilhado import SnapshotCompartilhado
+
+
+def test_tabela_que_para_de_vir_expira_mesmo_com_o_arquivo_em_dia(tmp_path):
+    falhar = set()
+
+    def buscar(tabela):
+        if tabela in falhar:
+            raise RuntimeError("fora do ar")
+        return {"tabela": tabela}
+
+    comp = SnapshotCompartilhado(str(tmp_path), buscar, lambda: {}, ["a", "b"], intervalo_s=0.1)
+    comp.ciclo()
+    assert comp.linha("b") == {"tabela": "b"}
+
+    falhar.add("b")
+    time.sleep(0.35)
+    comp.ciclo()  # arquivo novo, mas "b" segue com a linha de 3+ ciclos atrás
+    assert comp.linha("a") == {"tabela": "a"}
+    assert comp.linha("b") is None
@@ -0,0 +1,50 @@
+import pytest
+
+from painel import dados
+
+
+class _ClienteRpc:
+    def __init__(self, erro=None, linhas=None):
+        self.erro, self.linhas, self.chamadas = erro, linhas, 0
+
+    def rpc(self, _nome, _corpo):
+        self.chamadas += 1
+        if self.erro:
+            raise self.erro
+        return type("Consulta", (), {"execute": lambda _s: type("Resposta", (), {"data": self.linhas})()})()
+
+
+@pytest.fixture(autouse=True)
+def _zerar(monkeypatch):
+    monkeypatch.setattr(dados, "_totais_ausente_ate", 0.0)
+
+
+def test_funcao_ausente_lembrada():
+    cliente = _ClienteRpc(erro=RuntimeError("{'code': 'PGRST202', 'message': 'Could not find the function'}"))
+    assert dados.consultar_totais_sql(cliente, [("vivo", "operacao_a", "a")]) is None
+    assert dados.totais_sql_ausente()
+    assert dados.consultar_totais_sql(cliente, [("vivo", "operacao_a", "a")]) is None
+    assert cliente.chamadas == 1
+
+
+def test_outras_falhas_propagam():
+    cliente = _ClienteRpc(erro=RuntimeError("timeout"))
+    with pytest.raises(RuntimeError):
+        dados.consultar_totais_sql(cliente, [])
+    assert not dados.totais_sql_ausente()
+
+
+def test_linhas_da_funcao():
+    cliente = _ClienteRpc(linhas=[{"grupo": "vivo", "valor_consumido": 3.0}])
+    assert dados.consultar_totais_sql(cliente, []) == [{"grupo": "vivo", "valor_consumido": 3.0}]
+    assert dados.consultar_totais_sql(_ClienteRpc(linhas=None), []) == []
+
+
+def test_reproducao_sem_a_chamada_vale_como_ausente(tmp_path, monkeypatch):
+    from painel.gravacao import Gravacao
+
+    (tmp_path / "gravacao.jsonl").write_text("")
+    monkeypatch.setattr(dados, "GRAVACAO", Gravacao("reproduzir", str(tmp_path / "gravacao.jsonl")))
+    cliente = _ClienteRpc(linhas=[])
+    assert dados.consultar_totais_sql(cliente, []) is None
+    assert cliente.chamadas == 0 and dados.totais_sql_ausente()
@@ -0,0 +1,124 @@
+import csv
+import math
+from io import StringIO
+
+import pytest
+
+from painel.formatacao import normalize_text, to_float_safe
+from painel.limites import ResolvedorLimites, get_limites_operacao, limites_das_linhas, montar_aliases_limites
+from painel.registro import carregar_registro
+
+CSV = """Servidor,Valor Consumido,Ticket Médio,Observação
+Operação PBX1,"1.234,56","2,50",ok
+PBX2,500,3,
+pbx total,"2.000,00",,sem ticket
+SOC,"R$ 750,00","1,75",
+  RPO (Vivo)  ,,"2,00",sem valor
+,999,9,linha sem nome
+Operação FMG,"1.000","2,5",
+Total Vivo,"10.000,00","2,40",
+"""
+
+PLANILHAS = {
+    "nomes_da_planilha": {
+        "Operação PBX1": {"valor_consumido": 1.0, "ticket": 1.0},
+        "PBX2": {"valor_consumido": 2.0, "ticket": 2.0},
+        "pbx total": {"valor_consumido": 3.0, "ticket": 3.0},
+        "SOC": {"valor_consumido": 4.0, "ticket": 4.0},
+        "RPO (Vivo)": {"valor_consumido": 5.0, "ticket": 5.0},
+        "Operação FMG": {"valor_consumido": 6.0, "ticket": 6.0},
+        "Total Vivo": {"valor_consumido": 7.0, "ticket": 7.0},
+        "RPA Vivo Noturno": {"valor_consumido": 8.0, "ticket": 8.0},
+        "Noturno": {"valor_consumido": 9.0, "ticket": 9.0},
+    },
+    # mesma chave normalizada duas vezes: o passo normalizado fica com a primeira,
+    # o de aliases com a última (como no dicionário da get_limites_operacao)
+    "normalizadas_repetidas": {
+        "OPERAÇÃO PBX3": {"valor_consumido": 1.0, "ticket": None},
+        "operacao pbx3": {"valor_consumido": 2.0, "ticket": None},
+        "Pbx4": {"valor_consumido": 3.0, "ticket": None},
+        "PBX4": {"valor_consumido": 4.0, "ticket": None},
+        "Operação PBX5 ": {"valor_consumido": 5.0, "ticket": None},
+    },
+    "vazia": {},
+}
+
+TITULOS_EXTRAS = [
+    "PBX1", "pbx1", "Operação pbx2", "SOC", "soc vivo", "Operação RPO", "RPA", "Operação Noturno (Vivo)",
+    "Operação Inexistente", "",
+]
+
+
+def limites_do_dataframe_pandas(texto: str) -> dict:
+    # o parse de antes do csv da stdlib (pd.read_csv + limites_do_dataframe)
+    pd = pytest.importorskip("pandas")
+    df = pd.read_csv(StringIO(texto))
+    if df.empty:
+        return {}
+    df.columns = [normalize_text(c) for c in df.columns]
+    col_servidor = col_valor = col_ticket = None
+    for c in df.columns:
+        if col_servidor is None and ("servidor" in c or "operacao" in c or "nome" in c):
+            col_servidor = c
+        if col_valor is None and (("valor" in c and "consum" in c) or c in ["valor consumido", "limite valor", "valor"]):
+            col_valor = c
+        if col_ticket is None and ("ticket" in c or c in ["ticket medio", "limite ticket", "ticket"]):
+            col_ticket = c
+    if not col_servidor:
+        return {}
+    limites = {}
+    for _, row in df.iterrows():
+        nome = str(row.get(col_servidor, "")).strip()
+        if not nome or nome.lower() == "nan":
+            continue
+        limites[nome] = {
+            "valor_consumido": to_float_safe(row.get(col_valor)) if col_valor else None,
+            "ticket": to_float_safe(row.get(col_ticket)) if col_ticket else None,
+        }
+    return limites
+
+
+def _sem_nan(limites: dict) -> dict:
+    # célula vazia: NaN no pandas, None no csv
+    return {
+        nome: {k: None if isinstance(v, float) and math.isnan(v) else v for k, v in lim.items()}
+        for nome, lim in limites.items()
+    }
+
+
+@pytest.mark.parametrize("texto", [
+    CSV,
+    "Nome da Operação,Limite Valor\nPBX1,10\n",
+    "Operação,Limite Ticket,Valor\nPBX1,\"2,00\",\"1.500,00\"\n",
+    "Coluna,Outra\nx,y\n",  # sem coluna de servidor
+    "Servidor,Valor Consumido\n",  # só o cabeçalho
+])
+def test_limites_das_linhas_igual_ao_pandas(texto):
+    esperado = _sem_nan(limites_do_dataframe_pandas(texto))
+    assert limites_das_linhas(list(csv.DictReader(StringIO(texto)))) == esperado
+
+
+@pytest.mark.parametrize("planilha", sorted(PLANILHAS))
+def test_resolvedor_igual_a_busca_linear(planilha):
+    registro = carregar_registro()
+    aliases = montar_aliases_limites(registro)
+    limites = PLANILHAS[planilha]
+    resolvedor = ResolvedorLimites(limites, aliases)
+    titulos = [item["titulo"] for item in registro["grupos"] + registro["operacoes"]] + TITULOS_EXTRAS
+    for titulo in titulos:
+        esperado = get_limites_operacao(limites, titulo, aliases)
+        assert resolvedor.resolver(titulo) == esperado, titulo
+        assert resolvedor.resolver(titulo) == esperado, titulo  # de novo, pelo memo
+
+
+def test_cada_passo_da_busca_e_exercitado():
+    registro = carregar_registro()
+    aliases = montar_aliases_limites(registro)
+    resolvedor = ResolvedorLimites(PLANILHAS["nomes_da_planilha"], aliases)
+    assert resolvedor.resolver("Operação PBX1")["valor_consumido"] == 1.0       # exato
+    assert resolvedor.resolver("operação pbx1")["valor_consumido"] == 1.0       # normalizado
+    assert resolvedor.resolver("Operação PBX Total")["valor_consumido"] == 3.0  # alias
+    assert resolvedor.resolver("Operação FMG (Vivo)")["valor_consumido"] == 6.0  # alias
+    assert resolvedor.resolver("Operação Noturno (Vivo)")["valor_consumido"] == 9.0  # simplificação
+    assert resolvedor.resolver("Operação RPA (Vivo)")["valor_consumido"] == 8.0  # contenção
+    assert resolvedor.resolver("Operação Inexistente") == {}
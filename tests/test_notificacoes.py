@@ -0,0 +1,77 @@
+from falsos import FonteFixa, metricas
+
+from painel.alertas import MotorAlertas
+from painel.notificacoes import DestinoMemoria, Notificador
+from painel.registro import carregar_registro
+
+T0 = 1_800_000_000.0
+
+
+def montar(intervalo_min_s=600.0, max_por_minuto=20, histerese=0.0):
+    motor = MotorAlertas(carregar_registro(), FonteFixa({"Operação PBX1": {"valor_consumido": 100.0}}), histerese)
+    destino = DestinoMemoria()
+    notificador = Notificador([destino], intervalo_min_s=intervalo_min_s, max_por_minuto=max_por_minuto)
+    motor.adicionar_ouvinte(notificador.ouvinte)
+    return motor, notificador, destino
+
+
+def estados(destino):
+    return [(e["alvo"], e["regra"], e["para"]) for e in destino.eventos]
+
+
+def test_histerese_segura_o_alerta_perto_do_limite():
+    motor, _, destino = montar(intervalo_min_s=0, histerese=0.05)
+    motor.avaliar({"pbx1": metricas(101)}, T0)
+    motor.avaliar({"pbx1": metricas(97)}, T0 + 60)  # abaixo do limite, mas acima de 95
+    assert motor.estado("operacao", "pbx1")["valor"]["ativo"]
+    motor.avaliar({"pbx1": metricas(94)}, T0 + 120)
+    assert not motor.estado("operacao", "pbx1")["valor"]["ativo"]
+    assert estados(destino) == [("pbx1", "valor", "alerta"), ("pbx1", "valor", "ok")]
+
+
+def test_volta_ao_normal_dentro_do_intervalo_sai_quando_a_janela_abre():
+    motor, notificador, destino = montar(intervalo_min_s=600)
+    motor.avaliar({"pbx1": metricas(150)}, T0)
+    motor.avaliar({"pbx1": metricas(50)}, T0 + 60)
+    assert estados(destino) == [("pbx1", "valor", "alerta")]
+    assert notificador.liberar(T0 + 300) == 0
+    assert notificador.liberar(T0 + 601) == 1
+    assert estados(destino) == [("pbx1", "valor", "alerta"), ("pbx1", "valor", "ok")]
+    assert notificador.liberar(T0 + 1300) == 0  # não repete
+
+
+def test_pendente_descartado_quando_o_estado_volta_ao_ja_notificado():
+    motor, notificador, destino = montar(intervalo_min_s=600)
+    motor.avaliar({"pbx1": metricas(150)}, T0)
+    motor.avaliar({"pbx1": metricas(50)}, T0 + 60)
+    motor.avaliar({"pbx1": metricas(150)}, T0 + 120)
+    assert notificador.pendentes() == []
+    assert notificador.liberar(T0 + 700) == 0
+    assert estados(destino) == [("pbx1", "valor", "alerta")]
+
+
+def test_limite_por_minuto_segura_e_depois_entrega():
+    destino = DestinoMemoria()
+    notificador = Notificador([destino], intervalo_min_s=0, max_por_minuto=2)
+    transicoes = [
+        {"tipo": "operacao", "alvo": f"op{i}", "titulo": f"Op {i}", "regra": "valor",
+         "de": "ok", "para": "alerta", "valor": 150.0, "limite": 100.0, "ts": T0}
+        for i in range(3)
+    ]
+    notificador.ouvinte(transicoes)
+    assert [e["alvo"] for e in destino.eventos] == ["op0", "op1"]
+    assert notificador.suprimidos == 1
+    assert notificador.liberar(T0 + 30) == 0
+    assert notificador.liberar(T0 + 61) == 1
+    assert [e["alvo"] for e in destino.eventos] == ["op0", "op1", "op2"]
+
+
+def test_volta_ao_normal_sem_alerta_avisado_nao_notifica():
+    destino = DestinoMemoria()
+    notificador = Notificador([destino], intervalo_min_s=0, max_por_minuto=1)
+    alerta = {"tipo": "operacao", "alvo": "a", "titulo": "A", "regra": "valor",
+              "de": "ok", "para": "alerta", "valor": 150.0, "limite": 100.0, "ts": T0}
+    notificador.ouvinte([dict(alerta, alvo="b"), alerta])  # o alerta de "a" fica pendente pelo limite
+    notificador.ouvinte([dict(alerta, de="alerta", para="ok", ts=T0 + 10)])
+    assert notificador.liberar(T0 + 120) == 0
+    assert [e["alvo"] for e in destino.eventos] == ["b"]
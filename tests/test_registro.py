@@ -0,0 +1,75 @@
+import pytest
+
+from painel.registro import carregar_registro, montar_registro, operacoes_do_grupo
+
+
+def config(**extra):
+    return {
+        "grupos": [
+            {"id": "vivo", "titulo": "Operação Vivo Total", "subtitulo": "Vivo", "bg_color": "#111", "quadrante": 1},
+            {"id": "norte", "pai": "vivo", "titulo": "Norte", "subtitulo": "Região", "bg_color": "#222"},
+        ],
+        "operacoes": [
+            {"grupo": "norte", "titulo": "Operação SOC", "subtitulo": "SOC", "tabela": "operacao_soc",
+             "sufixo": "soc", "bg_color": "#333"},
+            {"grupo": "vivo", "titulo": "Operação RPO", "subtitulo": "RPO", "tabela": "operacao_rpo",
+             "sufixo": "rpo", "bg_color": "#444", "entra_no_total": False},
+        ],
+        **extra,
+    }
+
+
+def test_registro_padrao_valido():
+    registro = carregar_registro()
+    assert registro["operacoes"] and registro["raizes"]
+    assert all(op["grupo"] in registro["grupos_por_id"] for op in registro["operacoes"])
+
+
+def test_defaults_e_ordem_do_rollup():
+    registro = montar_registro(config())
+    assert registro["operacoes_por_id"]["soc"]["entra_no_total"] is True  # id cai no sufixo
+    assert registro["grupos_por_id"]["norte"]["ticket_medio"] == "ponderado"
+    assert registro["ordem_rollup"] == ["norte", "vivo"]  # filho antes do pai
+    assert [op["id"] for op in operacoes_do_grupo(registro, "vivo", somente_total=True, incluir_subgrupos=True)] == ["soc"]
+
+
+@pytest.mark.parametrize("secao, i, campo, contexto", [
+    ("grupos", 0, "titulo", "grupo #0"),
+    ("grupos", 1, "bg_color", "grupo #1"),
+    ("operacoes", 0, "tabela", "operação #0"),
+    ("operacoes", 1, "sufixo", "operação #1"),
+])
+def test_campo_obrigatorio_ausente(secao, i, campo, contexto):
+    c = config()
+    del c[secao][i][campo]
+    with pytest.raises(ValueError, match=f"{contexto}: campos obrigatórios ausentes: {campo}"):
+        montar_registro(c)
+
+
+def test_campo_obrigatorio_vazio_conta_como_ausente():
+    c = config()
+    c["operacoes"][0]["tabela"] = ""
+    with pytest.raises(ValueError, match="operação #0: campos obrigatórios ausentes: tabela"):
+        montar_registro(c)
+
+
+def test_grupo_desconhecido():
+    c = config()
+    c["operacoes"][0]["grupo"] = "sul"
+    with pytest.raises(ValueError, match="operação soc: grupo desconhecido 'sul'"):
+        montar_registro(c)
+
+
+@pytest.mark.parametrize("alterar, mensagem", [
+    (lambda c: c["grupos"][1].update(pai="centro"), "grupo norte: pai desconhecido 'centro'"),
+    (lambda c: c["grupos"].append(dict(c["grupos"][0])), "grupo duplicado: vivo"),
+    (lambda c: c["operacoes"].append(dict(c["operacoes"][0])), "operação duplicada: soc"),
+    (lambda c: c["grupos"][0].pop("quadrante"), "grupo vivo: grupo raiz precisa de 'quadrante'"),
+    (lambda c: c["grupos"][0].update(ticket_medio="mediana"), "grupo vivo: ticket_medio inválido 'mediana'"),
+    (lambda c: c["grupos"][0].update(pai="norte"), "ciclo"),
+])
+def test_configuracao_invalida(alterar, mensagem):
+    c = config()
+    alterar(c)
+    with pytest.raises(ValueError, match=mensagem):
+        montar_registro(c)
@@ -0,0 +1,111 @@
+import os
+import re
+from datetime import timezone
+
+from painel.registro import carregar_registro
+from painel.rollup import calcular_rollup, calcular_rollup_sql, salvo_em_por_grupo, totalizar
+from painel.tempo import para_datetime
+
+SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql", "painel_totais.sql")
+
+
+def metricas(mailing, leads, chamadas, valor, ticket, ultimo_lead, created_at):
+    return {
+        "status": "ATIVA", "qtde_mailing": mailing, "qtde_leads": leads, "qtde_chamadas": chamadas,
+        "valor_consumido": valor, "ticket_medio": ticket, "ultimo_lead": ultimo_lead, "created_at": created_at,
+    }
+
+
+METRICAS = {
+    "pbx1": metricas(100, 40, 300, 120.5, 2.5, "2024-01-15T10:00:00", "2024-01-15T10:05:00-03:00"),
+    "pbx2": metricas(200, 10, 80, 30.0, 4.0, "2024-01-15 11:30:00", "2024-01-15T13:59:00Z"),
+    "pbx3": metricas(50, 0, 20, 0.0, 0.0, None, "2024-01-15T09:00:00"),
+    "pbx4": metricas(70, 25, 90, 55.25, None, "2024-01-15", None),
+    "pbx5": metricas(999, 999, 999, 999.0, 9.0, "2024-02-01T00:00:00", "2024-02-01T00:00:00"),  # fora do total
+    "soc": metricas(300, 60, 500, 210.0, 3.5, "2024-01-15T08:00:00-03:00", "2024-01-15T11:00:00Z"),
+    "rpo": metricas(10, 5, 7, 12.0, 2.4, "2024-01-15T07:00:00", "2024-01-15T07:01:00"),
+    "fmg": None,
+    "rpa": metricas(1, 1, 1, 1.0, 1.0, None, None),
+}
+
+
+def _utc(valor):
+    dt = para_datetime(valor)
+    return dt.astimezone(timezone.utc).isoformat() if dt else None
+
+
+def linhas_painel_totais(registro, metricas_por_op):
+    """Saída de painel_totais (uma linha por grupo) para as mesmas linhas, como o PostgREST devolve."""
+    grupos = {}
+    for op in registro["operacoes"]:
+        m = metricas_por_op.get(op["id"])
+        if op["entra_no_total"] and m is not None:
+            grupos.setdefault(op["grupo"], []).append(m)
+    linhas = []
+    for grupo, ms in grupos.items():
+        tickets = [m["ticket_medio"] for m in ms if m["ticket_medio"]]
+        com_ticket = [m for m in ms if m["ticket_medio"] is not None]
+        ultimos = [para_datetime(m["ultimo_lead"]) for m in ms if m["ultimo_lead"]]
+        criados = [para_datetime(m["created_at"]) for m in ms if m["created_at"]]
+        linhas.append({
+            "grupo": grupo,
+            "n_operacoes": len(ms),
+            "qtde_mailing": sum(m["qtde_mailing"] for m in ms),
+            "qtde_leads": sum(m["qtde_leads"] for m in ms),
+            "qtde_chamadas": sum(m["qtde_chamadas"] for m in ms),
+            "valor_consumido": sum(m["valor_consumido"] for m in ms),
+            "ticket_soma": sum(tickets),
+            "ticket_n": len(tickets),
+            "ticket_medio": sum(tickets) / len(tickets) if tickets else None,
+            "ticket_pond_num": sum(m["ticket_medio"] * m["qtde_leads"] for m in com_ticket),
+            "ticket_pond_den": sum(m["qtde_leads"] for m in com_ticket),
+            "ultimo_lead": _utc(max(ultimos)) if ultimos else None,
+            "created_at": _utc(max(criados)) if criados else None,
+        })
+    return linhas
+
+
+def test_rollup_sql_igual_ao_rollup_em_python():
+    registro = carregar_registro()
+    esperado = calcular_rollup(registro, METRICAS)
+    obtido = calcular_rollup_sql(registro, linhas_painel_totais(registro, METRICAS))
+    assert obtido.keys() == esperado.keys()
+    for gid in esperado:
+        for campo in ("qtde_mailing", "qtde_leads", "qtde_chamadas", "n_operacoes", "ticket_n", "ticket_pond_den",
+                      "ultimo_lead", "created_at", "ticket_modo"):
+            assert obtido[gid][campo] == esperado[gid][campo], (gid, campo)
+        for campo in ("valor_consumido", "ticket_soma", "ticket_pond_num", "ticket_medio"):
+            assert abs(obtido[gid][campo] - esperado[gid][campo]) < 1e-9, (gid, campo)
+
+
+def test_ticket_ponderado_do_grupo_bate_com_totalizar():
+    registro = carregar_registro()
+    ops = [op["id"] for op in registro["operacoes"] if op["grupo"] == "pbx" and op["entra_no_total"]]
+    plano = totalizar([METRICAS[o] for o in ops])
+    sql = calcular_rollup_sql(registro, linhas_painel_totais(registro, METRICAS))["pbx"]
+    # (2.5*40 + 4.0*10 + 0.0*0) / (40 + 10 + 0): pbx4 sem ticket fica fora do denominador
+    assert abs(sql["ticket_medio"] - 140 / 50) < 1e-9
+    assert abs(sql["ticket_medio"] - plano["ticket_medio"]) < 1e-9
+    assert sql["valor_consumido"] == plano["valor_consumido"]
+
+
+def test_fuso_no_sql_exige_horario():
+    texto = open(SQL, encoding="utf-8").read()
+    padrao = re.search(r"if valor ~ '([^']+)' then\s+return valor::timestamptz", texto).group(1)
+    assert re.search(padrao, "2024-01-15T10:00:00Z")
+    assert re.search(padrao, "2024-01-15T10:00:00.123-03:00")
+    assert re.search(padrao, "2024-01-15 10:00:00+00")
+    assert not re.search(padrao, "2024-01-15")
+    assert not re.search(padrao, "2024-01-15T10:00:00")
+    assert not re.search(padrao, "2024-01-15 10:00")
+
+
+def test_total_com_linha_da_copia_salva_leva_a_hora_mais_antiga():
+    registro = carregar_registro()
+    metricas = {op: (dict(m) if m else None) for op, m in METRICAS.items()}
+    metricas["pbx2"]["salvo_em"] = 2000.0
+    metricas["pbx3"]["salvo_em"] = 1000.0
+    metricas["pbx5"]["salvo_em"] = 10.0  # fora do total
+    salvos = salvo_em_por_grupo(registro, metricas)
+    assert salvos["pbx"] == 1000.0
+    assert salvos["vivo"] is None
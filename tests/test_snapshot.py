@@ -0,0 +1,32 @@
+import json
+
+from painel import snapshot
+from painel.snapshot import CHAVE_SALVO_EM, SnapshotDisco
+
+
+def test_linha_igual_renova_a_hora_da_copia(tmp_path, monkeypatch):
+    relogio = [1000.0]
+    monkeypatch.setattr(snapshot.time, "time", lambda: relogio[0])
+    caminho = str(tmp_path / "snapshot.json")
+    copia = SnapshotDisco(caminho)
+    copia.atualizar_linha("operacao_pbx1", {"valor": 1})
+
+    relogio[0] = 1030.0
+    copia.atualizar_linha("operacao_pbx1", {"valor": 1})
+    assert copia.linha("operacao_pbx1")[CHAVE_SALVO_EM] == 1030.0
+    # no disco, a confirmação sem mudança só vai depois de REGRAVAR_S
+    assert json.load(open(caminho))["linhas"]["operacao_pbx1"]["em"] == 1000.0
+
+    relogio[0] = 1000.0 + snapshot.REGRAVAR_S
+    copia.atualizar_linha("operacao_pbx1", {"valor": 1})
+    assert SnapshotDisco(caminho).linha("operacao_pbx1")[CHAVE_SALVO_EM] == relogio[0]
+
+
+def test_limites_iguais_renovam_a_hora(tmp_path, monkeypatch):
+    relogio = [1000.0]
+    monkeypatch.setattr(snapshot.time, "time", lambda: relogio[0])
+    copia = SnapshotDisco(str(tmp_path / "snapshot.json"))
+    copia.atualizar_limites({"PBX1": {"valor_consumido": 100.0}})
+    relogio[0] = 1500.0
+    copia.atualizar_limites({"PBX1": {"valor_consumido": 100.0}})
+    assert copia.limites_em == 1500.0
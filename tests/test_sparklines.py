@@ -0,0 +1,48 @@
+import math
+
+from painel.sparklines import BuffersOperacoes, RingBuffer, svg_sparkline
+
+
+def test_ring_buffer_sobrescreve_o_mais_antigo():
+    rb = RingBuffer(3)
+    for t in range(1, 8):
+        assert rb.anexar(float(t), t * 10)
+    assert len(rb) == 3
+    assert rb.ultimo_ts == 7.0
+    assert rb.itens() == ([5.0, 6.0, 7.0], [50.0, 60.0, 70.0])
+
+
+def test_ring_buffer_filtra_desde_depois_de_dar_a_volta():
+    rb = RingBuffer(4)
+    for t in range(10, 16):
+        rb.anexar(float(t), t)
+    assert rb.itens(desde_ts=13.0) == ([13.0, 14.0, 15.0], [13.0, 14.0, 15.0])
+    assert rb.itens(desde_ts=99.0) == ([], [])
+
+
+def test_ring_buffer_ignora_fora_de_ordem_e_guarda_none_como_nan():
+    rb = RingBuffer(2)
+    assert rb.anexar(2.0, 1)
+    assert not rb.anexar(2.0, 5)  # mesmo instante (reentrega)
+    assert not rb.anexar(1.0, 5)  # atrasado
+    assert rb.anexar(3.0, None)
+    ts, vals = rb.itens()
+    assert ts == [2.0, 3.0] and vals[0] == 1.0 and math.isnan(vals[1])
+
+
+def test_ring_buffer_vazio_e_capacidade_minima():
+    assert RingBuffer(5).itens() == ([], []) and RingBuffer(5).ultimo_ts is None
+    rb = RingBuffer(0)
+    rb.anexar(1.0, 1)
+    rb.anexar(2.0, 2)
+    assert rb.itens() == ([2.0], [2.0])
+
+
+def test_buffers_por_operacao_e_svg():
+    bufs = BuffersOperacoes(capacidade=2, campos=("valor_consumido",))
+    for t, v in ((1.0, 1), (2.0, 3), (3.0, 2)):
+        bufs.anexar("pbx1", t, {"valor_consumido": v})
+    ts, vals = bufs.serie("pbx1", "valor_consumido")
+    assert (ts, vals) == ([2.0, 3.0], [3.0, 2.0])
+    assert bufs.serie("pbx2", "valor_consumido") == ([], [])
+    assert svg_sparkline(ts, vals).startswith("<svg") and svg_sparkline(ts[:1], vals[:1]) == ""
@@ -0,0 +1,48 @@
+import warnings
+
+import pytest
+
+from painel.formatacao import fmt_datetime_br
+
+pd = pytest.importorskip("pandas")
+
+ENTRADAS = [
+    "2026-10-18 12:04:05",                 # sem fuso: São Paulo
+    "2026-10-18T15:04:05Z",
+    "2026-10-18T15:04:05+00:00",
+    "2026-10-18T15:04:05-03:00",
+    "2026-10-18T15:04:05.123456+00:00",
+    "2026-10-18T15:04:05.1234567+00:00",   # 7 dígitos de fração (o fromisoformat trunca)
+    "2026-10-18",                          # só a data
+    "18/10/2026 12:04:05",                 # dd/mm/aaaa: cai no pandas
+    "18/10/2026",
+    "ontem à tarde",                       # inválida
+    "",
+    None,
+]
+
+
+def fmt_datetime_br_pandas(dt_str):
+    # o caminho de antes do fromisoformat + memo, como estava em painel.formatacao
+    if dt_str is None or dt_str == "":
+        return "-"
+    try:
+        ts = pd.to_datetime(dt_str, errors="coerce")
+        if pd.isna(ts):
+            return "-"
+        if ts.tzinfo is None:
+            ts = ts.tz_localize("America/Sao_Paulo")
+        else:
+            ts = ts.tz_convert("America/Sao_Paulo")
+        return ts.strftime("%d/%m/%Y %H:%M:%S")
+    except Exception:
+        return str(dt_str)
+
+
+@pytest.mark.parametrize("entrada", ENTRADAS)
+def test_fmt_datetime_br_igual_ao_pandas(entrada):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # dayfirst do pandas nas datas dd/mm/aaaa
+        esperado = fmt_datetime_br_pandas(entrada)
+        assert fmt_datetime_br(entrada) == esperado
+        assert fmt_datetime_br(entrada) == esperado  # de novo, agora pelo memo